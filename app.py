@@ -1,80 +1,134 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from career_planner import plan_career_paths
+from confidence_model import career_level_for_experience, predict_batch_with_confidence
+from data_cache import load_salary_data
+from feature_encoder import encoder_for_model
+from market_aggregates import aggregates_version, get_market_aggregates
+from market_cube import get_market_cube, query_market_cube
+from model_registry import ModelServer
+from neighbors_index import comparable_postings, load_neighbor_index
+from prediction_cube import load_prediction_cube, model_file_hash, predict_batch_with_cube
+from salary_sketches import get_segment_sketches, market_position, percentile_table, sketches_version
+from skills_index import get_skills_index, skill_premiums
+from whatif import AXIS_LABELS, SWEEP_PAIRS, run_sweep
+import instrumentation
+from instrumentation import timed
 
-# Page configuration
-st.set_page_config(
-    page_title="CareerCompass PK",
-    page_icon="🔼",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+# Cities offered in the profile forms; only those the model was trained on are shown
+CITY_OPTIONS = ['Lahore', 'Karachi', 'Islamabad', 'Rawalpindi', 'Other']
+
+AREA_OPTIONS = ['General', 'Software & Web Development', 'Engineering', 'Sales & Business Development',
+                'Marketing', 'Operations', 'Accounts, Finance & Financial Services', 'Human Resources']
+
+# Dashboard views; only the selected one runs on a rerun
+VIEWS = [" Salary Range Estimator", " Market Intelligence", " Career Insights"]
+
+def known_options(options, model_data, column):
+    """Options the model's encoder knows, so a choice never silently takes the fallback category"""
+    vocabulary = set(encoder_for_model(model_data).vocabularies[column])
+    return [option for option in options if option in vocabulary]
+
+def prepare_serving_model(model_data, model_path):
+    """Attach the serving indexes to a freshly loaded model, before it is swapped in"""
+    # Precomputed predictions for every estimator input combination
+    model_data['prediction_cube'] = load_prediction_cube(model_data, model_path)
+    
+    # Nearest-neighbour index over the postings, for "comparable postings"
+    model_data['neighbor_index'] = load_neighbor_index(model_data, model_path)
+    
+    # Identifies the model's files in cache keys, with or without a registry
+    model_data['model_hash'] = model_file_hash(model_path)
 
 @st.cache_resource
+@timed()
 def load_confidence_model():
     try:
-        # Load confidence model
-        model_data = joblib.load('salary_prediction_confidence_model.pkl')
+        # Serve the registry's current version (or the default artifact); new
+        # versions are loaded and warmed in the background, then swapped in
+        server = ModelServer(prepare=prepare_serving_model)
         
-        # Load cleaned dataset for market intelligence
-        df = pd.read_csv('cleaned_salary_data.csv')
+        # Load cleaned dataset for market intelligence (only the columns the app uses)
+        df = load_salary_data(['salary_avg', 'experience_years', 'city_grouped', 'Minimum Education', 'Career Level', 'Functional Area'])
         
-        return model_data, df
+        return server, df
     except Exception as e:
         st.error(f"Error loading model: {e}")
         return None, None
 
-def predict_salary_range(job_data, model_data):
+@st.cache_data
+@timed()
+def load_market_aggregates(version):
+    """Market aggregates for an aggregates and dataset version"""
+    return get_market_aggregates()
 
-    models = model_data['models']
-    scaler = model_data['scaler']
-    encoders = model_data['encoders']
-    feature_names = model_data['feature_names']
-    
+@st.cache_resource
+@timed()
+def load_market_cube():
+    """Aggregation cube for drill-down queries on the current dataset version"""
+    return get_market_cube()
+
+@st.cache_resource
+@timed()
+def load_salary_sketches(version):
+    """Per-segment salary quantile sketches for a dataset and ingested-store version"""
+    return get_segment_sketches()
+
+@st.cache_resource
+@timed()
+def load_skills_index():
+    """Inverted skills index for the current dataset version"""
+    return get_skills_index()
+
+@st.cache_data(max_entries=128)
+def load_whatif_sweep(base_items, model_hash, _model_data):
+    """Counterfactual sweep around a base profile, cached per profile and model file hash"""
+    return run_sweep(dict(base_items), _model_data)
+
+@st.cache_data(max_entries=128)
+def load_career_paths(base_items, horizon, objective, risk_aversion, cities, areas, model_hash, _model_data):
+    """Top career paths for a base profile, planner settings and model file hash"""
+    return plan_career_paths(dict(base_items), _model_data, horizon=horizon, objective=objective,
+                             risk_aversion=risk_aversion, cities=list(cities), areas=list(areas))
+
+def predict_salary_ranges(profiles, model_data):
+    """Predict salary ranges for a batch of profiles in one ensemble pass"""
     try:
-        feature_vector = [
-            job_data['experience_years'],
-            encoders['Career Level'].transform([job_data['Career Level']])[0],
-            encoders['Functional Area'].transform([job_data['Functional Area']])[0],
-            encoders['city_grouped'].transform([job_data['city_grouped']])[0],
-            encoders['Minimum Education'].transform([job_data['Minimum Education']])[0],
-            1 if job_data['city_grouped'] in ['Karachi', 'Islamabad', 'Lahore'] else 0,
-            job_data['experience_years'] ** 2,
-            4 if job_data['Minimum Education'] == 'Bachelors' else 5
-        ]
-        
-        X = pd.DataFrame([feature_vector], columns=feature_names)
-        X_scaled = scaler.transform(X)
+        if 'prediction_cube' in model_data:
+            results = predict_batch_with_cube(profiles, model_data['prediction_cube'], model_data)
+            instrumentation.increment('predict.cube_rows', len(results))
+        else:
+            results = predict_batch_with_confidence(profiles, model_data)
+            instrumentation.increment('predict.live_rows', len(results))
         
-        predictions = [model.predict(X_scaled)[0] for model in models]
-        
-        mean_pred = np.mean(predictions)
-        std_pred = np.std(predictions)
-        
-        lower_bound = max(10000, mean_pred - 1.96 * std_pred)
-        upper_bound = min(500000, mean_pred + 1.96 * std_pred)
-        
-        
-        return {
-            'prediction': mean_pred,
-            'lower_bound': lower_bound,
-            'upper_bound': upper_bound,
-            'uncertainty': std_pred,
-
-        }
+        return [
+            {
+                'prediction': mean_pred,
+                'lower_bound': lower_bound,
+                'upper_bound': upper_bound,
+                'uncertainty': std_pred,
+            }
+            for mean_pred, std_pred, lower_bound, upper_bound in results
+        ]
     except Exception as e:
         st.error(f"Prediction error: {e}")
         return None
 
+@timed()
+def predict_salary_range(job_data, model_data):
+    results = predict_salary_ranges([job_data], model_data)
+    return results[0] if results else None
+
+@timed()
 def create_salary_gauge(prediction_result, avg_salary):
     """Create a salary gauge visualization"""
     if not prediction_result:
         return None
     
+    # Plotly is imported by the charts that use it, not at app startup
+    import plotly.graph_objects as go
+    
     fig = go.Figure(go.Indicator(
         mode = "gauge+number+delta",
         value = prediction_result['prediction'],
@@ -101,45 +155,11 @@ def create_salary_gauge(prediction_result, avg_salary):
     fig.update_layout(height=400, font={'size': 14})
     return fig
 
-def analyze_market_trends(df):
-    """Analyze market trends from the dataset"""
-    
-    # Salary by experience
-    exp_salary = df.groupby('experience_years')['salary_avg'].agg(['mean', 'count']).reset_index()
-    exp_salary = exp_salary[exp_salary['count'] >= 5]  # Only show experience levels with enough data
-    
-    # Education level impact analysis
-    education_salary = df.groupby('Minimum Education')['salary_avg'].agg(['mean', 'count']).reset_index()
-    education_salary = education_salary[education_salary['count'] >= 10].sort_values('mean', ascending=False)
-    
-    # Salary by city (exclude neighborhoods like Johar Town, DHA) - Top 6 only
-    excluded_areas = ['Johar Town', 'DHA']
-    city_df = df[~df['city_grouped'].isin(excluded_areas)]
-    city_salary = city_df.groupby('city_grouped')['salary_avg'].agg(['mean', 'count']).reset_index()
-    city_salary = city_salary[city_salary['count'] >= 10].sort_values('mean', ascending=False).head(6)
-    
-    # Education impact (Bachelors vs Diploma)
-    education_impact = df.groupby('Minimum Education')['salary_avg'].mean()
-    education_premium = education_impact.get('Bachelors', 0) - education_impact.get('Diploma', 0) if 'Bachelors' in education_impact.index and 'Diploma' in education_impact.index else 0
-    
-    # Career level progression (include Department Head even with small count)
-    career_salary = df.groupby('Career Level')['salary_avg'].agg(['mean', 'count']).reset_index()
-    # Keep all career levels with at least 5 samples, or if it's Department Head
-    career_salary = career_salary[
-        (career_salary['count'] >= 5) | 
-        (career_salary['Career Level'] == 'Department Head')
-    ].sort_values('mean')
-    
-    return {
-        'experience_trend': exp_salary,
-        'education_comparison': education_salary,
-        'city_comparison': city_salary,
-        'education_premium': education_premium,
-        'career_progression': career_salary
-    }
-
+@timed()
 def create_market_intelligence_charts(trends):
     """Create market intelligence visualizations"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
     
     # Create subplots
     fig = make_subplots(
@@ -200,25 +220,72 @@ def create_market_intelligence_charts(trends):
     
     return fig
 
+def render_debug_panel():
+    """Sidebar panel with this rerun's stage timings and rolling latency histograms"""
+    with st.sidebar.expander("⏱️ Performance", expanded=False):
+        spans = instrumentation.rerun_spans()
+        st.markdown("**This rerun**")
+        if spans:
+            st.dataframe(pd.DataFrame(spans, columns=['Stage', 'ms']).round(2), hide_index=True, use_container_width=True)
+        else:
+            st.caption("No instrumented stages ran (all served from cache)")
+        
+        stats = instrumentation.snapshot()
+        if stats['timings']:
+            st.markdown(f"**Rolling (last {instrumentation.ROLLING_WINDOW} calls)**")
+            rolling = pd.DataFrame([
+                {'Stage': name, 'Calls': summary['count'], 'p50 ms': summary['p50_ms'], 'p95 ms': summary['p95_ms'], 'Max ms': summary['max_ms']}
+                for name, summary in stats['timings'].items()
+            ]).sort_values('p95 ms', ascending=False).round(2)
+            st.dataframe(rolling, hide_index=True, use_container_width=True)
+            
+            stage = st.selectbox("Latency histogram", list(rolling['Stage']), key='debug_histogram_stage')
+            labels = [f"≤{edge:g} ms" for edge in stats['histogram_edges_ms']] + [f">{stats['histogram_edges_ms'][-1]:g} ms"]
+            histogram = pd.DataFrame({'Calls': stats['timings'][stage]['histogram']}, index=pd.Index(labels, name='Latency'))
+            st.bar_chart(histogram)
+        
+        counters = {name: value for name, value in stats['counters'].items() if name not in stats['timings']}
+        if counters:
+            st.markdown("**Counters**")
+            st.dataframe(pd.Series(counters, name='Count'), use_container_width=True)
+    
+    instrumentation.export_metrics()
+
 def main():
-    model_data, df = load_confidence_model()
+    # Page configuration
+    st.set_page_config(
+        page_title="CareerCompass PK",
+        page_icon="🔼",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
     
-    if model_data is None or df is None:
-        st.error("Failed to load model or data. Please check if all files are present.")
-        return
+    instrumentation.start_rerun()
     
-    # Header with new positioning
+    # Header with new positioning, drawn before the model loads on a cold start
     st.title(" CareerCompass PK")
     st.markdown("###  Salary Range Estimator & Market Intelligence Dashboard")
     
+    server, df = load_confidence_model()
+    
+    if server is None or df is None:
+        st.error("Failed to load model or data. Please check if all files are present.")
+        return
+    
+    # One model for the whole rerun, even if a new version is swapped in meanwhile
+    model_data = server.current()
+    st.sidebar.caption(f"Model version: {model_data['registry_version'] or 'default artifact'}")
+    if server.last_error:
+        st.sidebar.warning(server.last_error)
+    
 
     
     st.markdown("---")
     
-    # Create tabs for different features
-    tab1, tab2, tab3 = st.tabs([" Salary Range Estimator", " Market Intelligence", " Career Insights"])
+    # A view selector rather than st.tabs, which runs (and imports for) every tab body on each rerun
+    view = st.radio("View", VIEWS, horizontal=True, key="view", label_visibility="collapsed")
     
-    with tab1:
+    if view == VIEWS[0]:
         st.subheader(" Estimate Your Salary Range")
         
         # Input form
@@ -249,15 +316,14 @@ def main():
             
             city = st.selectbox(
                 "City",
-                ['Lahore', 'Karachi', 'Islamabad', 'Faisalabad', 'Rawalpindi', 'Other'],
+                known_options(CITY_OPTIONS, model_data, 'city_grouped'),
                 index=0,
                 help="Job location"
             )
             
             functional_area = st.selectbox(
                 "Functional Area",
-                ['General', 'Software & Web Development', 'Engineering', 'Sales & Business Development', 
-                 'Marketing', 'Operations', 'Accounts, Finance & Financial Services', 'Human Resources'],
+                known_options(AREA_OPTIONS, model_data, 'Functional Area'),
                 index=0,
                 help="Department or functional area"
             )
@@ -266,14 +332,7 @@ def main():
         # Prediction button
         if st.button(" Estimate Salary Range", type="primary", use_container_width=True):
             # Auto-determine career level based on experience
-            if experience_years <= 1:
-                auto_career_level = "Intern/Student"
-            elif experience_years <= 3:
-                auto_career_level = "Entry Level"
-            elif experience_years <= 8:
-                auto_career_level = "Experienced Professional"
-            else:
-                auto_career_level = "Department Head"
+            auto_career_level = career_level_for_experience(experience_years)
             
             # Prepare job data
             job_data = {
@@ -314,22 +373,67 @@ def main():
 
                 
                 # Salary gauge
-                avg_salary = df['salary_avg'].mean()
+                avg_salary = load_market_aggregates(aggregates_version())['avg_salary']
                 gauge_fig = create_salary_gauge(result, avg_salary)
                 if gauge_fig:
                     st.plotly_chart(gauge_fig, use_container_width=True)
+                
+                # Where the estimate falls in the market distribution
+                position = market_position(load_salary_sketches(sketches_version()), result['prediction'], job_data)
+                position_columns = st.columns(len(position))
+                for position_column, (segment, percentile) in zip(position_columns, position.items()):
+                    with position_column:
+                        st.metric(f"{segment} percentile", f"P{percentile:.0f}")
+                
+                # Real postings closest to this profile
+                if 'neighbor_index' in model_data:
+                    postings, matched = comparable_postings(model_data['neighbor_index'], job_data, model_data)
+                    st.markdown("####  Comparable Postings")
+                    match_labels = {'Functional Area': "functional area", 'city_grouped': "city", 'Career Level': "career level"}
+                    matched_labels = [match_labels[dim] for dim in matched]
+                    if len(matched_labels) > 1:
+                        matched_labels = [', '.join(matched_labels[:-1]) + ' and ' + matched_labels[-1]]
+                    st.caption(f"Closest postings by experience and education with the same {matched_labels[0]}."
+                               if matched else "Closest postings by experience and education across all postings.")
+                    st.dataframe(pd.DataFrame([{
+                        'Title': posting['Title'],
+                        'Salary Range': f"PKR {posting['salary_min']:,.0f} - {posting['salary_max']:,.0f}",
+                        'City': posting['city'],
+                        'Experience': f"{posting['experience_years']:.0f} years",
+                        'Education': posting['Minimum Education']
+                    } for posting in postings]), use_container_width=True, hide_index=True)
     
-    with tab2:
+    elif view == VIEWS[1]:
         st.subheader(" Pakistan Job Market Intelligence")
         
-        # Analyze market trends
-        trends = analyze_market_trends(df)
+        # Drill-down filters answered from the aggregation cube
+        market_cube = load_market_cube()
+        filter_labels = {
+            'Functional Area': "Functional Area",
+            'city_grouped': "City",
+            'Minimum Education': "Education Level",
+            'Career Level': "Career Level"
+        }
+        filter_columns = st.columns(len(filter_labels))
+        filters = {}
+        for filter_column, (dim, label) in zip(filter_columns, filter_labels.items()):
+            with filter_column:
+                filters[dim] = st.multiselect(label, list(market_cube['vocabularies'][dim]), key=f"market_filter_{dim}")
+        
+        # Market trends, precomputed once per dataset version
+        if any(filters.values()):
+            trends = query_market_cube(market_cube, filters)
+        else:
+            trends = load_market_aggregates(aggregates_version())
+        
+        if trends.get('n_postings') == 0:
+            st.warning("No postings match these filters.")
         
         # Key market insights
         col8, col9, col10, col11 = st.columns(4)
         
         with col8:
-            avg_salary = df['salary_avg'].mean()
+            avg_salary = trends['avg_salary']
             st.metric("Average Salary", f"PKR {avg_salary:,.0f}", "Market Average")
         
         with col9:
@@ -337,17 +441,41 @@ def main():
             st.metric("Bachelors Degree Premium", f"PKR {education_premium:,.0f}", "vs Diploma")
         
         with col10:
-            top_city = trends['city_comparison'].iloc[0]
-            st.metric("Highest Paying City", top_city['city_grouped'], f"PKR {top_city['mean']:,.0f}")
+            if not trends['city_comparison'].empty:
+                top_city = trends['city_comparison'].iloc[0]
+                st.metric("Highest Paying City", top_city['city_grouped'], f"PKR {top_city['mean']:,.0f}")
+            else:
+                st.metric("Highest Paying City", "n/a", "Too few postings")
         
         with col11:
-            exp_correlation = df['experience_years'].corr(df['salary_avg'])
+            exp_correlation = trends['exp_correlation']
             st.metric("Experience Impact", f"{exp_correlation:.2f}", "Correlation")
         
         # Market intelligence charts
         market_fig = create_market_intelligence_charts(trends)
         st.plotly_chart(market_fig, use_container_width=True)
         
+        # Salary distribution per segment from the quantile sketches
+        with st.expander("Salary percentiles by segment"):
+            segment_dim = st.selectbox("Segment by", list(filter_labels), format_func=filter_labels.get)
+            st.dataframe(percentile_table(load_salary_sketches(sketches_version()), segment_dim), use_container_width=True, hide_index=True)
+        
+        # Skill premiums within the filtered segment, answered from the skills index
+        with st.expander("Skills with the biggest salary premium"):
+            premiums = skill_premiums(load_skills_index(), filters, min_count=3, top=15)
+            if premiums.empty:
+                st.info("Too few postings in this segment to compare skills.")
+            else:
+                st.caption("Average salary of postings listing the skill minus postings in the same segment that don't.")
+                st.dataframe(
+                    premiums.rename(columns={'skill': 'Skill', 'postings': 'Postings', 'mean_salary': 'Average Salary', 'premium': 'Premium'}),
+                    use_container_width=True, hide_index=True,
+                    column_config={
+                        'Average Salary': st.column_config.NumberColumn(format="PKR %.0f"),
+                        'Premium': st.column_config.NumberColumn(format="PKR %+.0f")
+                    }
+                )
+        
         # Detailed insights
         st.markdown("####  Key Market Insights")
         
@@ -379,38 +507,53 @@ def main():
             • Experience is the strongest predictor of salary growth
             """)
     
-    with tab3:
+    elif view == VIEWS[2]:
         st.subheader(" Career Growth Insights")
         
         # Career growth simulator
         st.markdown("####  Salary Growth Simulator")
         
-        # Base profile for comparison
+        # Base profile for comparison, chosen by the user
+        base_col1, base_col2, base_col3, base_col4 = st.columns(4)
+        with base_col1:
+            base_experience = st.slider("Years of Experience", min_value=0, max_value=15, value=2, key="whatif_experience")
+        with base_col2:
+            base_education = st.selectbox("Education Level", ['Matriculation/O-Level', 'Intermediate/A-Level', 'Diploma', 'Bachelors', 'Masters'],
+                                          index=3, key="whatif_education")
+        with base_col3:
+            base_city = st.selectbox("City", known_options(CITY_OPTIONS, model_data, 'city_grouped'), index=0, key="whatif_city")
+        with base_col4:
+            base_area = st.selectbox("Functional Area", known_options(AREA_OPTIONS, model_data, 'Functional Area'),
+                                     index=0, key="whatif_area")
+        
         base_profile = {
-            'experience_years': 2,
-            'Career Level': 'Entry Level',  # 2 years = Entry Level
-            'Minimum Education': 'Bachelors',
-            'city_grouped': 'Lahore',
-            'Functional Area': 'General'
+            'experience_years': base_experience,
+            'Career Level': career_level_for_experience(base_experience),
+            'Minimum Education': base_education,
+            'city_grouped': base_city,
+            'Functional Area': base_area
         }
         
-        base_result = predict_salary_range(base_profile, model_data)
+        # Growth scenarios relative to the base profile
+        senior_experience = base_experience + 3
+        scenarios = [
+            ("Add 3 years experience", {**base_profile, 'experience_years': senior_experience, 'Career Level': career_level_for_experience(senior_experience)}),
+            ("Switch to Software Development", {**base_profile, 'Functional Area': 'Software & Web Development'}),
+            ("Get Masters degree", {**base_profile, 'Minimum Education': 'Masters'}),
+            ("Move to Karachi", {**base_profile, 'city_grouped': 'Karachi'}),
+            ("Senior profile (+3yr + Masters + Karachi)", {**base_profile, 'experience_years': senior_experience, 'Minimum Education': 'Masters',
+                                                          'city_grouped': 'Karachi', 'Career Level': career_level_for_experience(senior_experience)})
+        ]
+        
+        # Score the base profile and all scenarios in a single batch
+        results = predict_salary_ranges([base_profile] + [profile for _, profile in scenarios], model_data)
         
-        if base_result:
-            st.info(f"**Base Profile**: 2 years experience, Bachelors, General area, Lahore → PKR {base_result['prediction']:,.0f}")
-            
-            # Growth scenarios
-            scenarios = [
-                ("Add 3 years experience", {**base_profile, 'experience_years': 5, 'Career Level': 'Experienced Professional'}),  # 5 years = Experienced
-                ("Switch to Software Development", {**base_profile, 'Functional Area': 'Software & Web Development'}),
-                ("Get Masters degree", {**base_profile, 'Minimum Education': 'Masters'}),
-                ("Move to Karachi", {**base_profile, 'city_grouped': 'Karachi'}),
-                ("Senior profile (5yr + Masters + Karachi)", {**base_profile, 'experience_years': 5, 'Minimum Education': 'Masters', 'city_grouped': 'Karachi', 'Career Level': 'Experienced Professional'})  # 5 years = Experienced
-            ]
+        if results:
+            base_result = results[0]
+            st.info(f"**Base Profile**: {base_experience} years experience, {base_education}, {base_area} area, {base_city} → PKR {base_result['prediction']:,.0f}")
             
             growth_data = []
-            for scenario_name, scenario_profile in scenarios:
-                scenario_result = predict_salary_range(scenario_profile, model_data)
+            for (scenario_name, scenario_profile), scenario_result in zip(scenarios, results[1:]):
                 if scenario_result:
                     increase = scenario_result['prediction'] - base_result['prediction']
                     increase_pct = (increase / base_result['prediction']) * 100
@@ -418,13 +561,70 @@ def main():
                         'Scenario': scenario_name,
                         'Salary': f"PKR {scenario_result['prediction']:,.0f}",
                         'Increase': f"PKR {increase:,.0f}",
-                        'Growth': f"+{increase_pct:.1f}%"
+                        'Growth': f"{increase_pct:+.1f}%"
                     })
             
             # Display growth scenarios
             growth_df = pd.DataFrame(growth_data)
             st.dataframe(growth_df, use_container_width=True)
             
+            # Every single- and two-attribute change, scored in one batched sweep
+            st.markdown("####  What-If Explorer")
+            import plotly.express as px
+            sweep = load_whatif_sweep(tuple(sorted(base_profile.items())), model_data['model_hash'], model_data)
+            
+            single_axis = st.selectbox("Change one attribute", list(AXIS_LABELS), format_func=AXIS_LABELS.get, key="whatif_single")
+            single_fig = px.bar(
+                x=[str(value) for value in sweep['axes'][single_axis]],
+                y=sweep['deltas'][(single_axis,)],
+                labels={'x': AXIS_LABELS[single_axis], 'y': "Change vs base (PKR)"},
+                title=f"Predicted salary change by {AXIS_LABELS[single_axis].lower()}"
+            )
+            st.plotly_chart(single_fig, use_container_width=True)
+            
+            pair = st.selectbox("Change two attributes", SWEEP_PAIRS,
+                                format_func=lambda pair: f"{AXIS_LABELS[pair[0]]} × {AXIS_LABELS[pair[1]]}", key="whatif_pair")
+            pair_fig = px.imshow(
+                sweep['deltas'][pair],
+                x=[str(value) for value in sweep['axes'][pair[1]]],
+                y=[str(value) for value in sweep['axes'][pair[0]]],
+                labels={'x': AXIS_LABELS[pair[1]], 'y': AXIS_LABELS[pair[0]], 'color': "Change (PKR)"},
+                color_continuous_scale='RdBu', color_continuous_midpoint=0, aspect='auto',
+                title=f"Predicted salary change vs base: {AXIS_LABELS[pair[0]]} × {AXIS_LABELS[pair[1]]}"
+            )
+            pair_fig.update_layout(height=max(400, 22 * len(sweep['axes'][pair[0]])))
+            st.plotly_chart(pair_fig, use_container_width=True)
+            
+            # Multi-year move sequences searched over the memoized prediction table
+            st.markdown("####  Career Path Planner")
+            plan_col1, plan_col2, plan_col3 = st.columns(3)
+            with plan_col1:
+                horizon = st.slider("Planning horizon (years)", min_value=1, max_value=10, value=5, key="planner_horizon")
+            with plan_col2:
+                objective = st.radio("Optimize for", ['final', 'total'], horizontal=True, key="planner_objective",
+                                     format_func={'final': "Final salary", 'total': "Total earnings"}.get)
+            with plan_col3:
+                risk_aversion = st.slider("Risk aversion", min_value=0.0, max_value=2.0, value=0.0, step=0.5, key="planner_risk",
+                                          help="Each year scores its prediction minus this multiple of its uncertainty (std), in PKR")
+            
+            paths = load_career_paths(tuple(sorted(base_profile.items())), horizon, objective, risk_aversion,
+                                      tuple(known_options(CITY_OPTIONS, model_data, 'city_grouped')),
+                                      tuple(known_options(AREA_OPTIONS, model_data, 'Functional Area')),
+                                      model_data['model_hash'], model_data)
+            for rank, path in enumerate(paths, start=1):
+                final_step = path['steps'][-1]
+                with st.expander(f"Path {rank}: PKR {final_step['prediction']:,.0f} after {horizon} years "
+                                 f"(± {final_step['uncertainty']:,.0f})", expanded=rank == 1):
+                    st.dataframe(pd.DataFrame([{
+                        'Year': step['year'],
+                        'Move': step['move'],
+                        'Experience': f"{step['experience_years']} years",
+                        'Education': step['Minimum Education'],
+                        'City': step['city_grouped'],
+                        'Functional Area': step['Functional Area'],
+                        'Predicted Salary': f"PKR {step['prediction']:,.0f}"
+                    } for step in path['steps']]), use_container_width=True, hide_index=True)
+            
             # Recommendations
             st.markdown("####  Career Growth Recommendations")
             
@@ -456,6 +656,9 @@ def main():
         <p><small>This tool provides estimates based on historical data. Actual salaries may vary based on company, negotiation, and market conditions.</small></p>
     </div>
     """, unsafe_allow_html=True)
+    
+    if instrumentation.ENABLED:
+        render_debug_panel()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
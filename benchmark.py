@@ -0,0 +1,179 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Timings are machine-specific, so the baseline is recorded on the machine
+# that runs the comparison (python benchmark.py --save-baseline) and not committed
+BASELINE_PATH = 'benchmark_baseline.json'
+
+MARKET_COLUMNS = ['salary_avg', 'experience_years', 'city_grouped', 'Minimum Education', 'Career Level', 'Functional Area']
+
+def time_call(func, repeats):
+    """Run func repeatedly; returns (latency summary in ms, last result)"""
+    timings = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings = np.array(timings)
+    summary = {
+        'median_ms': float(np.median(timings)),
+        'p95_ms': float(np.percentile(timings, 95)),
+        'p99_ms': float(np.percentile(timings, 99)),
+        'min_ms': float(timings.min()),
+        'repeats': repeats
+    }
+    return summary, result
+
+def resample_dataset(df, scale, seed=0):
+    """Synthetic dataset of scale x the rows, drawn with replacement"""
+    if scale == 1:
+        return df
+    rng = np.random.default_rng(seed)
+    return df.iloc[rng.integers(0, len(df), size=int(len(df) * scale))].reset_index(drop=True)
+
+def sample_profiles(df, n, seed=0):
+    """Realistic estimator inputs drawn from the dataset"""
+    from confidence_model import career_level_for_experience
+
+    rows = resample_dataset(df, n / len(df), seed)
+    experience = np.minimum(rows['experience_years'].to_numpy(), 15).astype(int)
+    return pd.DataFrame({
+        'experience_years': experience,
+        'Career Level': [career_level_for_experience(e) for e in experience],
+        'Minimum Education': rows['Minimum Education'].astype(str).to_numpy(),
+        'city_grouped': rows['city_grouped'].astype(str).to_numpy(),
+        'Functional Area': rows['Functional Area'].astype(str).to_numpy()
+    })
+
+def run_benchmarks(scales, train_scales, repeats, batch_sizes):
+    """Time every hot path; returns {benchmark name: latency summary}"""
+    # Import the app without a Streamlit runtime; silence its bare-mode warnings
+    from streamlit.logger import set_log_level
+    set_log_level('error')
+    import app
+    from confidence_model import create_confidence_model, predict_batch_with_confidence, predict_with_confidence
+    from data_cache import load_salary_data
+    from market_aggregates import analyze_market_trends
+
+    results = {}
+
+    def load_cold():
+        app.load_confidence_model.clear()
+        server, df = app.load_confidence_model()
+        return server.current(), df
+
+    results['load_confidence_model'], (model_data, _) = time_call(load_cold, max(3, repeats // 10))
+
+    df = load_salary_data(MARKET_COLUMNS)
+    profiles = sample_profiles(df, max(batch_sizes))
+
+    # Live ensemble inference, bypassing the prediction cube
+    live_model = {k: v for k, v in model_data.items() if k != 'prediction_cube'}
+    single = profiles.iloc[0].to_dict()
+    results['predict_with_confidence.single'], _ = time_call(lambda: predict_with_confidence(single, live_model), repeats)
+    for batch_size in batch_sizes:
+        batch = profiles.iloc[:batch_size]
+        results[f'predict_batch_with_confidence.n{batch_size}'], _ = time_call(
+            lambda: predict_batch_with_confidence(batch, live_model), max(3, repeats // 10))
+
+    # Serving path as the app runs it (prediction cube with live fallback)
+    results['predict_salary_range.single'], _ = time_call(lambda: app.predict_salary_range(single, model_data), repeats)
+
+    for scale in scales:
+        scaled = resample_dataset(df, scale)
+        results[f'analyze_market_trends.x{scale}'], trends = time_call(lambda: analyze_market_trends(scaled), max(3, repeats // 10))
+        results[f'create_market_intelligence_charts.x{scale}'], _ = time_call(
+            lambda: app.create_market_intelligence_charts(trends), max(3, repeats // 10))
+
+    for scale in train_scales:
+        scaled = resample_dataset(df, scale)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[f'create_confidence_model.x{scale}'], _ = time_call(
+                lambda: create_confidence_model(df=scaled, save_path=None), 1)
+
+    return results
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Benchmarks whose median got slower than baseline by more than tolerance"""
+    regressions = []
+    for name, summary in results.items():
+        reference = baseline.get('results', {}).get(name)
+        if reference is None:
+            continue
+        ratio = summary['median_ms'] / reference['median_ms']
+        summary['baseline_median_ms'] = reference['median_ms']
+        summary['ratio'] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append((name, ratio))
+    return regressions
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark model load, training, prediction and dashboard paths")
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10, 100],
+                        help="dataset sizes (x the bundled CSV) for the dashboard benchmarks")
+    parser.add_argument('--train-scales', type=float, nargs='*', default=[1],
+                        help="dataset sizes for the training benchmark")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--repeats', type=int, default=50)
+    parser.add_argument('--output', default=None, help="write results JSON here (default: stdout summary only)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown before a benchmark counts as a regression")
+    args = parser.parse_args()
+
+    scales = [int(s) if float(s).is_integer() else s for s in args.scales]
+    train_scales = [int(s) if float(s).is_integer() else s for s in args.train_scales]
+
+    print("🏁 CAREERCOMPASS BENCHMARKS")
+    print("=" * 60)
+    results = run_benchmarks(scales, train_scales, args.repeats, args.batch_sizes)
+
+    regressions = []
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+
+    for name, summary in results.items():
+        line = f"   {name:<44} median {summary['median_ms']:10.2f} ms | p95 {summary['p95_ms']:10.2f} ms"
+        if 'ratio' in summary:
+            line += f" | {summary['ratio']:5.2f}x baseline"
+        print(line)
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Saved baseline to {args.baseline}")
+
+    if baseline is None and not args.save_baseline:
+        print(f"\n❌ No baseline at {args.baseline}; record one on this machine with: python benchmark.py --save-baseline")
+        sys.exit(1)
+    if baseline is not None and (baseline.get('platform'), baseline.get('cpu_count')) != (report['platform'], report['cpu_count']):
+        print(f"\n⚠️ Baseline was recorded on {baseline.get('platform')} with {baseline.get('cpu_count')} CPUs; ratios may not be comparable")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for name, ratio in regressions:
+            print(f"   {name}: {ratio:.2f}x baseline")
+        sys.exit(1)
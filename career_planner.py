@@ -0,0 +1,250 @@
+import itertools
+import numpy as np
+import pandas as pd
+from confidence_model import career_level_for_experience, predict_batch_with_confidence
+from feature_encoder import EDUCATION_LEVELS, encoder_for_model
+from prediction_cube import AXIS_COLUMNS, CUBE_COLUMNS, build_prediction_cube
+
+# Degrees earned in order; each takes a year without gaining experience
+DEGREE_LADDER = sorted(EDUCATION_LEVELS, key=EDUCATION_LEVELS.get)
+
+MOVE_TYPES = ['experience', 'area', 'city', 'degree']
+
+OBJECTIVES = ['final', 'total']
+
+DEFAULT_BEAM_WIDTH = 256
+
+def prediction_table(model_data):
+    """
+    Memoized [prediction, uncertainty] over every (experience, education,
+    city, area) state: the prediction cube when loaded, otherwise built once
+    """
+    if 'prediction_cube' not in model_data:
+        model_data['prediction_cube'] = build_prediction_cube(model_data)
+    cube = model_data['prediction_cube']
+    if 'index' not in cube:
+        cube['index'] = {axis: {value.item(): i for i, value in enumerate(cube[axis])} for axis in AXIS_COLUMNS}
+    return cube
+
+def planning_table(model_data, max_experience, city_positions, area_positions):
+    """
+    The prediction table extended past the cube's last experience year up
+    to max_experience, so long horizons from senior profiles keep aging.
+
+    Beyond the cube only the states the planner can reach (every education
+    with the given city and area positions) are scored, each once per model
+    and memoized on the cube; the rest of the extension is NaN.
+    """
+    cube = prediction_table(model_data)
+    last_year = int(cube['experience'][-1])
+    if max_experience <= last_year:
+        return cube
+
+    years = list(range(last_year + 1, max_experience + 1))
+    memo = cube.setdefault('beyond_grid', {})
+    states = list(itertools.product(years, range(len(cube['education'])), city_positions, area_positions))
+    missing = [state for state in states if state not in memo]
+    if missing:
+        experience, education, city, area = (np.array(column) for column in zip(*missing))
+        profiles = pd.DataFrame({
+            'experience_years': experience,
+            'Career Level': [career_level_for_experience(e) for e in experience],
+            'Minimum Education': cube['education'][education],
+            'city_grouped': cube['city'][city],
+            'Functional Area': cube['area'][area]
+        })
+        memo.update(zip(missing, predict_batch_with_confidence(profiles, model_data).astype(np.float32)))
+
+    extension = np.full((len(years),) + cube['values'].shape[1:], np.nan, dtype=np.float32)
+    for year, education, city, area in states:
+        extension[year - last_year - 1, education, city, area] = memo[(year, education, city, area)]
+
+    experience = np.concatenate([cube['experience'], np.asarray(years, dtype=cube['experience'].dtype)])
+    return {
+        **cube,
+        'values': np.concatenate([cube['values'], extension]),
+        'experience': experience,
+        'index': {**cube['index'], 'experience': {value.item(): i for i, value in enumerate(experience)}}
+    }
+
+def _grid_position(table, model_data, profile):
+    """Table position of a profile; values outside the grid take the encoder's fallback like the model does"""
+    fallbacks = encoder_for_model(model_data).fallbacks
+    position = []
+    for axis, column in AXIS_COLUMNS.items():
+        value = profile[column]
+        if axis == 'experience':
+            value = int(min(max(value, table['experience'][0]), table['experience'][-1]))
+        elif value not in table['index'][axis]:
+            value = fallbacks[column]
+        position.append(table['index'][axis][value])
+    return position
+
+def plan_career_paths(profile, model_data, horizon=5, top_k=3, objective='final', risk_aversion=0.0,
+                      max_moves=3, cities=None, areas=None, beam_width=DEFAULT_BEAM_WIDTH):
+    """
+    Best sequences of yearly moves from a profile over horizon years.
+
+    Each year the profile either gains a year of experience (career level
+    follows experience), gains a year while switching functional area or
+    city, or spends the year earning the next degree. At most max_moves
+    area, city or degree moves are made. A state scores its prediction
+    minus risk_aversion times its uncertainty; objective 'final' ranks paths
+    by the last year's score and 'total' by the sum over all years.
+
+    Beam search over the memoized prediction table: every year all beam
+    states are expanded at once, states reached by several paths keep only
+    the best (dynamic programming), and the beam_width best survive.
+    Cities and areas limit the destinations offered (default: all).
+    Experience keeps growing past the cube's last year (planning_table).
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {OBJECTIVES}, got {objective!r}")
+
+    cube = prediction_table(model_data)
+    city_targets = np.array([cube['index']['city'][c] for c in (cities if cities is not None else cube['city']) if c in cube['index']['city']], dtype=np.int64)
+    area_targets = np.array([cube['index']['area'][a] for a in (areas if areas is not None else cube['area']) if a in cube['index']['area']], dtype=np.int64)
+
+    start = _grid_position(cube, model_data, profile)
+    cube = planning_table(model_data, int(max(profile[AXIS_COLUMNS['experience']], 0)) + horizon,
+                          sorted(set(city_targets.tolist()) | {start[2]}), sorted(set(area_targets.tolist()) | {start[3]}))
+    values = cube['values'][..., :2].astype(float)
+    score_table = values[..., 0] - risk_aversion * values[..., 1]
+    max_experience = len(cube['experience']) - 1
+
+    # Next degree for each education code, -1 when there is none
+    next_degree = np.full(len(cube['education']), -1)
+    for i, education in enumerate(cube['education']):
+        if education in DEGREE_LADDER and DEGREE_LADDER.index(education) + 1 < len(DEGREE_LADDER):
+            next_degree[i] = cube['index']['education'].get(DEGREE_LADDER[DEGREE_LADDER.index(education) + 1], -1)
+
+    start = _grid_position(cube, model_data, profile)
+    beam = {
+        'state': np.array([start], dtype=np.int64),
+        'moves': np.zeros(1, dtype=np.int64),
+        'value': np.zeros(1)
+    }
+    history = []
+
+    for year in range(horizon):
+        states, moves = beam['state'], beam['moves']
+        n = len(states)
+        can_move = moves < max_moves
+        candidates = []
+
+        def add(new_states, parents, move_type, target):
+            candidates.append((new_states, parents, np.full(len(parents), MOVE_TYPES.index(move_type)), target))
+
+        aged = states.copy()
+        aged[:, 0] = np.minimum(aged[:, 0] + 1, max_experience)
+        add(aged, np.arange(n), 'experience', np.full(n, -1))
+
+        movers = np.flatnonzero(can_move)
+        for move_type, axis, targets in [('area', 3, area_targets), ('city', 2, city_targets)]:
+            parents = np.repeat(movers, len(targets))
+            target = np.tile(targets, len(movers))
+            keep = states[parents, axis] != target
+            parents, target = parents[keep], target[keep]
+            moved = aged[parents].copy()
+            moved[:, axis] = target
+            add(moved, parents, move_type, target)
+
+        studying = movers[next_degree[states[movers, 1]] >= 0]
+        studied = states[studying].copy()
+        studied[:, 1] = next_degree[states[studying, 1]]
+        add(studied, studying, 'degree', studied[:, 1])
+
+        new_states = np.concatenate([c[0] for c in candidates])
+        parents = np.concatenate([c[1] for c in candidates])
+        move_types = np.concatenate([c[2] for c in candidates])
+        targets = np.concatenate([c[3] for c in candidates])
+        new_moves = moves[parents] + (move_types != MOVE_TYPES.index('experience'))
+
+        scores = score_table[tuple(new_states.T)]
+        new_values = scores if objective == 'final' else beam['value'][parents] + scores
+
+        # Keep the best path into each (state, moves used), then the top of the beam
+        order = np.argsort(-new_values, kind='stable')
+        keys = np.ravel_multi_index((*new_states[order].T, new_moves[order]), score_table.shape + (max_moves + 1,))
+        _, first = np.unique(keys, return_index=True)
+        survivors = order[np.sort(first)][:beam_width]
+
+        history.append({'parent': parents[survivors], 'move': move_types[survivors], 'target': targets[survivors]})
+        beam = {'state': new_states[survivors], 'moves': new_moves[survivors], 'value': new_values[survivors]}
+
+    # Top paths with distinct end states
+    _, first = np.unique(np.ravel_multi_index(tuple(beam['state'].T), score_table.shape), return_index=True)
+    ends = sorted(first, key=lambda i: -beam['value'][i])[:top_k]
+    return [_reconstruct_path(cube, history, beam, end, start) for end in ends]
+
+def _reconstruct_path(cube, history, beam, end, start):
+    """Walk parent pointers back from an end state and describe each year"""
+    chain, position = [], end
+    for year in range(len(history) - 1, -1, -1):
+        chain.append((history[year]['move'][position], history[year]['target'][position]))
+        position = history[year]['parent'][position]
+    chain.reverse()
+
+    state = list(start)
+    axes = list(AXIS_COLUMNS)
+    steps = []
+    for year, (move, target) in enumerate(chain, start=1):
+        move_type = MOVE_TYPES[move]
+        if move_type == 'degree':
+            state[1] = target
+            label = f"Earn {cube['education'][target]}"
+        else:
+            state[0] = min(state[0] + 1, len(cube['experience']) - 1)
+            if move_type == 'area':
+                state[3] = target
+                label = f"Switch to {cube['area'][target]}"
+            elif move_type == 'city':
+                state[2] = target
+                label = f"Move to {cube['city'][target]}"
+            else:
+                label = "Gain experience"
+        prediction, uncertainty = cube['values'][tuple(state)][:2]
+        steps.append({
+            'year': year,
+            'move': label,
+            **{AXIS_COLUMNS[axis]: cube[axis][state[i]].item() for i, axis in enumerate(axes)},
+            CUBE_COLUMNS[0]: float(prediction),
+            CUBE_COLUMNS[1]: float(uncertainty)
+        })
+
+    return {'value': float(beam['value'][end]), 'steps': steps}
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from model_artifact import load_serving_model
+    from prediction_cube import load_prediction_cube
+
+    parser = argparse.ArgumentParser(description="Search multi-year career paths over predicted salaries")
+    parser.add_argument('--experience', type=int, default=2)
+    parser.add_argument('--education', default='Bachelors')
+    parser.add_argument('--city', default='Lahore')
+    parser.add_argument('--area', default='General')
+    parser.add_argument('--horizon', type=int, default=5)
+    parser.add_argument('--objective', choices=OBJECTIVES, default='final')
+    parser.add_argument('--risk-aversion', type=float, default=0.0, help="multiple of the uncertainty (std) subtracted from each prediction")
+    parser.add_argument('--max-moves', type=int, default=3)
+    parser.add_argument('--top', type=int, default=3)
+    args = parser.parse_args()
+
+    model_data, model_path = load_serving_model()
+    model_data['prediction_cube'] = load_prediction_cube(model_data, model_path)
+    profile = {'experience_years': args.experience, 'Minimum Education': args.education,
+               'city_grouped': args.city, 'Functional Area': args.area}
+
+    print("🧭 CAREER PATH PLANNER")
+    print("=" * 60)
+    start = time.perf_counter()
+    paths = plan_career_paths(profile, model_data, args.horizon, args.top, args.objective, args.risk_aversion, args.max_moves)
+    print(f"   Searched {args.horizon} years in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for rank, path in enumerate(paths, start=1):
+        final = path['steps'][-1]
+        print(f"\n{rank}. Score PKR {path['value']:,.0f} -> PKR {final['prediction']:,.0f} ± {final['uncertainty']:,.0f}")
+        for step in path['steps']:
+            print(f"   Year {step['year']}: {step['move']:<45} PKR {step['prediction']:,.0f}")
@@ -0,0 +1,240 @@
+import os
+import re
+import shutil
+import pandas as pd
+
+RAW_COLUMNS = [
+    'Title', 'Salary', 'Job Type', 'Job Location', 'Functional Area', 'Career Level', 'Apply Before',
+    'Minimum Experience', 'Minimum Education', 'Gender', 'Age', 'Skills'
+]
+
+ENCODED_COLUMNS = ['Job Type', 'Career Level', 'Minimum Education', 'Gender', 'city_grouped', 'Functional Area']
+
+# Cities outside the most frequent TOP_CITY_COUNT are grouped as 'Other'
+TOP_CITY_COUNT = 10
+
+TECHNICAL_KEYWORDS = ['python', 'java', 'sql', 'javascript', 'html', 'css', 'react', 'php', 'node', 'laravel']
+MANAGEMENT_KEYWORDS = ['management', 'leadership', 'team', 'project', 'strategy']
+
+# "PKR. 30,000 - 60,000/Month" or "PKR. 700,000+/Month"
+SALARY_PATTERN = re.compile(r'PKR\.?\s*(?P<min>[\d,]+)\s*(?:-\s*(?P<max>[\d,]+))?')
+# "2 Years", "1 Year (...)", "Less than 1 Year"; "Fresh" has no number
+EXPERIENCE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)')
+FRESH_PATTERN = re.compile(r'^\s*fresh', re.IGNORECASE)
+# Matched against lowercased skills, which is much faster than re.IGNORECASE
+TECHNICAL_PATTERN = re.compile('|'.join(map(re.escape, TECHNICAL_KEYWORDS)))
+MANAGEMENT_PATTERN = re.compile('|'.join(map(re.escape, MANAGEMENT_KEYWORDS)))
+
+DEFAULT_CHUNKSIZE = 50_000
+
+def clean_salary(salary):
+    """salary_min, salary_max and salary_avg in PKR/month; open ranges ("700,000+") use the one bound"""
+    bounds = salary.astype(object).str.extract(SALARY_PATTERN)
+    salary_min = pd.to_numeric(bounds['min'].str.replace(',', '', regex=False), errors='coerce')
+    salary_max = pd.to_numeric(bounds['max'].str.replace(',', '', regex=False), errors='coerce').fillna(salary_min)
+    return pd.DataFrame({
+        'salary_min': salary_min.astype(float),
+        'salary_max': salary_max.astype(float),
+        'salary_avg': ((salary_min + salary_max) / 2).astype(float)
+    }, index=salary.index)
+
+def clean_experience(experience):
+    """Years of experience: the first number in the text, 0 for "Fresh" postings"""
+    experience = experience.astype(object)
+    years = pd.to_numeric(experience.str.extract(EXPERIENCE_PATTERN)[0], errors='coerce')
+    return years.mask(years.isna() & experience.str.contains(FRESH_PATTERN, na=False), 0.0).astype(float)
+
+def extract_location_features(location):
+    """City: the first comma-separated part of Job Location, without its whitespace padding"""
+    return location.astype(object).str.split(',', n=1).str[0].str.strip()
+
+def group_cities(city, top_cities):
+    """city_grouped: the city when it is one of top_cities, otherwise 'Other'"""
+    return city.where(city.isin(top_cities), 'Other')
+
+def extract_skills_features(skills):
+    """skills_count and keyword flags for technical and management skills"""
+    skills = skills.astype(object)
+    lowered = skills.str.lower()
+    return pd.DataFrame({
+        'skills_count': (skills.str.count(',') + 1).where(skills.notna(), 0).astype(int),
+        'has_technical_skills': lowered.str.contains(TECHNICAL_PATTERN, na=False).astype(bool),
+        'has_management_skills': lowered.str.contains(MANAGEMENT_PATTERN, na=False).astype(bool)
+    }, index=skills.index)
+
+def clean_chunk(raw):
+    """
+    Row-local cleaning of raw postings: parsed salary and experience, city
+    and skills features. Rows without a parseable salary are dropped.
+    City grouping and label encoding need the whole dataset, see
+    finalize_chunk.
+    """
+    cleaned = raw[RAW_COLUMNS].copy()
+    salary = clean_salary(cleaned['Salary'])
+    for column in salary:
+        cleaned[column] = salary[column]
+    cleaned['experience_years'] = clean_experience(cleaned['Minimum Experience'])
+    cleaned['city'] = extract_location_features(cleaned['Job Location'])
+    skills = extract_skills_features(cleaned['Skills'])
+    for column in skills:
+        cleaned[column] = skills[column]
+    return cleaned[cleaned['salary_avg'].notna()]
+
+def chunk_statistics(cleaned):
+    """City counts and category values of a cleaned chunk, merged across shards"""
+    return {
+        'city_counts': cleaned['city'].value_counts(sort=False).to_dict(),
+        'categories': {column: set(cleaned[column].astype(str).unique()) for column in ENCODED_COLUMNS if column != 'city_grouped'}
+    }
+
+def merge_statistics(total, stats):
+    for city, count in stats['city_counts'].items():
+        total['city_counts'][city] = total['city_counts'].get(city, 0) + count
+    for column, values in stats['categories'].items():
+        total['categories'].setdefault(column, set()).update(values)
+    return total
+
+def mappings_for(stats):
+    """Top cities and LabelEncoder-ordered (sorted) codes for every encoded column"""
+    counts = stats['city_counts']
+    # Most frequent first; ties keep first-seen order like value_counts
+    top_cities = sorted(counts, key=lambda city: -counts[city])[:TOP_CITY_COUNT]
+    categories = dict(stats['categories'])
+    categories['city_grouped'] = set(top_cities) | ({'Other'} if len(counts) > len(top_cities) else set())
+    codes = {column: {value: i for i, value in enumerate(sorted(categories[column]))} for column in ENCODED_COLUMNS}
+    return top_cities, codes
+
+def finalize_chunk(cleaned, top_cities, codes):
+    """Grouped city and *_encoded columns from the dataset-wide mappings"""
+    cleaned = cleaned.copy()
+    city_grouped = group_cities(cleaned['city'], top_cities)
+    cleaned.insert(cleaned.columns.get_loc('city') + 1, 'city_grouped', city_grouped)
+    for column in ENCODED_COLUMNS:
+        cleaned[f'{column}_encoded'] = cleaned[column].astype(str).map(codes[column]).astype(int)
+    return cleaned
+
+def load_and_clean_data(raw_path):
+    """Clean a raw postings CSV in memory; for large dumps use clean_file"""
+    cleaned = clean_chunk(pd.read_csv(raw_path, usecols=RAW_COLUMNS)).reset_index(drop=True)
+    top_cities, codes = mappings_for(chunk_statistics(cleaned))
+    return finalize_chunk(cleaned, top_cities, codes)
+
+def _clean_shard(raw, part_path):
+    """Worker: clean one chunk, write it as a part file and return only its statistics"""
+    cleaned = clean_chunk(raw)
+    del raw
+    cleaned.to_pickle(part_path)
+    return len(cleaned), chunk_statistics(cleaned)
+
+def clean_file(raw_path, out_path, chunksize=DEFAULT_CHUNKSIZE, n_jobs=1):
+    """
+    Clean a raw postings CSV of any size into out_path.
+
+    Raw chunks are sharded across a process pool (n_jobs > 1, or -1 for all
+    cores) with at most two chunks in flight per worker. Each worker writes
+    its cleaned part to disk and sends back only city counts and category
+    values, so no process holds the raw and cleaned data of more than one
+    chunk. A second pass streams the parts in order, applies the
+    dataset-wide city grouping and label codes and appends them to the
+    output. Returns (raw rows, cleaned rows).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    parts_dir = out_path + '.parts'
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    os.makedirs(parts_dir)
+
+    stats = {'city_counts': {}, 'categories': {}}
+    part_paths, n_raw, n_cleaned = [], 0, 0
+
+    def collect(result):
+        nonlocal n_cleaned
+        rows, chunk_stats = result
+        n_cleaned += rows
+        merge_statistics(stats, chunk_stats)
+
+    try:
+        chunks = pd.read_csv(raw_path, usecols=RAW_COLUMNS, chunksize=chunksize)
+        if n_jobs > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                pending = []
+                for i, raw in enumerate(chunks):
+                    n_raw += len(raw)
+                    part_paths.append(os.path.join(parts_dir, f'part-{i:05d}.pkl'))
+                    pending.append(pool.submit(_clean_shard, raw, part_paths[-1]))
+                    del raw
+                    if len(pending) >= 2 * n_jobs:
+                        collect(pending.pop(0).result())
+                for future in pending:
+                    collect(future.result())
+        else:
+            for i, raw in enumerate(chunks):
+                n_raw += len(raw)
+                part_paths.append(os.path.join(parts_dir, f'part-{i:05d}.pkl'))
+                collect(_clean_shard(raw, part_paths[-1]))
+                del raw
+
+        top_cities, codes = mappings_for(stats)
+        tmp_path = out_path + '.tmp'
+        for i, part_path in enumerate(part_paths):
+            finalize_chunk(pd.read_pickle(part_path), top_cities, codes).to_csv(
+                tmp_path, mode='w' if i == 0 else 'a', header=i == 0, index=False
+            )
+            os.remove(part_path)
+        os.replace(tmp_path, out_path)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    return n_raw, n_cleaned
+
+def compare_cleaned(reference_path, cleaned_path):
+    """Columns whose values differ between two cleaned CSVs (empty when identical)"""
+    reference = pd.read_csv(reference_path)
+    cleaned = pd.read_csv(cleaned_path)
+    if len(reference) != len(cleaned):
+        return {'rows': (len(reference), len(cleaned))}
+    mismatches = {}
+    for column in reference.columns:
+        if column not in cleaned:
+            mismatches[column] = 'missing'
+            continue
+        left, right = reference[column], cleaned[column]
+        equal = (left == right) | (left.isna() & right.isna())
+        if not equal.all():
+            mismatches[column] = int((~equal).sum())
+    return mismatches
+
+if __name__ == "__main__":
+    import argparse
+    import resource
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Clean a raw job postings CSV into the model's cleaned format")
+    parser.add_argument('raw_path', help="raw postings CSV with the scraped columns")
+    parser.add_argument('--out', default='cleaned_salary_data.csv')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--jobs', type=int, default=1, help="worker processes (-1 for all cores)")
+    parser.add_argument('--validate', default=None, metavar='REFERENCE',
+                        help="compare the output with an existing cleaned CSV")
+    args = parser.parse_args()
+
+    print("🧹 CLEANING RAW POSTINGS")
+    print("=" * 60)
+    start = time.perf_counter()
+    n_raw, n_cleaned = clean_file(args.raw_path, args.out, args.chunksize, args.jobs)
+    elapsed = time.perf_counter() - start
+
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    print(f"   Rows: {n_raw:,} raw -> {n_cleaned:,} cleaned ({n_raw - n_cleaned:,} without a salary)")
+    print(f"   Time: {elapsed:.1f}s ({n_raw / elapsed:,.0f} rows/s with {args.jobs} job(s))")
+    print(f"   Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit:,.0f} MB (main)")
+    print(f"   Saved to {args.out}")
+
+    if args.validate:
+        mismatches = compare_cleaned(args.validate, args.out)
+        if mismatches:
+            print(f"\n⚠️ Differs from {args.validate}: {mismatches}")
+            sys.exit(1)
+        print(f"\n✅ Identical to {args.validate}")
@@ -0,0 +1,310 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from sklearn.tree import DecisionTreeRegressor
+from confidence_model import _walk_tree_arrays, build_feature_matrix, flatten_trees, predict_scaled_with_uncertainty
+from feature_encoder import encoder_for_model
+from model_artifact import MODEL_DIR, TREE_ARRAY_NAMES, load_model_directory, load_serving_model, save_model_directory
+from prediction_cube import grid_profiles
+
+COMPRESSED_MODEL_DIR = MODEL_DIR + '-compressed'
+
+# Grid rows used as the reference when selecting trees
+SELECTION_SAMPLE_ROWS = 4096
+
+def tree_values(tree_arrays, X_scaled):
+    """Per-tree predictions as an (n_trees, N) array"""
+    values = np.empty((len(tree_arrays['roots']), len(X_scaled)))
+    for start, leaf_values in _walk_tree_arrays(tree_arrays, X_scaled):
+        values[:, start:start + leaf_values.shape[1]] = leaf_values
+    return values
+
+def select_trees(tree_arrays, X_reference, trees_per_forest):
+    """
+    Greedy forward selection of trees_per_forest trees in each forest, each
+    step adding the tree that brings the subset mean closest (squared error)
+    to the full forest mean on X_reference. Returns kept tree indices.
+    """
+    values = tree_values(tree_arrays, X_reference)
+    bounds = np.concatenate([[0], np.cumsum(tree_arrays['forest_sizes'])])
+    keep = []
+
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        forest = values[start:stop]
+        target = forest.mean(axis=0)
+        chosen, subset_sum = [], np.zeros(forest.shape[1])
+        available = np.ones(len(forest), dtype=bool)
+        for size in range(1, min(trees_per_forest, len(forest)) + 1):
+            errors = (((subset_sum + forest) / size - target) ** 2).mean(axis=1)
+            errors[~available] = np.inf
+            best = int(np.argmin(errors))
+            chosen.append(best)
+            available[best] = False
+            subset_sum += forest[best]
+        keep.extend(start + np.sort(chosen))
+
+    return np.array(keep)
+
+def subset_trees(tree_arrays, keep, forest_sizes):
+    """Tree arrays restricted to the trees in keep, regrouped into forest_sizes"""
+    roots = np.asarray(tree_arrays['roots'])
+    ends = np.concatenate([roots[1:], [len(tree_arrays['feature'])]])
+    nodes = np.concatenate([np.arange(roots[t], ends[t]) for t in keep])
+    return compact_nodes(tree_arrays, nodes, roots[keep], forest_sizes)
+
+def concat_tree_arrays(first, second):
+    """Trees of first followed by trees of second, as a single forest"""
+    offset = len(first['feature'])
+    combined = {
+        name: np.concatenate([np.asarray(first[name]), np.asarray(second[name]) + (offset if name in ('left', 'right', 'roots') else 0)]).astype(np.asarray(first[name]).dtype)
+        for name in ['feature', 'threshold', 'left', 'right', 'value', 'roots']
+    }
+    combined['forest_sizes'] = np.array([len(combined['roots'])], dtype=np.int32)
+    combined['max_depth'] = max(first['max_depth'], second['max_depth'])
+    return combined
+
+def compact_nodes(tree_arrays, nodes, roots, forest_sizes):
+    """Keep only the given node indices, in the given order, renumbering child links"""
+    remap = np.full(len(tree_arrays['feature']), -1, dtype=np.int64)
+    remap[nodes] = np.arange(len(nodes))
+    compacted = {
+        'feature': np.asarray(tree_arrays['feature'])[nodes],
+        'threshold': np.asarray(tree_arrays['threshold'])[nodes],
+        'left': remap[np.asarray(tree_arrays['left'])[nodes]].astype(np.int32),
+        'right': remap[np.asarray(tree_arrays['right'])[nodes]].astype(np.int32),
+        'value': np.asarray(tree_arrays['value'])[nodes],
+        'roots': remap[roots].astype(np.int32),
+        'forest_sizes': np.asarray(forest_sizes, dtype=np.int32)
+    }
+    compacted['max_depth'] = tree_depth(compacted)
+    return compacted
+
+def tree_depth(tree_arrays):
+    """Steps needed for every root to reach a leaf"""
+    left, right = tree_arrays['left'], tree_arrays['right']
+    frontier = np.asarray(tree_arrays['roots'])
+    depth = 0
+    while True:
+        frontier = frontier[left[frontier] != frontier]
+        if len(frontier) == 0:
+            return depth
+        frontier = np.unique(np.concatenate([left[frontier], right[frontier]]))
+        depth += 1
+
+def merge_leaves(tree_arrays, tolerance):
+    """
+    Collapse internal nodes whose two children are leaves, repeating
+    bottom-up until nothing changes, as long as every original leaf beneath
+    the node is less than tolerance from the node's value.
+
+    Every node already stores the mean target of its training samples, so a
+    collapsed node predicts the sample-weighted mean of its former subtree.
+    Merges cascade, so each candidate is checked against the range of the
+    original leaves it would absorb, not against already-merged children;
+    no input's per-tree prediction moves by tolerance or more. Returns
+    (tree_arrays, largest such move in PKR).
+    """
+    left = np.array(tree_arrays['left'])
+    right = np.array(tree_arrays['right'])
+    value = np.asarray(tree_arrays['value'], dtype=np.float64)
+    index = np.arange(len(left))
+
+    # Range of the original leaf values under each current leaf
+    low, high = value.copy(), value.copy()
+    max_deviation = 0.0
+
+    while True:
+        is_leaf = left == index
+        span_low = np.minimum(low[left], low[right])
+        span_high = np.maximum(high[left], high[right])
+        deviation = np.maximum(value - span_low, span_high - value)
+        mergeable = ~is_leaf & is_leaf[left] & is_leaf[right] & (deviation < tolerance)
+        if not mergeable.any():
+            break
+        low[mergeable] = span_low[mergeable]
+        high[mergeable] = span_high[mergeable]
+        max_deviation = max(max_deviation, float(deviation[mergeable].max()))
+        left[mergeable] = index[mergeable]
+        right[mergeable] = index[mergeable]
+
+    merged = {**tree_arrays, 'left': left, 'right': right}
+
+    # Drop the nodes no longer reachable from any root
+    reachable = np.zeros(len(left), dtype=bool)
+    frontier = np.asarray(tree_arrays['roots'])
+    while len(frontier):
+        reachable[frontier] = True
+        frontier = frontier[left[frontier] != frontier]
+        frontier = np.concatenate([left[frontier], right[frontier]])
+    return compact_nodes(merged, np.flatnonzero(reachable), np.asarray(tree_arrays['roots']), tree_arrays['forest_sizes']), max_deviation
+
+def to_float32(tree_arrays):
+    """
+    Store thresholds and leaf values as float32 and features as uint8.
+
+    Inputs are compared as float32, so each threshold is rounded down to the
+    largest float32 not above it: x <= t and x <= t32 then agree for every
+    float32 x and splits are unchanged; only leaf values lose precision.
+    """
+    threshold = np.asarray(tree_arrays['threshold'])
+    threshold32 = threshold.astype(np.float32)
+    rounded_up = threshold32.astype(np.float64) > threshold
+    threshold32[rounded_up] = np.nextafter(threshold32[rounded_up], np.float32(-np.inf))
+
+    return {
+        **tree_arrays,
+        'feature': np.asarray(tree_arrays['feature']).astype(np.uint8),
+        'threshold': threshold32,
+        'value': np.asarray(tree_arrays['value']).astype(np.float32)
+    }
+
+def compress_model(model_data, trees_per_forest=None, leaf_tolerance=0.0, float32=True):
+    """
+    Compressed copy of model_data that serves from tree arrays only.
+
+    Applies, in order: greedy tree selection per forest against the full
+    discrete input grid, sibling-leaf merging within leaf_tolerance PKR and
+    float32 storage. The largest per-tree leaf move from merging is kept
+    as leaf_merge_max_deviation (not saved with the artifact).
+    """
+    tree_arrays = model_data['tree_arrays']
+    scaler = model_data['scaler']
+
+    if trees_per_forest:
+        _, profiles = grid_profiles(model_data)
+        sample = np.random.default_rng(0).choice(len(profiles), size=min(SELECTION_SAMPLE_ROWS, len(profiles)), replace=False)
+        X_reference = scaler.transform(build_feature_matrix(profiles.iloc[sample], model_data))
+        keep = select_trees(tree_arrays, X_reference, trees_per_forest)
+        forest_sizes = np.minimum(np.asarray(tree_arrays['forest_sizes']), trees_per_forest)
+        tree_arrays = subset_trees(tree_arrays, keep, forest_sizes)
+
+    max_deviation = 0.0
+    if leaf_tolerance > 0:
+        tree_arrays, max_deviation = merge_leaves(tree_arrays, leaf_tolerance)
+
+    if float32:
+        tree_arrays = to_float32(tree_arrays)
+
+    compressed = {k: v for k, v in model_data.items() if k not in ('models', 'tree_arrays', 'prediction_cube')}
+    compressed['tree_arrays'] = tree_arrays
+    compressed['leaf_merge_max_deviation'] = max_deviation
+    return compressed
+
+def distill_model(model_data, max_leaf_nodes=4096):
+    """
+    Student model: one tree fitted to the teacher's mean and one to its
+    std, both trained on every profile of the discrete input grid crossed
+    with every career level (postings do not always follow the estimator's
+    experience -> career level rule)
+    """
+    _, profiles = grid_profiles(model_data)
+    career_levels = encoder_for_model(model_data).vocabularies['Career Level']
+    profiles = pd.concat([profiles.assign(**{'Career Level': level}) for level in career_levels], ignore_index=True)
+    X_grid = model_data['scaler'].transform(build_feature_matrix(profiles, model_data))
+    teacher_mean, teacher_std = predict_scaled_with_uncertainty(X_grid, model_data)
+
+    X_grid = X_grid.astype(np.float32)
+    students = [
+        DecisionTreeRegressor(max_leaf_nodes=max_leaf_nodes, random_state=0).fit(X_grid, target)
+        for target in (teacher_mean, teacher_std)
+    ]
+
+    distilled = {k: v for k, v in model_data.items() if k not in ('models', 'tree_arrays', 'prediction_cube', 'conformal_quantile')}
+    distilled['tree_arrays'] = to_float32(flatten_trees([student.tree_ for student in students], [1, 1]))
+    distilled['uncertainty'] = 'distilled'
+    return distilled
+
+def tree_arrays_nbytes(tree_arrays):
+    return sum(np.asarray(tree_arrays[name]).nbytes for name in TREE_ARRAY_NAMES)
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+def compression_report(original, variants, X_test, y_test):
+    """
+    Size, load time and prediction deltas of each saved variant against the
+    original on the test split. variants maps name -> (model_data, directory).
+    """
+    base_mean, base_std = predict_scaled_with_uncertainty(X_test, original)
+    rows = []
+    for name, (model_data, path) in variants.items():
+        start = time.perf_counter()
+        for _ in range(5):
+            loaded = load_model_directory(path)
+        load_time = (time.perf_counter() - start) / 5
+
+        mean_pred, std_pred = predict_scaled_with_uncertainty(X_test, loaded)
+        lower, upper = mean_pred - 1.96 * std_pred, mean_pred + 1.96 * std_pred
+        rows.append({
+            'variant': name,
+            'nodes': len(model_data['tree_arrays']['feature']),
+            'memory_kb': tree_arrays_nbytes(model_data['tree_arrays']) / 1024,
+            'disk_kb': directory_size(path) / 1024,
+            'load_ms': load_time * 1000,
+            'mean_delta_avg': float(np.mean(np.abs(mean_pred - base_mean))),
+            'mean_delta_max': float(np.max(np.abs(mean_pred - base_mean))),
+            'std_delta_avg': float(np.mean(np.abs(std_pred - base_std))),
+            'test_mae': float(np.mean(np.abs(y_test - mean_pred))),
+            'coverage': float(np.mean((y_test >= lower) & (y_test <= upper)) * 100)
+        })
+    return rows
+
+if __name__ == "__main__":
+    import argparse
+    import shutil
+    import tempfile
+    from sklearn.model_selection import train_test_split
+    from data_cache import load_salary_data
+
+    parser = argparse.ArgumentParser(description="Compress a trained confidence model and report size/accuracy trade-offs")
+    parser.add_argument('--trees-per-forest', type=int, default=30, help="trees kept per forest by greedy selection")
+    parser.add_argument('--leaf-tolerance', type=float, default=1000.0, help="merge sibling leaves closer than this (PKR)")
+    parser.add_argument('--no-float32', action='store_true', help="keep float64 thresholds and values")
+    parser.add_argument('--distill', action='store_true', help="also build a two-tree student trained on the input grid")
+    parser.add_argument('--student-leaves', type=int, default=4096)
+    parser.add_argument('--out', default=COMPRESSED_MODEL_DIR, help="directory for the compressed artifact")
+    args = parser.parse_args()
+
+    print("🗜️ COMPRESSING CONFIDENCE MODEL")
+    print("=" * 60)
+    model_data, model_path = load_serving_model()
+    original = {k: v for k, v in model_data.items() if k != 'models'}
+
+    # Test split of the training data, scaled with the model's own scaler
+    df = load_salary_data(['salary_avg', 'experience_years', 'Career Level', 'Functional Area', 'city_grouped', 'Minimum Education'])
+    X = encoder_for_model(model_data).transform(df).dropna()
+    y = df.loc[X.index, 'salary_avg'].to_numpy(dtype=float)
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_test = model_data['scaler'].transform(X_test)
+
+    compressed = compress_model(model_data, args.trees_per_forest, args.leaf_tolerance, not args.no_float32)
+    save_model_directory(compressed, args.out)
+
+    scratch = tempfile.mkdtemp()
+    try:
+        original_dir = model_path if os.path.isdir(model_path) else os.path.join(scratch, 'original')
+        if original_dir != model_path:
+            save_model_directory(original, original_dir)
+        variants = {'original': (original, original_dir), 'compressed': (compressed, args.out)}
+
+        if args.distill:
+            distilled = distill_model(model_data, args.student_leaves)
+            distilled_dir = args.out.rstrip(os.sep) + '-distilled'
+            save_model_directory(distilled, distilled_dir)
+            variants['distilled'] = (distilled, distilled_dir)
+
+        report = compression_report(original, variants, X_test, y_test)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if not os.path.isdir(model_path):
+        print(f"   {model_path}: {os.path.getsize(model_path) / 1e6:,.1f} MB pickle")
+    for row in report:
+        print(f"   {row['variant']:<11} {row['nodes']:>9,} nodes | {row['memory_kb']:>9,.0f} KB in memory | "
+              f"{row['disk_kb']:>9,.0f} KB on disk | load {row['load_ms']:6.2f} ms")
+        print(f"   {'':<11} Δmean avg PKR {row['mean_delta_avg']:,.0f} (max {row['mean_delta_max']:,.0f}) | "
+              f"Δstd avg PKR {row['std_delta_avg']:,.0f} | MAE PKR {row['test_mae']:,.0f} | coverage {row['coverage']:.1f}%")
+    print(f"   Leaf merging moved per-tree leaf values by at most PKR {compressed['leaf_merge_max_deviation']:,.0f} "
+          f"(tolerance {args.leaf_tolerance:,.0f})")
+    print(f"\n💾 Saved compressed model to {args.out}")
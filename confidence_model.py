@@ -1,56 +1,123 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import RobustScaler
-from sklearn.metrics import mean_absolute_error, r2_score
-import joblib
-import matplotlib.pyplot as plt
-from clean import load_and_clean_data, clean_salary, clean_experience, clean_categorical_features, extract_location_features, extract_skills_features, encode_categorical_features
+import os
+import sys
+import time
+from data_cache import load_salary_data
+from feature_encoder import FEATURE_NAMES, FeatureEncoder, encoder_for_model
+from instrumentation import span
 
-def create_confidence_model():
+# Hyperparameters of every forest in the confidence ensemble
+FOREST_PARAMS = {'n_estimators': 100, 'max_depth': 10, 'min_samples_split': 8}
+N_ENSEMBLE_MODELS = 10
+
+# How create_confidence_model estimates uncertainty (see predict_scaled_with_uncertainty)
+UNCERTAINTY_MODES = ['ensemble', 'tree_spread', 'conformal']
+
+# Share of the training split held out to calibrate conformal intervals, and
+# the smallest tree spread (PKR) used to normalize conformal residuals
+CONFORMAL_CALIBRATION_SIZE = 0.2
+CONFORMAL_MIN_SPREAD = 1000.0
+
+# Batches up to this size are scored with the tree-array evaluator when the
+# sklearn forests are also loaded
+TREE_ARRAY_MAX_BATCH = 1000
+
+def _attach_training_data(x_name, x_shape, y_name, y_shape):
     """
-    Create a model that provides confidence intervals and uncertainty estimates
+    Process pool initializer: map the shared training matrix into the worker
     """
-    print("🎯 CREATING CONFIDENCE-AWARE SALARY MODEL")
-    print("=" * 60)
+    from multiprocessing import shared_memory
+    
+    global _shared_training_data
+    x_shm = shared_memory.SharedMemory(name=x_name)
+    y_shm = shared_memory.SharedMemory(name=y_name)
+    _shared_training_data = (
+        x_shm, y_shm,
+        np.ndarray(x_shape, dtype=np.float64, buffer=x_shm.buf),
+        np.ndarray(y_shape, dtype=np.float64, buffer=y_shm.buf)
+    )
+
+def _fit_shared_forest(seed, forest_params):
+    """
+    Fit one ensemble member on the shared training matrix
+    """
+    from sklearn.ensemble import RandomForestRegressor
     
-    # Load cleaned dataset directly
-    print("📊 Loading cleaned dataset...")
-    df = pd.read_csv('cleaned_salary_data.csv')
-    
-    # Create encoders for categorical features
-    from sklearn.preprocessing import LabelEncoder
-    encoders = {}
-    categorical_features = ['Career Level', 'Functional Area', 'city_grouped', 'Minimum Education']
-    
-    for feature in categorical_features:
-        if feature in df.columns:
-            le = LabelEncoder()
-            df[f'{feature}_encoded'] = le.fit_transform(df[feature].fillna('Unknown'))
-            encoders[feature] = le
-    
-    # Use core objective features only (removed subjective skill assessments)
-    features = [
-        'experience_years',
-        'Career Level_encoded', 'Functional Area_encoded', 'city_grouped_encoded', 
-        'Minimum Education_encoded'
-    ]
+    _, _, X, y = _shared_training_data
+    model = RandomForestRegressor(random_state=seed, **forest_params)
+    model.fit(X, y)
+    return model
+
+def train_ensemble(X, y, seeds, n_jobs=1, forest_params=FOREST_PARAMS):
+    """
+    Fit one forest per seed, serially or on a process pool.
+    
+    In parallel mode X and y are copied once into shared memory and every
+    worker reads them in place rather than receiving its own pickled copy.
+    """
+    # Training-only dependencies are imported here so serving never loads them
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+    from sklearn.ensemble import RandomForestRegressor
+    
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    
+    if n_jobs <= 1:
+        models = []
+        for seed in seeds:
+            model = RandomForestRegressor(random_state=seed, **forest_params)
+            model.fit(X, y)
+            models.append(model)
+        return models
+    
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    x_shm = shared_memory.SharedMemory(create=True, size=X.nbytes)
+    y_shm = shared_memory.SharedMemory(create=True, size=y.nbytes)
+    try:
+        np.ndarray(X.shape, dtype=np.float64, buffer=x_shm.buf)[:] = X
+        np.ndarray(y.shape, dtype=np.float64, buffer=y_shm.buf)[:] = y
+        
+        with ProcessPoolExecutor(
+            max_workers=min(n_jobs, len(seeds)),
+            initializer=_attach_training_data,
+            initargs=(x_shm.name, X.shape, y_shm.name, y.shape)
+        ) as pool:
+            return list(pool.map(_fit_shared_forest, seeds, [forest_params] * len(seeds)))
+    finally:
+        x_shm.close()
+        x_shm.unlink()
+        y_shm.close()
+        y_shm.unlink()
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process and of its largest child, in MB
+    """
+    import resource
     
-    # Add derived features
-    tier1_cities = ['Karachi', 'Islamabad', 'Lahore']
-    df['is_top_city'] = df['city_grouped'].apply(lambda x: 1 if x in tier1_cities else 0)
-    df['experience_squared'] = df['experience_years'] ** 2
-    # Removed skills_experience interaction since we removed skills_count
+    # ru_maxrss is reported in KB on Linux and in bytes on macOS
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    parent = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit
+    return parent, children
+
+def prepare_training_data(df):
+    """
+    Encode, split (80/20, fixed seed) and scale the training data.
     
-    education_mapping = {'Matriculation/O-Level': 1, 'Intermediate/A-Level': 2, 'Diploma': 3, 'Bachelors': 4, 'Masters': 5}
-    df['education_numeric'] = df['Minimum Education'].map(education_mapping).fillna(3)
+    Returns (feature_encoder, scaler, X_train_scaled, X_test_scaled, y_train, y_test).
+    """
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import RobustScaler
     
-    final_features = features + ['is_top_city', 'experience_squared', 'education_numeric']
+    # Shared encoder: the same vectorized mapping is used when serving
+    feature_encoder = FeatureEncoder.fit(df)
     
-    # Prepare data
-    X = df[final_features].dropna()
-    y = df.loc[X.index, 'salary_avg']
+    X = feature_encoder.transform(df).dropna()
+    y = df.loc[X.index, 'salary_avg'].to_numpy(dtype=float)
     
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     
@@ -58,57 +125,123 @@ def create_confidence_model():
     X_train_scaled = scaler.fit_transform(X_train)
     X_test_scaled = scaler.transform(X_test)
     
-    # Train ensemble for confidence intervals
-    print("🌳 Training ensemble models for confidence estimation...")
-    
-    models = []
-    predictions_train = []
-    predictions_test = []
-    
-    # Train multiple models with different random states
-    for i in range(10):
-        model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=10,
-            min_samples_split=8,
-            random_state=42 + i  # Different random state for each model
-        )
-        model.fit(X_train_scaled, y_train)
-        models.append(model)
-        
-        predictions_train.append(model.predict(X_train_scaled))
-        predictions_test.append(model.predict(X_test_scaled))
-    
-    # Calculate ensemble statistics
-    train_preds = np.array(predictions_train)
-    test_preds = np.array(predictions_test)
+    return feature_encoder, scaler, X_train_scaled, X_test_scaled, y_train, y_test
+
+def fit_uncertainty_model(X_train_scaled, y_train, uncertainty='ensemble', n_jobs=1, forest_params=FOREST_PARAMS, n_models=N_ENSEMBLE_MODELS):
+    """
+    Fit the forests for an uncertainty mode on scaled training rows.
     
-    # Mean predictions
-    train_mean = np.mean(train_preds, axis=0)
-    test_mean = np.mean(test_preds, axis=0)
+    Returns the model_data entries they provide: models, tree_arrays and,
+    for conformal mode, the calibrated conformal_quantile.
+    """
+    if uncertainty == 'ensemble':
+        # Train multiple models with different random states
+        print("🌳 Training ensemble models for confidence estimation...")
+        seeds = [42 + i for i in range(n_models)]
+        fitted = {'models': train_ensemble(X_train_scaled, y_train, seeds, n_jobs=n_jobs, forest_params=forest_params)}
+    else:
+        print(f"🌳 Training a single forest ({uncertainty} uncertainty)...")
+        X_fit, y_fit = X_train_scaled, y_train
+        if uncertainty == 'conformal':
+            from sklearn.model_selection import train_test_split
+            X_fit, X_cal, y_fit, y_cal = train_test_split(X_fit, y_fit, test_size=CONFORMAL_CALIBRATION_SIZE, random_state=42)
+        fitted = {'models': train_ensemble(X_fit, y_fit, [42], forest_params=forest_params)}
+    fitted['tree_arrays'] = export_tree_arrays(fitted)
+    
+    if uncertainty == 'conformal':
+        fitted['conformal_quantile'] = calibrate_conformal_quantile(X_cal, y_cal, fitted)
+    
+    return fitted
+
+def calibrate_conformal_quantile(X_cal, y_cal, model_data):
+    """
+    Split-conformal quantile of a single forest from held-out scaled rows.
     
-    # Standard deviation (uncertainty)
-    train_std = np.std(train_preds, axis=0)
-    test_std = np.std(test_preds, axis=0)
+    Normalized residuals |y - mean| / spread are ranked; the finite-sample
+    corrected 95% quantile makes mean ± q * spread cover 95% of new postings.
+    """
+    cal_mean, cal_spread = predict_scaled_with_uncertainty(X_cal, {**model_data, 'uncertainty': 'tree_spread'})
+    scores = np.abs(y_cal - cal_mean) / np.maximum(cal_spread, CONFORMAL_MIN_SPREAD)
+    level = min(1.0, np.ceil((len(scores) + 1) * 0.95) / len(scores))
+    return float(np.quantile(scores, level, method='higher'))
+
+def evaluation_metrics(y_test, test_mean, test_std):
+    """test_mae, test_r2, 95% interval coverage (%) and mean interval width on held-out rows"""
+    from sklearn.metrics import mean_absolute_error, r2_score
     
-    # Confidence intervals (95%)
-    train_lower = train_mean - 1.96 * train_std
-    train_upper = train_mean + 1.96 * train_std
     test_lower = test_mean - 1.96 * test_std
     test_upper = test_mean + 1.96 * test_std
+    return {
+        'test_mae': float(mean_absolute_error(y_test, test_mean)),
+        'test_r2': float(r2_score(y_test, test_mean)),
+        # How often actual values fall within the confidence intervals
+        'coverage': float(np.mean((y_test >= test_lower) & (y_test <= test_upper)) * 100),
+        'interval_width': float(np.mean(test_upper - test_lower))
+    }
+
+def create_confidence_model(n_jobs=1, df=None, save_path='salary_prediction_confidence_model.pkl', uncertainty='ensemble',
+                            forest_params=FOREST_PARAMS, n_models=N_ENSEMBLE_MODELS, training_matrix=None):
+    """
+    Create a model that provides confidence intervals and uncertainty estimates.
+    
+    uncertainty selects how intervals are derived: 'ensemble' trains
+    n_models forests and uses the spread of their means,
+    'tree_spread' and 'conformal' train a single forest (see
+    predict_scaled_with_uncertainty).
+    
+    With n_jobs > 1 (or -1 for all cores) the ensemble members are fitted on
+    a process pool; results are identical to the serial run. Pass df to train
+    on another dataset and save_path=None to skip writing the artifacts, or
+    training_matrix to train from a directory built by training_pipeline.py.
+    The model is saved both as save_path and as the directory artifact next
+    to it, which is what load_serving_model prefers.
+    """
+    if uncertainty not in UNCERTAINTY_MODES:
+        raise ValueError(f"uncertainty must be one of {UNCERTAINTY_MODES}, got {uncertainty!r}")
+    
+    import joblib
+    
+    print("🎯 CREATING CONFIDENCE-AWARE SALARY MODEL")
+    print("=" * 60)
+    start_time = time.perf_counter()
+    
+    # Load cleaned dataset directly
+    print("📊 Loading cleaned dataset...")
+    if training_matrix:
+        from training_pipeline import prepare_matrix_training_data
+        feature_encoder, scaler, X_train_scaled, X_test_scaled, y_train, y_test = prepare_matrix_training_data(training_matrix)
+    else:
+        if df is None:
+            df = load_salary_data(['salary_avg', 'experience_years', 'Career Level', 'Functional Area', 'city_grouped', 'Minimum Education'])
+        feature_encoder, scaler, X_train_scaled, X_test_scaled, y_train, y_test = prepare_training_data(df)
+    
+    model_data = {
+        'scaler': scaler,
+        'feature_encoder': feature_encoder,
+        'feature_names': list(FEATURE_NAMES),
+        'uncertainty': uncertainty,
+        'forest_params': dict(forest_params)
+    }
     
-    # Evaluate performance
-    test_mae = mean_absolute_error(y_test, test_mean)
-    test_r2 = r2_score(y_test, test_mean)
+    model_data.update(fit_uncertainty_model(
+        X_train_scaled, y_train, uncertainty, n_jobs=n_jobs, forest_params=forest_params, n_models=n_models
+    ))
+    fit_time = time.perf_counter() - start_time
     
-    # Calculate coverage (how often actual values fall within confidence intervals)
-    coverage = np.mean((y_test >= test_lower) & (y_test <= test_upper)) * 100
+    predict_start = time.perf_counter()
+    test_mean, test_std = predict_scaled_with_uncertainty(X_test_scaled, model_data)
+    predict_time = time.perf_counter() - predict_start
     
-    print(f"\n📊 CONFIDENCE MODEL RESULTS:")
+    # Evaluate performance with 95% confidence intervals
+    metrics = evaluation_metrics(y_test, test_mean, test_std)
+    test_mae, test_r2 = metrics['test_mae'], metrics['test_r2']
+    coverage, interval_width = metrics['coverage'], metrics['interval_width']
+    
+    print(f"\n📊 CONFIDENCE MODEL RESULTS ({uncertainty}):")
     print(f"   Test MAE: PKR {test_mae:,.0f}")
     print(f"   Test R²: {test_r2:.3f}")
     print(f"   95% Confidence Coverage: {coverage:.1f}%")
-    print(f"   Average Confidence Width: PKR {np.mean(test_upper - test_lower):,.0f}")
+    print(f"   Average Confidence Width: PKR {interval_width:,.0f}")
     
     # Analyze uncertainty patterns
     print(f"\n🔍 UNCERTAINTY ANALYSIS:")
@@ -127,72 +260,326 @@ def create_confidence_model():
             avg_uncertainty = np.mean(test_std[mask])
             print(f"   {range_name}: ±{avg_uncertainty:,.0f} PKR uncertainty")
     
-    # Save the ensemble model
-    model_data = {
-        'models': models,
-        'scaler': scaler,
-        'encoders': encoders,
-        'feature_names': final_features,
+    model_data.update({
         'test_mae': test_mae,
         'test_r2': test_r2,
-        'coverage': coverage
-    }
+        'coverage': coverage,
+        'interval_width': interval_width,
+        'fit_time': fit_time,
+        'predict_time': predict_time
+    })
+    
+    if save_path:
+        from model_artifact import save_model_directory
+        
+        joblib.dump(model_data, save_path)
+        
+        # Servers load the directory artifact first, so it must be replaced too
+        dir_path = os.path.splitext(save_path)[0]
+        save_model_directory(model_data, dir_path)
+        print(f"\n💾 Saved confidence model ({save_path} and {dir_path}/)")
     
-    joblib.dump(model_data, 'salary_prediction_confidence_model.pkl')
-    print(f"\n💾 Saved confidence model")
+    parent_rss, child_rss = peak_rss_mb()
+    print(f"\n⏱️ TRAINING RESOURCES ({'serial' if n_jobs == 1 else f'{n_jobs} jobs'}):")
+    print(f"   Wall time: {time.perf_counter() - start_time:.1f}s")
+    print(f"   Peak RSS: {parent_rss:,.0f} MB (main), {child_rss:,.0f} MB (largest worker)")
     
     return model_data
 
-def predict_with_confidence(job_data, model_data):
+def export_tree_arrays(model_data):
     """
-    Make predictions with confidence intervals
+    Flatten every tree of the ensemble into contiguous node arrays.
+    
+    Child indices are global into the flat arrays and leaves point to
+    themselves, so a batch can be walked a fixed number of steps.
     """
     models = model_data['models']
-    scaler = model_data['scaler']
-    encoders = model_data['encoders']
+    trees = [estimator.tree_ for model in models for estimator in model.estimators_]
+    return flatten_trees(trees, [len(model.estimators_) for model in models])
+
+def flatten_trees(trees, forest_sizes):
+    """
+    Flatten sklearn Tree objects, grouped into forests of forest_sizes trees,
+    into the tree-array layout
+    """
+    node_counts = np.array([tree.node_count for tree in trees])
+    roots = np.concatenate([[0], np.cumsum(node_counts)[:-1]])
+    
+    feature, threshold, left, right, value = [], [], [], [], []
+    for tree, root in zip(trees, roots):
+        nodes = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        left.append(np.where(is_leaf, nodes, tree.children_left) + root)
+        right.append(np.where(is_leaf, nodes, tree.children_right) + root)
+        value.append(tree.value[:, 0, 0])
+    
+    return {
+        'feature': np.concatenate(feature).astype(np.int32),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'left': np.concatenate(left).astype(np.int32),
+        'right': np.concatenate(right).astype(np.int32),
+        'value': np.concatenate(value).astype(np.float64),
+        'roots': roots.astype(np.int32),
+        'forest_sizes': np.array(forest_sizes, dtype=np.int32),
+        'max_depth': max(tree.max_depth for tree in trees)
+    }
+
+def _walk_tree_arrays(tree_arrays, X_scaled, chunk_size=None):
+    """
+    Walk every tree for a batch of scaled rows, yielding (start, leaf_values)
+    per chunk of rows, where leaf_values is (n_trees, n_chunk)
+    """
+    feature = tree_arrays['feature']
+    threshold = tree_arrays['threshold']
+    value = tree_arrays['value']
+    roots = np.asarray(tree_arrays['roots'], dtype=np.intp)
+    
+    # Interleave children so one gather picks [right, left][go_left]
+    children = np.stack([tree_arrays['right'], tree_arrays['left']], axis=1).ravel()
+    
+    # sklearn evaluates trees on float32 inputs
+    X = np.asarray(X_scaled, dtype=np.float32)
+    n_rows, n_features = X.shape
+    if chunk_size is None:
+        chunk_size = max(1, 2 ** 18 // len(roots))
+    
+    for start in range(0, n_rows, chunk_size):
+        X_chunk = X[start:start + chunk_size]
+        n_chunk = X_chunk.shape[0]
+        X_flat = X_chunk.ravel()
+        row_offsets = (np.arange(n_chunk) * n_features)[None, :]
+        
+        # All trees advance one level per step; leaves loop onto themselves
+        node = np.repeat(roots[:, None], n_chunk, axis=1)
+        for _ in range(tree_arrays['max_depth']):
+            go_left = X_flat.take(row_offsets + feature.take(node)) <= threshold.take(node)
+            node = children.take(2 * node + go_left)
+        yield start, value.take(node).astype(np.float64, copy=False)
+
+def predict_tree_arrays(tree_arrays, X_scaled, chunk_size=None):
+    """
+    Walk every tree for a batch of scaled rows and return per-forest means
+    as an (n_forests, N) array, matching RandomForestRegressor.predict
+    """
+    forest_sizes = np.asarray(tree_arrays['forest_sizes'])
+    per_forest = np.empty((len(forest_sizes), len(X_scaled)), dtype=np.float64)
+    bounds = np.concatenate([[0], np.cumsum(forest_sizes)])
+    
+    for start, leaf_values in _walk_tree_arrays(tree_arrays, X_scaled, chunk_size):
+        # Sum trees in estimator order, as sklearn does, then average
+        for i in range(len(forest_sizes)):
+            forest_values = leaf_values[bounds[i]:bounds[i + 1]]
+            per_forest[i, start:start + leaf_values.shape[1]] = np.cumsum(forest_values, axis=0)[-1] / forest_sizes[i]
+    
+    return per_forest
+
+def predict_tree_spread(tree_arrays, X_scaled, chunk_size=None):
+    """
+    Mean and standard deviation across all trees for a batch of scaled rows
+    """
+    mean_pred = np.empty(len(X_scaled))
+    tree_std = np.empty(len(X_scaled))
+    
+    for start, leaf_values in _walk_tree_arrays(tree_arrays, X_scaled, chunk_size):
+        stop = start + leaf_values.shape[1]
+        mean_pred[start:stop] = np.cumsum(leaf_values, axis=0)[-1] / len(leaf_values)
+        tree_std[start:stop] = np.std(leaf_values, axis=0)
+    
+    return mean_pred, tree_std
+
+def benchmark_tree_arrays(model_data, batch_sizes=(1, 100, 10000), repeats=5):
+    """
+    Compare latency of the sklearn ensemble against the tree-array evaluator
+    """
+    print(f"\n⏱️ INFERENCE LATENCY: sklearn vs tree arrays")
+    print("=" * 60)
+    
+    models = model_data['models']
+    tree_arrays = model_data.get('tree_arrays') or export_tree_arrays(model_data)
+    n_features = len(model_data['feature_names'])
+    rng = np.random.default_rng(42)
+    
+    for batch_size in batch_sizes:
+        X_scaled = rng.normal(size=(batch_size, n_features))
+        
+        start = time.perf_counter()
+        for _ in range(repeats):
+            sklearn_preds = np.array([model.predict(X_scaled) for model in models])
+        sklearn_time = (time.perf_counter() - start) / repeats
+        
+        start = time.perf_counter()
+        for _ in range(repeats):
+            array_preds = predict_tree_arrays(tree_arrays, X_scaled)
+        array_time = (time.perf_counter() - start) / repeats
+        
+        identical = np.array_equal(sklearn_preds, array_preds)
+        print(f"   N={batch_size:>6,}: sklearn {sklearn_time * 1000:9.2f} ms | "
+              f"tree arrays {array_time * 1000:9.2f} ms | "
+              f"speedup {sklearn_time / array_time:5.1f}x | identical: {identical}")
+
+def compare_uncertainty_modes(modes=UNCERTAINTY_MODES, df=None, batch_size=1000, repeats=20):
+    """
+    Train one model per uncertainty mode and compare accuracy, interval
+    quality and cost
+    """
+    import contextlib
+    import io
+    
+    profile = {'experience_years': 4, 'Career Level': 'Experienced Professional', 'Minimum Education': 'Bachelors',
+               'city_grouped': 'Karachi', 'Functional Area': 'Software & Web Development'}
+    batch = pd.DataFrame([profile] * batch_size)
+    batch['experience_years'] = np.arange(batch_size) % 16
+    batch['Career Level'] = [career_level_for_experience(e) for e in batch['experience_years']]
+    
+    rows = []
+    for mode in modes:
+        with contextlib.redirect_stdout(io.StringIO()):
+            model_data = create_confidence_model(df=df, save_path=None, uncertainty=mode)
+        
+        start = time.perf_counter()
+        for _ in range(repeats):
+            predict_batch_with_confidence([profile], model_data)
+        single_time = (time.perf_counter() - start) / repeats
+        
+        start = time.perf_counter()
+        for _ in range(max(1, repeats // 10)):
+            predict_batch_with_confidence(batch, model_data)
+        batch_time = (time.perf_counter() - start) / max(1, repeats // 10)
+        
+        rows.append({
+            'mode': mode,
+            'trees': int(model_data['tree_arrays']['forest_sizes'].sum()),
+            'test_mae': model_data['test_mae'],
+            'test_r2': model_data['test_r2'],
+            'coverage': model_data['coverage'],
+            'interval_width': model_data['interval_width'],
+            'train_s': model_data['fit_time'],
+            'predict_single_ms': single_time * 1000,
+            f'predict_{batch_size}_ms': batch_time * 1000
+        })
+    
+    print(f"\n⚖️ UNCERTAINTY MODES")
+    print("=" * 60)
+    for row in rows:
+        print(f"   {row['mode']:<12} {row['trees']:>5} trees | MAE PKR {row['test_mae']:,.0f} | R² {row['test_r2']:.3f} | "
+              f"coverage {row['coverage']:5.1f}% | width PKR {row['interval_width']:,.0f}")
+        print(f"   {'':<12} train {row['train_s']:6.2f}s | predict 1 row {row['predict_single_ms']:7.2f} ms | "
+              f"{batch_size:,} rows {row[f'predict_{batch_size}_ms']:8.2f} ms")
+    
+    return pd.DataFrame(rows)
+
+def career_level_for_experience(experience_years):
+    """
+    Auto-determine career level based on experience
+    """
+    if experience_years <= 1:
+        return "Intern/Student"
+    elif experience_years <= 3:
+        return "Entry Level"
+    elif experience_years <= 8:
+        return "Experienced Professional"
+    return "Department Head"
+
+def build_feature_matrix(profiles, model_data):
+    """
+    Encode a batch of job profiles into the model's feature matrix in one pass
+    """
+    X = encoder_for_model(model_data).transform(profiles)
     feature_names = model_data['feature_names']
+    return X if list(X.columns) == list(feature_names) else X[feature_names]
+
+def predict_scaled_with_uncertainty(X_scaled, model_data):
+    """
+    Mean prediction and uncertainty (std) for already scaled rows, using the
+    model's uncertainty mode:
+    
+    - ensemble: std across the means of the independently seeded forests
+    - tree_spread: std across the trees of a single forest
+    - conformal: tree spread rescaled by the split-conformal quantile, so
+      that mean ± 1.96 * std is the calibrated 95% interval
+    - distilled: a student with one tree for the mean and one for the std
+      (see compression.distill_model)
+    """
+    mode = model_data.get('uncertainty', 'ensemble')
+    
+    if mode == 'distilled':
+        mean_pred, std_pred = predict_tree_arrays(model_data['tree_arrays'], X_scaled)
+        return mean_pred, np.maximum(std_pred, 0)
+    
+    # The tree-array walk wins on small batches; sklearn's compiled trees win
+    # on bulk scoring
+    use_tree_arrays = 'tree_arrays' in model_data and (
+        'models' not in model_data or len(X_scaled) <= TREE_ARRAY_MAX_BATCH
+    )
+    
+    if mode == 'ensemble':
+        # Per-model predictions stacked as (N, n_models)
+        if use_tree_arrays:
+            predictions = np.ascontiguousarray(predict_tree_arrays(model_data['tree_arrays'], X_scaled).T)
+        else:
+            predictions = np.column_stack([model.predict(X_scaled) for model in model_data['models']])
+        return np.mean(predictions, axis=1), np.std(predictions, axis=1)
     
-    # Create feature vector (objective features only)
-    feature_vector = [
-        job_data['experience_years'],
-        encoders['Career Level'].transform([job_data['Career Level']])[0],
-        encoders['Functional Area'].transform([job_data['Functional Area']])[0],
-        encoders['city_grouped'].transform([job_data['city_grouped']])[0],
-        encoders['Minimum Education'].transform([job_data['Minimum Education']])[0],
-        1 if job_data['city_grouped'] in ['Karachi', 'Islamabad', 'Lahore'] else 0,
-        job_data['experience_years'] ** 2,
-        4 if job_data['Minimum Education'] == 'Bachelors' else 5
-    ]
+    if use_tree_arrays:
+        mean_pred, tree_std = predict_tree_spread(model_data['tree_arrays'], X_scaled)
+    else:
+        X = np.asarray(X_scaled, dtype=np.float32)
+        tree_preds = np.array([tree.predict(X) for model in model_data['models'] for tree in model.estimators_])
+        mean_pred = np.cumsum(tree_preds, axis=0)[-1] / len(tree_preds)
+        tree_std = np.std(tree_preds, axis=0)
+    
+    if mode == 'tree_spread':
+        return mean_pred, tree_std
+    if mode == 'conformal':
+        return mean_pred, model_data['conformal_quantile'] * np.maximum(tree_std, CONFORMAL_MIN_SPREAD) / 1.96
+    raise ValueError(f"Unknown uncertainty mode {mode!r}")
+
+def predict_batch_with_confidence(profiles, model_data):
+    """
+    Make predictions with confidence intervals for a batch of profiles.
     
-    # Scale features
-    X = pd.DataFrame([feature_vector], columns=feature_names)
-    X_scaled = scaler.transform(X)
+    Returns an (N, 4) array with columns mean, std, lower bound and upper bound.
+    """
+    scaler = model_data['scaler']
     
-    # Get predictions from all models
-    predictions = [model.predict(X_scaled)[0] for model in models]
+    # Scale features once for the whole batch
+    with span('predict.encode'):
+        X = build_feature_matrix(profiles, model_data)
+        X_scaled = scaler.transform(X)
     
-    # Calculate statistics
-    mean_pred = np.mean(predictions)
-    std_pred = np.std(predictions)
+    with span('predict.forests'):
+        mean_pred, std_pred = predict_scaled_with_uncertainty(X_scaled, model_data)
     
-    # 95% confidence interval
-    lower_bound = mean_pred - 1.96 * std_pred
-    upper_bound = mean_pred + 1.96 * std_pred
+    # 95% confidence interval with salary floor and cap
+    lower_bound = np.maximum(10000, mean_pred - 1.96 * std_pred)
+    upper_bound = np.minimum(500000, mean_pred + 1.96 * std_pred)
     
-    # Confidence level based on uncertainty
+    return np.column_stack([mean_pred, std_pred, lower_bound, upper_bound])
+
+def confidence_level(std_pred):
+    """
+    Confidence level based on uncertainty
+    """
     if std_pred < 15000:
-        confidence = "High"
+        return "High"
     elif std_pred < 25000:
-        confidence = "Medium"
-    else:
-        confidence = "Low"
+        return "Medium"
+    return "Low"
+
+def predict_with_confidence(job_data, model_data):
+    """
+    Make predictions with confidence intervals
+    """
+    mean_pred, std_pred, lower_bound, upper_bound = predict_batch_with_confidence([job_data], model_data)[0]
     
     return {
         'prediction': mean_pred,
-        'lower_bound': max(10000, lower_bound),  # Minimum salary floor
-        'upper_bound': min(500000, upper_bound),  # Maximum salary cap
+        'lower_bound': lower_bound,
+        'upper_bound': upper_bound,
         'uncertainty': std_pred,
-        'confidence': confidence
+        'confidence': confidence_level(std_pred)
     }
 
 def demo_confidence_predictions():
@@ -202,6 +589,8 @@ def demo_confidence_predictions():
     print(f"\n🧪 CONFIDENCE PREDICTION DEMO")
     print("=" * 50)
     
+    import joblib
+    
     # Load model
     model_data = joblib.load('salary_prediction_confidence_model.pkl')
     
@@ -237,8 +626,29 @@ def demo_confidence_predictions():
         print(f"   Confidence Level: {result['confidence']}")
 
 if __name__ == "__main__":
-    # Create confidence model
-    model_data = create_confidence_model()
-    
-    # Demo predictions
-    demo_confidence_predictions()
+    import argparse
+    import joblib
+    
+    parser = argparse.ArgumentParser(description="Train the confidence-aware salary model")
+    parser.add_argument('--benchmark-inference', action='store_true',
+                        help="compare sklearn and tree-array latency on the saved model instead of training")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="train ensemble members on this many processes (-1 for all cores)")
+    parser.add_argument('--uncertainty', choices=UNCERTAINTY_MODES, default='ensemble',
+                        help="how confidence intervals are derived")
+    parser.add_argument('--training-matrix', default=None,
+                        help="train from a matrix directory built by training_pipeline.py")
+    parser.add_argument('--compare-uncertainty', action='store_true',
+                        help="train every uncertainty mode and print an accuracy/cost comparison instead of saving a model")
+    args = parser.parse_args()
+    
+    if args.benchmark_inference:
+        benchmark_tree_arrays(joblib.load('salary_prediction_confidence_model.pkl'))
+    elif args.compare_uncertainty:
+        compare_uncertainty_modes()
+    else:
+        # Create confidence model
+        model_data = create_confidence_model(n_jobs=args.jobs, uncertainty=args.uncertainty, training_matrix=args.training_matrix)
+        
+        # Demo predictions
+        demo_confidence_predictions()
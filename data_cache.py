@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+DATA_PATH = 'cleaned_salary_data.csv'
+
+CACHE_FORMAT_VERSION = 1
+
+def file_sha256(path):
+    """Content hash used to tie derived files to their source"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cache_dir_for(csv_path):
+    """Columnar cache directory stored next to the CSV"""
+    return os.path.splitext(csv_path)[0] + '.cache'
+
+def _read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _code_dtype(n_categories):
+    return np.int16 if n_categories < np.iinfo(np.int16).max else np.int32
+
+def build_data_cache(csv_path=DATA_PATH, csv_hash=None):
+    """
+    Parse the CSV once and store every column as a typed .npy array.
+
+    Numeric and boolean columns keep their dtype; text columns have their
+    whitespace runs collapsed and are stored as int16/int32 categorical
+    codes plus an array of their categories. The directory is built next
+    to the cache and swapped in like save_model_directory does.
+    """
+    cache_dir = cache_dir_for(csv_path)
+    df = pd.read_csv(csv_path)
+
+    # Per-process names, so workers rebuilding at the same time never share a directory
+    tmp_dir = f'{cache_dir}.tmp-{os.getpid()}'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = {}
+    for i, name in enumerate(df.columns):
+        values = df[name]
+        file_name = f'col_{i:03d}.npy'
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            np.save(os.path.join(tmp_dir, file_name), values.to_numpy())
+            columns[name] = {'file': file_name, 'kind': 'numeric'}
+        else:
+            # Collapse whitespace runs such as the padding inside Job Location
+            categorical = pd.Categorical(values.str.split().str.join(' '))
+            codes = categorical.codes.astype(_code_dtype(len(categorical.categories)))
+            categories_file = f'col_{i:03d}.categories.npy'
+            np.save(os.path.join(tmp_dir, file_name), codes)
+            np.save(os.path.join(tmp_dir, categories_file), categorical.categories.to_numpy(dtype=str))
+            columns[name] = {'file': file_name, 'kind': 'categorical', 'categories': categories_file}
+
+    stat = os.stat(csv_path)
+    manifest = {
+        'format_version': CACHE_FORMAT_VERSION,
+        'csv_sha256': csv_hash or file_sha256(csv_path),
+        'csv_size': stat.st_size,
+        'csv_mtime_ns': stat.st_mtime_ns,
+        'n_rows': len(df),
+        'columns': columns
+    }
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f)
+
+    # Move the old cache aside rather than deleting it first, so readers
+    # never find the directory missing while the new one is written
+    old_dir = f'{cache_dir}.old-{os.getpid()}'
+    if os.path.exists(cache_dir):
+        os.replace(cache_dir, old_dir)
+    os.replace(tmp_dir, cache_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return manifest
+
+def ensure_data_cache(csv_path=DATA_PATH):
+    """
+    Return the cache manifest for a CSV, rebuilding the cache when the CSV's
+    content hash no longer matches. Unchanged size and mtime skip hashing.
+    """
+    manifest = _read_manifest(cache_dir_for(csv_path))
+    stat = os.stat(csv_path)
+
+    if manifest is not None and manifest.get('format_version') == CACHE_FORMAT_VERSION:
+        if manifest['csv_size'] == stat.st_size and manifest['csv_mtime_ns'] == stat.st_mtime_ns:
+            return manifest
+        csv_hash = file_sha256(csv_path)
+        if manifest['csv_sha256'] == csv_hash:
+            return manifest
+        return build_data_cache(csv_path, csv_hash)
+
+    return build_data_cache(csv_path)
+
+def data_version(csv_path=DATA_PATH):
+    """Content hash of the dataset currently backing the cache"""
+    return ensure_data_cache(csv_path)['csv_sha256']
+
+def load_salary_data(columns=None, csv_path=DATA_PATH):
+    """
+    Load the salary dataset from the columnar cache.
+
+    Only the requested columns are read; text columns come back as pandas
+    categoricals.
+    """
+    manifest = ensure_data_cache(csv_path)
+    cache_dir = cache_dir_for(csv_path)
+    columns = list(manifest['columns']) if columns is None else columns
+
+    data = {}
+    for name in columns:
+        spec = manifest['columns'][name]
+        values = np.load(os.path.join(cache_dir, spec['file']))
+        if spec['kind'] == 'categorical':
+            categories = np.load(os.path.join(cache_dir, spec['categories']))
+            values = pd.Categorical.from_codes(values, categories=categories)
+        data[name] = values
+
+    return pd.DataFrame(data, columns=columns)
+
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+
+    app_columns = ['salary_avg', 'experience_years', 'city_grouped', 'Minimum Education', 'Career Level', 'Functional Area']
+
+    print("🗄️ DATA CACHE BENCHMARK")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    manifest = build_data_cache()
+    print(f"   Built cache for {manifest['n_rows']:,} rows in {time.perf_counter() - start:.2f}s")
+
+    def measure(label, load, repeats=5):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            df = load()
+            timings.append(time.perf_counter() - start)
+        tracemalloc.start()
+        load()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        frame_mb = df.memory_usage(deep=True).sum() / 1e6
+        print(f"   {label:<24} {np.median(timings) * 1000:7.1f} ms | frame {frame_mb:6.2f} MB | peak alloc {peak / 1e6:6.2f} MB")
+
+    measure("read_csv (all columns)", lambda: pd.read_csv(DATA_PATH))
+    measure("cache (all columns)", lambda: load_salary_data())
+    measure("read_csv (app columns)", lambda: pd.read_csv(DATA_PATH, usecols=app_columns))
+    measure("cache (app columns)", lambda: load_salary_data(app_columns))
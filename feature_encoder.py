@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+CATEGORICAL_FEATURES = ['Career Level', 'Functional Area', 'city_grouped', 'Minimum Education']
+
+FEATURE_NAMES = [
+    'experience_years',
+    'Career Level_encoded', 'Functional Area_encoded', 'city_grouped_encoded', 'Minimum Education_encoded',
+    'is_top_city', 'experience_squared', 'education_numeric'
+]
+
+TOP_CITIES = ['Karachi', 'Islamabad', 'Lahore']
+
+EDUCATION_LEVELS = {'Matriculation/O-Level': 1, 'Intermediate/A-Level': 2, 'Diploma': 3, 'Bachelors': 4, 'Masters': 5}
+EDUCATION_DEFAULT = 3
+
+# Categories preferred as the stand-in for unseen values, in order; features
+# with none of them fall back to their most frequent training category
+FALLBACK_CANDIDATES = ['Other', 'General', 'Unknown']
+
+UNKNOWN_POLICIES = ['fallback', 'error']
+
+class FeatureEncoder:
+    """
+    Maps job profiles to the model's feature matrix in one vectorized pass.
+
+    Each categorical vocabulary is compiled into a value -> code dict, so a
+    column is encoded with plain dict lookups and no per-call validation.
+    Codes match the LabelEncoder ordering the forests were trained with.
+    Unseen categories either raise (unknown='error') or take the feature's
+    fallback category.
+    """
+
+    def __init__(self, vocabularies, unknown='fallback', fallbacks=None):
+        if unknown not in UNKNOWN_POLICIES:
+            raise ValueError(f"unknown must be one of {UNKNOWN_POLICIES}, got {unknown!r}")
+        self.vocabularies = {feature: [str(c) for c in classes] for feature, classes in vocabularies.items()}
+        self.unknown = unknown
+        self.fallbacks = dict(fallbacks or {})
+        for feature, classes in self.vocabularies.items():
+            if feature not in self.fallbacks:
+                self.fallbacks[feature] = next((c for c in FALLBACK_CANDIDATES if c in classes), classes[0])
+        self._compile()
+
+    def _compile(self):
+        self._codes = {feature: {c: i for i, c in enumerate(classes)} for feature, classes in self.vocabularies.items()}
+        self._fallback_codes = {feature: self._codes[feature][value] for feature, value in self.fallbacks.items()}
+
+    def __getstate__(self):
+        return {'vocabularies': self.vocabularies, 'unknown': self.unknown, 'fallbacks': self.fallbacks}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._compile()
+
+    @classmethod
+    def fit(cls, df, unknown='fallback'):
+        """Learn sorted vocabularies from training data; missing values become 'Unknown'"""
+        vocabularies, fallbacks = {}, {}
+        for feature in CATEGORICAL_FEATURES:
+            values = df[feature].astype(object).fillna('Unknown')
+            vocabularies[feature] = list(np.unique(values.to_numpy(dtype=object)))
+            if not any(c in vocabularies[feature] for c in FALLBACK_CANDIDATES):
+                fallbacks[feature] = values.value_counts().index[0]
+        return cls(vocabularies, unknown=unknown, fallbacks=fallbacks)
+
+    @classmethod
+    def from_label_encoders(cls, encoders, unknown='fallback'):
+        """Wrap the per-feature LabelEncoders stored by older model artifacts"""
+        return cls({feature: list(encoder.classes_) for feature, encoder in encoders.items()}, unknown=unknown)
+
+    def extend(self, df):
+        """
+        Encoder that also knows the categories first seen in df. New values
+        are appended, so existing codes (and the trees using them) are kept.
+        Returns (encoder, {feature: added values}).
+        """
+        vocabularies, added = {}, {}
+        for feature, classes in self.vocabularies.items():
+            known = set(classes)
+            new = sorted({str(v) for v in df[feature].astype(object).fillna('Unknown')} - known)
+            vocabularies[feature] = classes + new
+            if new:
+                added[feature] = new
+        return FeatureEncoder(vocabularies, unknown=self.unknown, fallbacks=self.fallbacks), added
+
+    def encode(self, feature, values):
+        """Integer codes for one categorical column"""
+        lookup = self._codes[feature]
+        codes = np.array([lookup.get(value, -1) for value in values], dtype=np.int64)
+        unseen = codes < 0
+        if unseen.any():
+            if self.unknown == 'error':
+                raise ValueError(f"Unknown {feature} value(s): {sorted({str(v) for v in np.asarray(values, dtype=object)[unseen]})}")
+            codes[unseen] = self._fallback_codes[feature]
+        return codes
+
+    def transform(self, profiles):
+        """
+        Feature matrix for a profile dict, a list of profile dicts or a
+        DataFrame, as a DataFrame with FEATURE_NAMES columns
+        """
+        if isinstance(profiles, dict):
+            profiles = [profiles]
+
+        index = None
+        if isinstance(profiles, pd.DataFrame):
+            index = profiles.index
+            columns = {feature: profiles[feature].astype(object).fillna('Unknown').to_numpy() for feature in CATEGORICAL_FEATURES}
+            experience = profiles['experience_years'].to_numpy(dtype=float)
+        else:
+            columns = {feature: np.array([p[feature] for p in profiles], dtype=object) for feature in CATEGORICAL_FEATURES}
+            experience = np.array([p['experience_years'] for p in profiles], dtype=float)
+
+        return pd.DataFrame({
+            'experience_years': experience,
+            **{f'{feature}_encoded': self.encode(feature, columns[feature]) for feature in CATEGORICAL_FEATURES},
+            'is_top_city': np.isin(columns['city_grouped'], TOP_CITIES).astype(int),
+            'experience_squared': experience ** 2,
+            'education_numeric': np.array([EDUCATION_LEVELS.get(v, EDUCATION_DEFAULT) for v in columns['Minimum Education']], dtype=float)
+        }, index=index, columns=FEATURE_NAMES)
+
+def encoder_for_model(model_data):
+    """The model's FeatureEncoder, wrapping legacy LabelEncoders on first use"""
+    if 'feature_encoder' not in model_data:
+        model_data['feature_encoder'] = FeatureEncoder.from_label_encoders(model_data['encoders'])
+    return model_data['feature_encoder']
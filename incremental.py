@@ -0,0 +1,194 @@
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import train_test_split
+from compression import concat_tree_arrays, subset_trees
+from confidence_model import (FOREST_PARAMS, calibrate_conformal_quantile, evaluation_metrics, flatten_trees,
+                              predict_batch_with_confidence, predict_scaled_with_uncertainty)
+from data_cache import load_salary_data
+from feature_encoder import encoder_for_model
+from model_artifact import METRIC_NAMES, MODEL_DIR, load_serving_model, save_model_directory
+
+TRAINING_COLUMNS = ['salary_avg', 'experience_years', 'Career Level', 'Functional Area', 'city_grouped', 'Minimum Education']
+
+def lineage_for(model_data):
+    """Version and per-tree training version of a model; unversioned models are version 0"""
+    lineage = model_data.get('lineage')
+    if lineage is None:
+        n_trees = int(np.sum(model_data['tree_arrays']['forest_sizes']))
+        lineage = {'version': 0, 'tree_versions': [0] * n_trees, 'updates': []}
+    return lineage
+
+def versioned_path(model_path, version):
+    """Sibling directory for a model version, e.g. salary_prediction_confidence_model-v0003"""
+    base_path = re.sub(r'-v\d{4}$', '', model_path.rstrip(os.sep))
+    return f"{base_path}-v{version:04d}"
+
+# Share of the merged batch and replay rows held out to re-measure the updated model
+EVALUATION_SIZE = 0.2
+
+def incremental_update(model_data, batch, n_new_trees=10, replay=None, seed=0, evaluation_size=EVALUATION_SIZE):
+    """
+    Fold a batch of new postings into a served model without full retraining.
+
+    The encoder is extended with unseen categories (existing codes are kept)
+    and the scaler is frozen, so old trees see the same feature space. Each
+    forest gets n_new_trees trees fitted on the batch plus the optional
+    replay rows, and its n_new_trees oldest trees are retired, so the cost
+    depends on the batch size, not the history. Returns (model_data, added
+    categories).
+
+    The parent's metrics describe the old trees, so they are not carried
+    over: evaluation_size of the merged rows is held out of training and
+    the metrics (and, for conformal models, the conformal quantile from
+    half of those rows) are measured again on it. With evaluation_size=0
+    the model has no metrics.
+    """
+    mode = model_data.get('uncertainty', 'ensemble')
+    if mode == 'distilled':
+        raise ValueError("Distilled models have no forests to update; update the teacher and distill again")
+    if mode == 'conformal' and not evaluation_size:
+        raise ValueError("Conformal models need held-out rows to recalibrate their quantile")
+
+    feature_encoder, added = encoder_for_model(model_data).extend(batch)
+    training = pd.concat([batch, replay], ignore_index=True) if replay is not None else batch
+    features = feature_encoder.transform(training).dropna()
+    X = model_data['scaler'].transform(features)
+    y = training.loc[features.index, 'salary_avg'].to_numpy(dtype=float)
+    if evaluation_size:
+        X, X_eval, y, y_eval = train_test_split(X, y, test_size=evaluation_size, random_state=seed)
+
+    lineage = lineage_for(model_data)
+    version = lineage['version'] + 1
+    forest_params = {**(model_data.get('forest_params') or FOREST_PARAMS), 'n_estimators': n_new_trees}
+
+    tree_arrays = model_data['tree_arrays']
+    forest_sizes = np.asarray(tree_arrays['forest_sizes'])
+    new_trees, order, tree_versions, new_sizes = [], [], [], []
+    bounds = np.concatenate([[0], np.cumsum(forest_sizes)])
+    n_old = bounds[-1]
+
+    for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+        forest = RandomForestRegressor(random_state=seed + 1000 * version + i, **forest_params).fit(X, y)
+        new_trees.extend(estimator.tree_ for estimator in forest.estimators_)
+
+        # Trees are kept in training order, so the oldest are at the front
+        retired = min(n_new_trees, stop - start)
+        order.extend(range(start + retired, stop))
+        order.extend(n_old + i * n_new_trees + np.arange(n_new_trees))
+        tree_versions.extend(lineage['tree_versions'][start + retired:stop] + [version] * n_new_trees)
+        new_sizes.append(stop - start - retired + n_new_trees)
+
+    new_arrays = flatten_trees(new_trees, [n_new_trees] * len(forest_sizes))
+    combined = concat_tree_arrays(tree_arrays, new_arrays)
+
+    stale = ['models', 'tree_arrays', 'prediction_cube', 'conformal_quantile', 'fit_time', 'predict_time'] + METRIC_NAMES
+    updated = {k: v for k, v in model_data.items() if k not in stale}
+    updated['feature_encoder'] = feature_encoder
+    updated['tree_arrays'] = subset_trees(combined, np.array(order), new_sizes)
+    updated['lineage'] = {
+        'version': version,
+        'tree_versions': tree_versions,
+        'updates': lineage['updates'] + [{
+            'version': version,
+            'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'batch_rows': len(batch),
+            'replay_rows': 0 if replay is None else len(replay),
+            'trees_replaced_per_forest': n_new_trees,
+            'evaluation_rows': len(y_eval) if evaluation_size else 0,
+            'added_categories': added
+        }]
+    }
+
+    if evaluation_size:
+        if mode == 'conformal':
+            X_cal, X_eval, y_cal, y_eval = train_test_split(X_eval, y_eval, test_size=0.5, random_state=seed)
+            updated['conformal_quantile'] = calibrate_conformal_quantile(X_cal, y_cal, updated)
+        updated.update(evaluation_metrics(y_eval, *predict_scaled_with_uncertainty(X_eval, updated)))
+    return updated, added
+
+def drift_report(old_model, new_model, holdout):
+    """Compare old and new predictions (and errors) on holdout postings"""
+    old = predict_batch_with_confidence(holdout, old_model)
+    new = predict_batch_with_confidence(holdout, new_model)
+    y = holdout['salary_avg'].to_numpy(dtype=float)
+
+    shift = new[:, 0] - old[:, 0]
+    report = {
+        'rows': len(holdout),
+        'mean_shift': float(shift.mean()),
+        'mean_abs_shift': float(np.abs(shift).mean()),
+        'max_abs_shift': float(np.abs(shift).max()),
+        'old_mae': float(np.mean(np.abs(y - old[:, 0]))),
+        'new_mae': float(np.mean(np.abs(y - new[:, 0]))),
+        'old_coverage': float(np.mean((y >= old[:, 2]) & (y <= old[:, 3])) * 100),
+        'new_coverage': float(np.mean((y >= new[:, 2]) & (y <= new[:, 3])) * 100),
+        'width_change': float(np.mean((new[:, 3] - new[:, 2]) - (old[:, 3] - old[:, 2])))
+    }
+
+    by_city = pd.DataFrame({'city_grouped': holdout['city_grouped'].astype(str).to_numpy(), 'shift': shift})
+    report['shift_by_city'] = by_city.groupby('city_grouped')['shift'].agg(['mean', 'count']).sort_values('mean').to_dict('index')
+    return report
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Update the served model with a batch of new postings")
+    parser.add_argument('batch_csv', help="cleaned postings with the training columns")
+    parser.add_argument('--model', default=MODEL_DIR, help="directory artifact to update")
+    parser.add_argument('--trees', type=int, default=10, help="trees replaced per forest")
+    parser.add_argument('--replay-ratio', type=float, default=1.0,
+                        help="historical rows sampled per batch row to train the new trees alongside the batch")
+    parser.add_argument('--holdout', type=float, default=0.2, help="share of the batch kept out of training for the drift report")
+    parser.add_argument('--promote', action='store_true', help="also replace the served artifact with the new version")
+    args = parser.parse_args()
+
+    print("🔄 INCREMENTAL MODEL UPDATE")
+    print("=" * 60)
+    start = time.perf_counter()
+
+    model_data, model_path = load_serving_model(dir_path=args.model)
+    batch = pd.read_csv(args.batch_csv, usecols=TRAINING_COLUMNS)
+    batch_train, holdout = train_test_split(batch, test_size=args.holdout, random_state=0) if args.holdout else (batch, None)
+
+    replay = None
+    if args.replay_ratio > 0:
+        history = load_salary_data(TRAINING_COLUMNS)
+        n_replay = min(len(history), int(len(batch_train) * args.replay_ratio))
+        replay = history.sample(n=n_replay, random_state=0)
+
+    updated, added = incremental_update(model_data, batch_train, n_new_trees=args.trees, replay=replay)
+    version = updated['lineage']['version']
+    out_path = versioned_path(args.model, version)
+    save_model_directory(updated, out_path)
+    if args.promote:
+        save_model_directory(updated, args.model)
+    update_time = time.perf_counter() - start
+
+    print(f"   Batch: {len(batch_train):,} training rows + {0 if replay is None else len(replay):,} replay rows")
+    for feature, values in added.items():
+        print(f"   New {feature}: {', '.join(values)}")
+    print(f"   Replaced {args.trees} trees per forest -> version {version} at {out_path}")
+    print(f"   Update time: {update_time:.1f}s")
+    if 'test_mae' in updated:
+        print(f"   Held-out metrics: MAE PKR {updated['test_mae']:,.0f} | R² {updated['test_r2']:.3f} | "
+              f"coverage {updated['coverage']:.1f}%")
+
+    if holdout is not None and len(holdout):
+        report = drift_report(model_data, updated, holdout)
+        print(f"\n📉 DRIFT REPORT ({report['rows']} holdout postings)")
+        print("=" * 60)
+        print(f"   Prediction shift: mean PKR {report['mean_shift']:+,.0f} | mean |Δ| PKR {report['mean_abs_shift']:,.0f} | "
+              f"max |Δ| PKR {report['max_abs_shift']:,.0f}")
+        print(f"   MAE: PKR {report['old_mae']:,.0f} -> {report['new_mae']:,.0f}")
+        print(f"   Coverage: {report['old_coverage']:.1f}% -> {report['new_coverage']:.1f}% "
+              f"(width {report['width_change']:+,.0f} PKR)")
+        for city, row in report['shift_by_city'].items():
+            print(f"   {city:<20} {row['mean']:+10,.0f} PKR ({row['count']:.0f} postings)")
+
+        with open(os.path.join(out_path, 'drift_report.json'), 'w') as f:
+            json.dump(report, f, indent=2)
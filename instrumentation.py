@@ -0,0 +1,149 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+
+# Instrumentation is off unless CAREERCOMPASS_METRICS is set, in which case
+# timed() wraps functions and span() records; otherwise both are pass-throughs
+ENABLED = os.environ.get('CAREERCOMPASS_METRICS', '') not in ('', '0')
+METRICS_FILE = os.environ.get('CAREERCOMPASS_METRICS_FILE', 'careercompass_metrics.jsonl')
+
+# Durations kept per metric for the rolling percentiles and histogram
+ROLLING_WINDOW = 1000
+
+# Histogram bucket upper edges in milliseconds (last bucket is open-ended)
+HISTOGRAM_EDGES_MS = [1, 5, 10, 50, 100, 500, 1000, 5000]
+
+# Minimum seconds between appends to the metrics file
+EXPORT_INTERVAL_S = 10.0
+
+_lock = threading.Lock()
+_durations = {}
+_counters = {}
+_local = threading.local()
+_last_export = 0.0
+
+_NULL_SPAN = contextlib.nullcontext()
+
+def record(name, seconds):
+    """Record one duration for a metric"""
+    ms = seconds * 1000
+    with _lock:
+        _durations.setdefault(name, deque(maxlen=ROLLING_WINDOW)).append(ms)
+        _counters[name] = _counters.get(name, 0) + 1
+    spans = getattr(_local, 'spans', None)
+    if spans is not None:
+        spans.append((name, ms))
+
+def increment(name, n=1):
+    """Bump a counter, e.g. cache hits versus live fallbacks"""
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+@contextlib.contextmanager
+def _span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        increment(f'{name}.errors')
+        raise
+    finally:
+        record(name, time.perf_counter() - start)
+
+def span(name):
+    """Context manager timing a block under name"""
+    return _span(name) if ENABLED else _NULL_SPAN
+
+def timed(name=None):
+    """
+    Decorator timing every call under name (default: the function name).
+    When instrumentation is disabled the function is returned unwrapped.
+    """
+    def decorate(func):
+        if not ENABLED:
+            return func
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def start_rerun():
+    """Begin collecting the spans of one script run on this thread"""
+    _local.spans = []
+
+def rerun_spans():
+    """(name, ms) pairs recorded on this thread since start_rerun()"""
+    return list(getattr(_local, 'spans', None) or [])
+
+def snapshot():
+    """Rolling latency summary and histogram per metric, plus counters"""
+    with _lock:
+        durations = {name: np.array(values) for name, values in _durations.items()}
+        counters = dict(_counters)
+
+    edges = [0] + HISTOGRAM_EDGES_MS + [np.inf]
+    timings = {}
+    for name, values in durations.items():
+        timings[name] = {
+            'count': counters.get(name, 0),
+            'window': len(values),
+            'mean_ms': float(values.mean()),
+            'p50_ms': float(np.percentile(values, 50)),
+            'p95_ms': float(np.percentile(values, 95)),
+            'p99_ms': float(np.percentile(values, 99)),
+            'max_ms': float(values.max()),
+            'histogram': np.histogram(values, bins=edges)[0].tolist()
+        }
+    return {'timings': timings, 'counters': counters, 'histogram_edges_ms': HISTOGRAM_EDGES_MS}
+
+def export_metrics(path=METRICS_FILE, force=False):
+    """Append a snapshot to the metrics file, at most once per EXPORT_INTERVAL_S"""
+    global _last_export
+    if not ENABLED:
+        return False
+    now = time.time()
+    if not force and now - _last_export < EXPORT_INTERVAL_S:
+        return False
+    _last_export = now
+
+    with open(path, 'a') as f:
+        f.write(json.dumps({'timestamp': now, **snapshot()}) + '\n')
+    return True
+
+def reset():
+    with _lock:
+        _durations.clear()
+        _counters.clear()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize the latest snapshot in a metrics file")
+    parser.add_argument('path', nargs='?', default=METRICS_FILE)
+    args = parser.parse_args()
+
+    with open(args.path) as f:
+        lines = f.readlines()
+    if not lines:
+        raise SystemExit(f"No snapshots in {args.path}")
+    latest = json.loads(lines[-1])
+
+    print(f"⏱️ HOT PATH TIMINGS ({time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(latest['timestamp']))})")
+    print("=" * 60)
+    for name, summary in sorted(latest['timings'].items(), key=lambda item: -item[1]['p95_ms']):
+        print(f"   {name:<36} n={summary['count']:<6} p50 {summary['p50_ms']:9.2f} ms | "
+              f"p95 {summary['p95_ms']:9.2f} ms | max {summary['max_ms']:9.2f} ms")
+    other_counters = {k: v for k, v in latest['counters'].items() if k not in latest['timings']}
+    for name, value in sorted(other_counters.items()):
+        print(f"   {name:<36} {value:,}")
@@ -0,0 +1,108 @@
+import json
+import os
+import pandas as pd
+from data_cache import DATA_PATH, cache_dir_for, data_version, load_salary_data
+from instrumentation import timed
+
+# Bump when the aggregate definitions change so stored results are recomputed
+AGGREGATES_VERSION = 1
+
+MARKET_COLUMNS = ['salary_avg', 'experience_years', 'city_grouped', 'Minimum Education', 'Career Level']
+
+# Trend tables stored as DataFrames
+TABLE_KEYS = ['experience_trend', 'education_comparison', 'city_comparison', 'career_progression']
+
+def summarize_market_groups(exp_salary, education_salary, city_salary, career_salary):
+    """Apply the dashboard's minimum-count thresholds and orderings to per-group mean/count tables"""
+    
+    # Salary by experience
+    exp_salary = exp_salary[exp_salary['count'] >= 5]  # Only show experience levels with enough data
+    
+    # Education impact (Bachelors vs Diploma)
+    education_impact = education_salary.set_index('Minimum Education')['mean']
+    education_premium = education_impact.get('Bachelors', 0) - education_impact.get('Diploma', 0) if 'Bachelors' in education_impact.index and 'Diploma' in education_impact.index else 0
+    
+    # Education level impact analysis
+    education_salary = education_salary[education_salary['count'] >= 10].sort_values('mean', ascending=False)
+    
+    # Salary by city (exclude neighborhoods like Johar Town, DHA) - Top 6 only
+    excluded_areas = ['Johar Town', 'DHA']
+    city_salary = city_salary[~city_salary['city_grouped'].isin(excluded_areas)]
+    city_salary = city_salary[city_salary['count'] >= 10].sort_values('mean', ascending=False).head(6)
+    
+    # Career level progression (include Department Head even with small count)
+    # Keep all career levels with at least 5 samples, or if it's Department Head
+    career_salary = career_salary[
+        (career_salary['count'] >= 5) | 
+        (career_salary['Career Level'] == 'Department Head')
+    ].sort_values('mean')
+    
+    return {
+        'experience_trend': exp_salary,
+        'education_comparison': education_salary,
+        'city_comparison': city_salary,
+        'education_premium': education_premium,
+        'career_progression': career_salary
+    }
+
+@timed()
+def analyze_market_trends(df):
+    """Analyze market trends from the dataset"""
+    
+    def salary_by(column):
+        return df.groupby(column, observed=True)['salary_avg'].agg(['mean', 'count']).reset_index()
+    
+    return summarize_market_groups(
+        salary_by('experience_years'),
+        salary_by('Minimum Education'),
+        salary_by('city_grouped'),
+        salary_by('Career Level')
+    )
+
+def compute_market_aggregates(df):
+    """Trend tables from analyze_market_trends plus the dashboard's headline metrics"""
+    aggregates = analyze_market_trends(df)
+    aggregates['avg_salary'] = df['salary_avg'].mean()
+    aggregates['exp_correlation'] = df['experience_years'].corr(df['salary_avg'])
+    return aggregates
+
+def aggregates_path_for(csv_path, version):
+    """Aggregate file for one dataset version, kept in the data cache directory"""
+    return os.path.join(cache_dir_for(csv_path), f'market_aggregates-v{AGGREGATES_VERSION}-{version[:16]}.json')
+
+def save_market_aggregates(aggregates, path):
+    payload = {
+        key: (value.to_dict('list') if key in TABLE_KEYS else float(value))
+        for key, value in aggregates.items()
+    }
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+def load_market_aggregates_file(path):
+    with open(path) as f:
+        payload = json.load(f)
+    return {
+        key: (pd.DataFrame(value) if key in TABLE_KEYS else value)
+        for key, value in payload.items()
+    }
+
+def aggregates_version(csv_path=DATA_PATH):
+    """Aggregates layout version plus dataset content hash, for caches of get_market_aggregates"""
+    return f"v{AGGREGATES_VERSION}-{data_version(csv_path)}"
+
+def get_market_aggregates(csv_path=DATA_PATH):
+    """
+    Market aggregates for the current dataset, computed once per content hash
+    and read back from disk afterwards
+    """
+    version = data_version(csv_path)
+    path = aggregates_path_for(csv_path, version)
+
+    if os.path.exists(path):
+        return load_market_aggregates_file(path)
+
+    aggregates = compute_market_aggregates(load_salary_data(MARKET_COLUMNS, csv_path))
+    save_market_aggregates(aggregates, path)
+    return load_market_aggregates_file(path)
@@ -0,0 +1,137 @@
+import os
+import numpy as np
+import pandas as pd
+from data_cache import DATA_PATH, cache_dir_for, data_version, load_salary_data
+from market_aggregates import summarize_market_groups
+from instrumentation import timed
+
+# Bump when the cube layout changes so stored cubes are rebuilt
+MARKET_CUBE_VERSION = 1
+
+# Cube dimensions: the four dashboard filters plus experience for the trend chart
+FILTER_DIMENSIONS = ['Functional Area', 'city_grouped', 'Minimum Education', 'Career Level']
+CUBE_DIMENSIONS = ['experience_years'] + FILTER_DIMENSIONS
+
+def build_market_cube(df):
+    """
+    Aggregate salaries into sparse cells over all cube dimensions.
+
+    Each populated cell stores count, sum and sum of squares of salary_avg,
+    so any filter combination is answered by summing cells, never rows.
+    """
+    codes, vocabularies = [], {}
+    for dim in CUBE_DIMENSIONS:
+        values = df[dim]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            vocabularies[dim] = np.asarray(values.cat.categories, dtype=str)
+            codes.append(values.cat.codes.to_numpy())
+        else:
+            vocab, inverse = np.unique(values.dropna().to_numpy(), return_inverse=True)
+            dim_codes = np.full(len(values), -1)
+            dim_codes[values.notna().to_numpy()] = inverse
+            vocabularies[dim] = vocab
+            codes.append(dim_codes)
+
+    cell_keys, cell_index = np.unique(np.column_stack(codes), axis=0, return_inverse=True)
+    cell_index = cell_index.ravel()
+    salary = df['salary_avg'].to_numpy(dtype=float)
+
+    cube = {
+        'codes': {dim: cell_keys[:, i].astype(np.int16) for i, dim in enumerate(CUBE_DIMENSIONS)},
+        'vocabularies': vocabularies,
+        'count': np.bincount(cell_index, minlength=len(cell_keys)),
+        'sum': np.bincount(cell_index, weights=salary, minlength=len(cell_keys)),
+        'sumsq': np.bincount(cell_index, weights=salary ** 2, minlength=len(cell_keys))
+    }
+    return cube
+
+def cube_path_for(csv_path, version):
+    """Market cube file for one dataset version, kept in the data cache directory"""
+    return os.path.join(cache_dir_for(csv_path), f'market_cube-v{MARKET_CUBE_VERSION}-{version[:16]}.npz')
+
+def save_market_cube(cube, path):
+    arrays = {'count': cube['count'], 'sum': cube['sum'], 'sumsq': cube['sumsq']}
+    for i, dim in enumerate(CUBE_DIMENSIONS):
+        arrays[f'codes_{i}'] = cube['codes'][dim]
+        arrays[f'vocab_{i}'] = cube['vocabularies'][dim]
+
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+def load_market_cube_file(path):
+    with np.load(path) as stored:
+        return {
+            'codes': {dim: stored[f'codes_{i}'] for i, dim in enumerate(CUBE_DIMENSIONS)},
+            'vocabularies': {dim: stored[f'vocab_{i}'] for i, dim in enumerate(CUBE_DIMENSIONS)},
+            'count': stored['count'],
+            'sum': stored['sum'],
+            'sumsq': stored['sumsq']
+        }
+
+def get_market_cube(csv_path=DATA_PATH):
+    """Market cube for the current dataset, built once per content hash"""
+    path = cube_path_for(csv_path, data_version(csv_path))
+
+    if not os.path.exists(path):
+        df = load_salary_data(['salary_avg'] + CUBE_DIMENSIONS, csv_path)
+        save_market_cube(build_market_cube(df), path)
+    return load_market_cube_file(path)
+
+def _salary_by(cube, mask, dim):
+    """Per-value mean/count table over the selected cells, like groupby().agg(['mean', 'count'])"""
+    codes = cube['codes'][dim][mask]
+    valid = codes >= 0
+    n_values = len(cube['vocabularies'][dim])
+
+    counts = np.bincount(codes[valid], weights=cube['count'][mask][valid], minlength=n_values)
+    sums = np.bincount(codes[valid], weights=cube['sum'][mask][valid], minlength=n_values)
+    present = counts > 0
+
+    return pd.DataFrame({
+        dim: cube['vocabularies'][dim][present],
+        'mean': sums[present] / counts[present],
+        'count': counts[present].astype(np.int64)
+    })
+
+@timed()
+def query_market_cube(cube, filters=None):
+    """
+    Market trends for any combination of filters, e.g.
+    {'city_grouped': ['Lahore'], 'Career Level': ['Entry Level']}.
+
+    Returns the same structure as compute_market_aggregates, with the same
+    minimum-count thresholds, computed from the matching cells only.
+    """
+    mask = np.ones(len(cube['count']), dtype=bool)
+    for dim, selected in (filters or {}).items():
+        if selected:
+            selected_codes = np.flatnonzero(np.isin(cube['vocabularies'][dim], selected))
+            mask &= np.isin(cube['codes'][dim], selected_codes)
+
+    trends = summarize_market_groups(
+        _salary_by(cube, mask, 'experience_years'),
+        _salary_by(cube, mask, 'Minimum Education'),
+        _salary_by(cube, mask, 'city_grouped'),
+        _salary_by(cube, mask, 'Career Level')
+    )
+
+    # Headline metrics from cell moments
+    n = cube['count'][mask].sum()
+    total = cube['sum'][mask].sum()
+    trends['avg_salary'] = total / n if n else float('nan')
+    trends['n_postings'] = int(n)
+
+    exp_codes = cube['codes']['experience_years'][mask]
+    valid = exp_codes >= 0
+    x = cube['vocabularies']['experience_years'][exp_codes[valid]]
+    counts = cube['count'][mask][valid]
+    sums = cube['sum'][mask][valid]
+    n_xy = counts.sum()
+    sum_x, sum_y = (counts * x).sum(), sums.sum()
+    cov = n_xy * (x * sums).sum() - sum_x * sum_y
+    var_x = n_xy * (counts * x ** 2).sum() - sum_x ** 2
+    var_y = n_xy * cube['sumsq'][mask][valid].sum() - sum_y ** 2
+    trends['exp_correlation'] = cov / np.sqrt(var_x * var_y) if var_x > 0 and var_y > 0 else float('nan')
+
+    return trends
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from confidence_model import export_tree_arrays
+from feature_encoder import FeatureEncoder, encoder_for_model
+
+ARTIFACT_FORMAT_VERSION = 2
+
+MODEL_DIR = 'salary_prediction_confidence_model'
+MODEL_PKL = 'salary_prediction_confidence_model.pkl'
+
+# Node arrays written as one uncompressed .npy file each
+TREE_ARRAY_NAMES = ['feature', 'threshold', 'left', 'right', 'value', 'roots', 'forest_sizes']
+
+METRIC_NAMES = ['test_mae', 'test_r2', 'coverage', 'interval_width']
+
+class ManifestScaler:
+    """
+    The transform of a fitted RobustScaler rebuilt from the manifest, so
+    loading a directory artifact never imports sklearn
+    """
+
+    def __init__(self, center, scale, feature_names):
+        self.center_ = np.array(center, dtype=float)
+        self.scale_ = np.array(scale, dtype=float)
+        self.n_features_in_ = len(feature_names)
+        self.feature_names_in_ = np.array(feature_names, dtype=object)
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got shape {X.shape}")
+        X -= self.center_
+        X /= self.scale_
+        return X
+
+def save_model_directory(model_data, path):
+    """
+    Write model_data as a directory of .npy tree arrays plus a JSON manifest.
+
+    The directory is assembled next to the target and renamed into place,
+    so readers see either the previous artifact or the complete new one.
+    """
+    tree_arrays = model_data.get('tree_arrays') or export_tree_arrays(model_data)
+    scaler = model_data['scaler']
+    feature_encoder = encoder_for_model(model_data)
+
+    tmp_path = path.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    checksums = {}
+    for name in TREE_ARRAY_NAMES:
+        array_path = os.path.join(tmp_path, f'{name}.npy')
+        np.save(array_path, np.ascontiguousarray(tree_arrays[name]))
+        with open(array_path, 'rb') as f:
+            checksums[name] = hashlib.sha256(f.read()).hexdigest()
+
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'feature_names': list(model_data['feature_names']),
+        'encoders': feature_encoder.vocabularies,
+        'unknown_categories': {'policy': feature_encoder.unknown, 'fallbacks': feature_encoder.fallbacks},
+        'scaler': {'center': scaler.center_.tolist(), 'scale': scaler.scale_.tolist()},
+        'max_depth': int(tree_arrays['max_depth']),
+        'uncertainty': {
+            'mode': model_data.get('uncertainty', 'ensemble'),
+            'conformal_quantile': model_data.get('conformal_quantile')
+        },
+        'metrics': {name: float(model_data[name]) for name in METRIC_NAMES if name in model_data},
+        'forest_params': model_data.get('forest_params'),
+        'lineage': model_data.get('lineage'),
+        'checksums': checksums
+    }
+    with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    old_path = path.rstrip(os.sep) + '.old'
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+def verify_model_directory(path):
+    """Raise ValueError when a tree array no longer matches its manifest checksum"""
+    with open(os.path.join(path, 'manifest.json')) as f:
+        checksums = json.load(f)['checksums']
+
+    for name in TREE_ARRAY_NAMES:
+        digest = hashlib.sha256()
+        with open(os.path.join(path, f'{name}.npy'), 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        if digest.hexdigest() != checksums[name]:
+            raise ValueError(f"Checksum mismatch for {name}.npy in {path}")
+
+def load_model_directory(path, mmap_mode='r'):
+    """
+    Open a directory artifact as model_data.
+
+    Tree arrays are memory-mapped read-only, so loading does no parsing and
+    the pages are shared by every process serving the same files. The
+    result carries tree_arrays instead of sklearn forests.
+    """
+    with open(os.path.join(path, 'manifest.json')) as f:
+        manifest = json.load(f)
+
+    if manifest['format_version'] > ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact format {manifest['format_version']}")
+
+    tree_arrays = {
+        name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+        for name in TREE_ARRAY_NAMES
+    }
+    tree_arrays['max_depth'] = manifest['max_depth']
+
+    unknown = manifest.get('unknown_categories', {})
+    feature_encoder = FeatureEncoder(manifest['encoders'], unknown=unknown.get('policy', 'fallback'), fallbacks=unknown.get('fallbacks'))
+
+    feature_names = manifest['feature_names']
+    scaler = ManifestScaler(manifest['scaler']['center'], manifest['scaler']['scale'], feature_names)
+
+    model_data = {
+        'tree_arrays': tree_arrays,
+        'scaler': scaler,
+        'feature_encoder': feature_encoder,
+        'feature_names': feature_names,
+        **manifest['metrics']
+    }
+
+    for key in ['forest_params', 'lineage']:
+        if manifest.get(key) is not None:
+            model_data[key] = manifest[key]
+
+    # Format 1 artifacts were always bagged ensembles
+    uncertainty = manifest.get('uncertainty', {'mode': 'ensemble'})
+    model_data['uncertainty'] = uncertainty['mode']
+    if uncertainty.get('conformal_quantile') is not None:
+        model_data['conformal_quantile'] = uncertainty['conformal_quantile']
+    return model_data
+
+def load_serving_model(dir_path=MODEL_DIR, pkl_path=MODEL_PKL):
+    """
+    Load the model for inference, preferring the memory-mapped directory
+    artifact over the pickle. Returns (model_data, model_path).
+    """
+    if os.path.isdir(dir_path):
+        return load_model_directory(dir_path), dir_path
+
+    import joblib
+
+    model_data = joblib.load(pkl_path)
+
+    # Older artifacts predate the flattened trees used for fast inference
+    if 'tree_arrays' not in model_data:
+        model_data['tree_arrays'] = export_tree_arrays(model_data)
+    return model_data, pkl_path
+
+def convert_pickle_artifact(pkl_path, out_path):
+    """Convert a joblib .pkl model into the directory format"""
+    import joblib
+
+    save_model_directory(joblib.load(pkl_path), out_path)
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Convert a pickled confidence model into the memory-mappable directory format")
+    parser.add_argument('pkl_path', nargs='?', default=MODEL_PKL)
+    parser.add_argument('out_path', nargs='?', default=MODEL_DIR)
+    args = parser.parse_args()
+
+    print("📦 CONVERTING MODEL ARTIFACT")
+    print("=" * 60)
+
+    convert_pickle_artifact(args.pkl_path, args.out_path)
+    dir_size = sum(os.path.getsize(os.path.join(args.out_path, f)) for f in os.listdir(args.out_path))
+    print(f"   {args.pkl_path}: {os.path.getsize(args.pkl_path) / 1e6:,.1f} MB")
+    print(f"   {args.out_path}/: {dir_size / 1e6:,.1f} MB")
+
+    start = time.perf_counter()
+    joblib.load(args.pkl_path)
+    pkl_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    load_model_directory(args.out_path)
+    dir_time = time.perf_counter() - start
+
+    print(f"   Load time: pickle {pkl_time * 1000:,.1f} ms | directory {dir_time * 1000:,.1f} ms")
@@ -0,0 +1,238 @@
+import json
+import os
+import re
+import threading
+import time
+import numpy as np
+import pandas as pd
+from confidence_model import predict_batch_with_confidence
+from model_artifact import TREE_ARRAY_NAMES, load_model_directory, load_serving_model, save_model_directory, verify_model_directory
+
+REGISTRY_DIR = 'model_registry'
+
+# Registry layout: versions/vNNNN artifact directories, a CURRENT file naming
+# the served version and an append-only history of pointer changes
+VERSIONS_DIR = 'versions'
+CURRENT_FILE = 'CURRENT'
+HISTORY_FILE = 'history.jsonl'
+
+VERSION_PATTERN = re.compile(r'^v(\d{4,})$')
+
+# Seconds between checks of the CURRENT pointer by a running server
+POLL_INTERVAL = 5.0
+
+WARMUP_PROFILE = {'experience_years': 2, 'Career Level': 'Entry Level', 'Minimum Education': 'Bachelors',
+                  'city_grouped': 'Lahore', 'Functional Area': 'General'}
+
+def version_path(version, registry_dir=REGISTRY_DIR):
+    return os.path.join(registry_dir, VERSIONS_DIR, version)
+
+def list_versions(registry_dir=REGISTRY_DIR):
+    """Published versions, oldest first (partially written directories are skipped)"""
+    versions_dir = os.path.join(registry_dir, VERSIONS_DIR)
+    if not os.path.isdir(versions_dir):
+        return []
+    versions = [name for name in os.listdir(versions_dir)
+                if VERSION_PATTERN.match(name) and os.path.exists(os.path.join(versions_dir, name, 'manifest.json'))]
+    return sorted(versions, key=lambda name: int(VERSION_PATTERN.match(name).group(1)))
+
+def current_version(registry_dir=REGISTRY_DIR):
+    """Version the CURRENT pointer names, or None when nothing was promoted"""
+    try:
+        with open(os.path.join(registry_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def read_history(registry_dir=REGISTRY_DIR):
+    try:
+        with open(os.path.join(registry_dir, HISTORY_FILE)) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+def _record(registry_dir, action, version, **details):
+    entry = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'action': action, 'version': version, **details}
+    with open(os.path.join(registry_dir, HISTORY_FILE), 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+
+def set_current(version, registry_dir=REGISTRY_DIR, action='promote'):
+    """
+    Point CURRENT at a published version after verifying its checksums.
+
+    The pointer is replaced atomically, so a reader sees either the old or
+    the new version name, never a partial write.
+    """
+    if version not in list_versions(registry_dir):
+        raise ValueError(f"Unknown model version {version!r}")
+    verify_model_directory(version_path(version, registry_dir))
+
+    previous = current_version(registry_dir)
+    tmp_path = os.path.join(registry_dir, CURRENT_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write(version + '\n')
+    os.replace(tmp_path, os.path.join(registry_dir, CURRENT_FILE))
+    _record(registry_dir, action, version, previous=previous)
+
+def publish_model(model_data, registry_dir=REGISTRY_DIR, promote=True, note=None):
+    """
+    Write model_data as the next registry version and, by default, make it
+    current. Published versions are never modified. Returns the version.
+    """
+    versions = list_versions(registry_dir)
+    number = int(VERSION_PATTERN.match(versions[-1]).group(1)) + 1 if versions else 1
+    version = f'v{number:04d}'
+
+    os.makedirs(os.path.join(registry_dir, VERSIONS_DIR), exist_ok=True)
+    save_model_directory(model_data, version_path(version, registry_dir))
+    _record(registry_dir, 'publish', version, note=note)
+    if promote:
+        set_current(version, registry_dir)
+    return version
+
+def rollback(registry_dir=REGISTRY_DIR):
+    """Point CURRENT at the newest version older than the current one; returns it"""
+    versions = list_versions(registry_dir)
+    current = current_version(registry_dir)
+    older = versions[:versions.index(current)] if current in versions else []
+    if not older:
+        raise ValueError(f"No version older than {current} to roll back to")
+    set_current(older[-1], registry_dir, action='rollback')
+    return older[-1]
+
+def warm_model(model_data):
+    """
+    Page in a freshly loaded model and check it predicts: every tree array
+    is read once and a sample profile is scored. Raises ValueError when the
+    prediction is not finite.
+    """
+    for name in TREE_ARRAY_NAMES:
+        np.asarray(model_data['tree_arrays'][name]).sum()
+    result = predict_batch_with_confidence(pd.DataFrame([WARMUP_PROFILE]), model_data)
+    if not np.isfinite(result).all():
+        raise ValueError(f"Warm-up prediction is not finite: {result[0].tolist()}")
+
+class ModelServer:
+    """
+    Serves the registry's current model and hot-swaps new versions.
+
+    current() checks the CURRENT pointer at most every poll_interval seconds.
+    When it names a new version, that version is verified, loaded, passed
+    to prepare(model_data, model_path) and warmed on a background thread
+    while the old one keeps serving; the swap is a single reference
+    assignment, so callers holding the old model_data finish on it. A
+    version that fails to load is reported in last_error and not retried
+    until the pointer changes. Without a registry the default artifact is
+    served (load_serving_model).
+    """
+
+    def __init__(self, prepare=None, registry_dir=REGISTRY_DIR, poll_interval=POLL_INTERVAL):
+        self.prepare = prepare
+        self.registry_dir = registry_dir
+        self.poll_interval = poll_interval
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._loader = None
+        self._failed_version = None
+        self._checked_at = time.monotonic()
+
+        version = current_version(registry_dir)
+        self._active = (version, self._load(version))
+
+    @property
+    def version(self):
+        return self._active[0]
+
+    def _load(self, version):
+        if version is None:
+            model_data, model_path = load_serving_model()
+        else:
+            model_path = version_path(version, self.registry_dir)
+            verify_model_directory(model_path)
+            model_data = load_model_directory(model_path)
+        model_data['registry_version'] = version
+        if self.prepare is not None:
+            self.prepare(model_data, model_path)
+        warm_model(model_data)
+        return model_data
+
+    def _swap_in(self, version):
+        try:
+            model_data = self._load(version)
+        except Exception as e:
+            with self._lock:
+                self.last_error = f"Model {version} failed to load: {e}"
+                self._failed_version = version
+            return
+        with self._lock:
+            self._active = (version, model_data)
+            self.last_error = None
+            self._failed_version = None
+
+    def check(self):
+        """Start loading the pointer's version in the background if it is new; returns True when a load started"""
+        version = current_version(self.registry_dir)
+        with self._lock:
+            if version is None or version in (self._active[0], self._failed_version):
+                return False
+            if self._loader is not None and self._loader.is_alive():
+                return False
+            self._loader = threading.Thread(target=self._swap_in, args=(version,), name=f'model-load-{version}', daemon=True)
+            self._loader.start()
+            return True
+
+    def current(self):
+        """The model_data to serve this request with"""
+        now = time.monotonic()
+        if now - self._checked_at >= self.poll_interval:
+            self._checked_at = now
+            self.check()
+        return self._active[1]
+
+    def wait(self, timeout=None):
+        """Block until a background load (if any) has finished"""
+        loader = self._loader
+        if loader is not None:
+            loader.join(timeout)
+
+if __name__ == "__main__":
+    import argparse
+    from model_artifact import MODEL_DIR, MODEL_PKL
+
+    parser = argparse.ArgumentParser(description="Publish, list, promote and roll back model versions")
+    parser.add_argument('--registry', default=REGISTRY_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    publish = commands.add_parser('publish', help="copy a model artifact into the registry as a new version")
+    publish.add_argument('--model-dir', default=MODEL_DIR)
+    publish.add_argument('--model-pkl', default=MODEL_PKL)
+    publish.add_argument('--note', default=None)
+    publish.add_argument('--no-promote', action='store_true', help="publish without making it current")
+    commands.add_parser('list', help="show versions and the pointer history")
+    promote = commands.add_parser('promote', help="make a published version current")
+    promote.add_argument('version')
+    commands.add_parser('rollback', help="make the previous version current")
+    args = parser.parse_args()
+
+    print("🗂️ MODEL REGISTRY")
+    print("=" * 60)
+
+    if args.command == 'publish':
+        model_data, model_path = load_serving_model(args.model_dir, args.model_pkl)
+        version = publish_model(model_data, args.registry, promote=not args.no_promote, note=args.note)
+        print(f"   Published {model_path} as {version}" + ("" if args.no_promote else " (current)"))
+    elif args.command == 'promote':
+        set_current(args.version, args.registry)
+        print(f"   {args.version} is now current")
+    elif args.command == 'rollback':
+        print(f"   Rolled back to {rollback(args.registry)}")
+    else:
+        current = current_version(args.registry)
+        for version in list_versions(args.registry):
+            with open(os.path.join(version_path(version, args.registry), 'manifest.json')) as f:
+                metrics = json.load(f)['metrics']
+            marker = '*' if version == current else ' '
+            print(f" {marker} {version}  MAE PKR {metrics.get('test_mae', float('nan')):,.0f} | R² {metrics.get('test_r2', float('nan')):.3f}")
+        print("\n📜 HISTORY")
+        print("=" * 60)
+        for entry in read_history(args.registry)[-10:]:
+            print(f"   {entry['time']}  {entry['action']:<8} {entry['version']}" + (f"  ({entry['note']})" if entry.get('note') else ""))
@@ -0,0 +1,214 @@
+import os
+import numpy as np
+import pandas as pd
+from data_cache import DATA_PATH, data_version, load_salary_data
+from feature_encoder import EDUCATION_DEFAULT, EDUCATION_LEVELS, FEATURE_NAMES, encoder_for_model
+from prediction_cube import model_file_hash
+
+# Bump when the index layout changes so stored indexes are rebuilt
+NEIGHBOR_INDEX_VERSION = 1
+
+# Numeric model features the distance is measured on, in the model's scaled space
+NEIGHBOR_FEATURES = ['experience_years', 'experience_squared', 'education_numeric']
+
+# Exact-match partitions from most to least specific; a query uses the most
+# specific partition that holds at least k postings
+PARTITION_LEVELS = [
+    ['Functional Area', 'city_grouped', 'Career Level'],
+    ['Functional Area', 'city_grouped'],
+    ['Functional Area'],
+    []
+]
+
+POSTING_COLUMNS = ['Title', 'salary_min', 'salary_max', 'city', 'experience_years', 'Minimum Education']
+
+# Smaller partitions are searched by brute force, which beats a tree query's overhead
+BRUTE_FORCE_SIZE = 64
+
+DEFAULT_K = 5
+
+def neighbors_path_for(model_path):
+    """Neighbour index file stored next to the model artifact"""
+    return os.path.splitext(model_path.rstrip(os.sep))[0] + '.neighbors.npz'
+
+def neighbor_index_hash(model_path, csv_path=DATA_PATH):
+    """Ties a stored index to the model file, the dataset and the index layout"""
+    return f"n{NEIGHBOR_INDEX_VERSION}-{model_file_hash(model_path)}-{data_version(csv_path)[:16]}"
+
+def _partition_keys(df, dims):
+    keys = pd.Series('', index=df.index)
+    for dim in dims:
+        keys = keys + '|' + df[dim].astype(str)
+    return keys.to_numpy(dtype=str)
+
+def build_neighbor_index(model_data, df):
+    """
+    Postings in the model's scaled feature space, grouped into exact-match
+    partitions for every level of PARTITION_LEVELS.
+
+    Each level stores its partition keys, the postings' row ids ordered by
+    partition and the partition offsets into them.
+    """
+    df = df[df['salary_avg'].notna() & df['experience_years'].notna()].reset_index(drop=True)
+    features = encoder_for_model(model_data).transform(df)
+    scaled = model_data['scaler'].transform(features)
+    columns = [FEATURE_NAMES.index(name) for name in NEIGHBOR_FEATURES]
+
+    index = {
+        'points': np.ascontiguousarray(scaled[:, columns]),
+        'postings': {column: df[column].to_numpy(dtype=float if column in ('salary_min', 'salary_max', 'experience_years') else str)
+                     for column in POSTING_COLUMNS},
+        'levels': []
+    }
+    for dims in PARTITION_LEVELS:
+        keys, inverse = np.unique(_partition_keys(df, dims), return_inverse=True)
+        rows = np.argsort(inverse, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(inverse, minlength=len(keys)))])
+        index['levels'].append({'keys': keys, 'rows': rows.astype(np.int32), 'offsets': offsets.astype(np.int64)})
+    return _with_search_structures(index)
+
+def _with_search_structures(index):
+    """Key -> partition lookups (rebuilt on load, not stored); KD-trees are built on first use"""
+    for level in index['levels']:
+        level['partitions'] = {key: i for i, key in enumerate(level['keys'].tolist())}
+        level['trees'] = {}
+    return index
+
+def _partition_tree(index, level, partition):
+    """KD-tree over one large partition, built the first time it is queried so loading never imports sklearn"""
+    if partition not in level['trees']:
+        from sklearn.neighbors import KDTree
+
+        start, stop = level['offsets'][partition], level['offsets'][partition + 1]
+        level['trees'][partition] = KDTree(index['points'][level['rows'][start:stop]])
+    return level['trees'][partition]
+
+def save_neighbor_index(index, path, model_hash):
+    """Write the index atomically so readers never see a partial file"""
+    arrays = {'model_hash': model_hash, 'points': index['points']}
+    for column, values in index['postings'].items():
+        arrays[f'posting_{POSTING_COLUMNS.index(column)}'] = values
+    for i, level in enumerate(index['levels']):
+        for name in ['keys', 'rows', 'offsets']:
+            arrays[f'level_{i}_{name}'] = level[name]
+
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+def load_neighbor_index(model_data, model_path, csv_path=DATA_PATH):
+    """
+    Load the neighbour index for a model, rebuilding it when the model or
+    the dataset has changed since it was written
+    """
+    path = neighbors_path_for(model_path)
+    model_hash = neighbor_index_hash(model_path, csv_path)
+
+    if os.path.exists(path):
+        with np.load(path) as stored:
+            if str(stored['model_hash']) == model_hash:
+                index = {
+                    'points': stored['points'],
+                    'postings': {column: stored[f'posting_{i}'] for i, column in enumerate(POSTING_COLUMNS)},
+                    'levels': [{name: stored[f'level_{i}_{name}'] for name in ['keys', 'rows', 'offsets']}
+                               for i in range(len(PARTITION_LEVELS))]
+                }
+                return _with_search_structures(index)
+
+    columns = ['salary_avg', 'Career Level', 'Functional Area', 'city_grouped'] + POSTING_COLUMNS
+    index = build_neighbor_index(model_data, load_salary_data(columns, csv_path))
+    save_neighbor_index(index, path, model_hash)
+    return index
+
+def scaled_profile(job_data, model_data):
+    """
+    NEIGHBOR_FEATURES of one profile in the model's scaled space, computed
+    directly from the scaler's center and scale instead of encoding a frame
+    """
+    scaler = model_data['scaler']
+    experience = float(job_data['experience_years'])
+    values = {
+        'experience_years': experience,
+        'experience_squared': experience ** 2,
+        'education_numeric': float(EDUCATION_LEVELS.get(job_data['Minimum Education'], EDUCATION_DEFAULT))
+    }
+    columns = [FEATURE_NAMES.index(name) for name in NEIGHBOR_FEATURES]
+    point = np.array([values[name] for name in NEIGHBOR_FEATURES])
+    if scaler.center_ is not None:
+        point = point - scaler.center_[columns]
+    if scaler.scale_ is not None:
+        point = point / scaler.scale_[columns]
+    return point
+
+def comparable_postings(index, job_data, model_data, k=DEFAULT_K):
+    """
+    The k postings closest to a profile, as (records, matched dimensions).
+
+    Candidates come from the most specific exact-match partition holding at
+    least k postings; within it the search uses the partition's KD-tree, or
+    brute force for small partitions. Records are plain dicts; building a
+    DataFrame would cost more than the search itself.
+    """
+    point = scaled_profile(job_data, model_data)
+    for dims, level in zip(PARTITION_LEVELS, index['levels']):
+        partition = level['partitions'].get(''.join('|' + str(job_data[dim]) for dim in dims))
+        if partition is not None and level['offsets'][partition + 1] - level['offsets'][partition] >= min(k, len(index['points'])):
+            break
+
+    start, stop = level['offsets'][partition], level['offsets'][partition + 1]
+    rows = level['rows'][start:stop]
+    n = min(k, len(rows))
+    if len(rows) > BRUTE_FORCE_SIZE:
+        distances, nearest = _partition_tree(index, level, partition).query(point[None, :], k=n)
+        distances, nearest = distances[0], nearest[0]
+    else:
+        squared = ((index['points'][rows] - point) ** 2).sum(axis=1)
+        nearest = np.argsort(squared, kind='stable')[:n]
+        distances = np.sqrt(squared[nearest])
+
+    columns = {column: values[rows[nearest]].tolist() for column, values in index['postings'].items()}
+    columns['distance'] = distances.tolist()
+    return [dict(zip(columns, values)) for values in zip(*columns.values())], dims
+
+if __name__ == "__main__":
+    import time
+    from model_artifact import load_serving_model
+
+    print("📍 NEIGHBOUR INDEX BENCHMARK")
+    print("=" * 60)
+
+    model_data, model_path = load_serving_model()
+    start = time.perf_counter()
+    columns = ['salary_avg', 'Career Level', 'Functional Area', 'city_grouped'] + POSTING_COLUMNS
+    df = load_salary_data(columns)
+    index = build_neighbor_index(model_data, df)
+    save_neighbor_index(index, neighbors_path_for(model_path), neighbor_index_hash(model_path))
+    print(f"   Built index over {len(index['points']):,} postings in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    profile = {'experience_years': 3, 'Career Level': 'Experienced Professional', 'Minimum Education': 'Bachelors',
+               'city_grouped': 'Lahore', 'Functional Area': 'Sales & Business Development'}
+
+    repeats = 500
+    start = time.perf_counter()
+    for _ in range(repeats):
+        postings, dims = comparable_postings(index, profile, model_data)
+    print(f"   Index query: {(time.perf_counter() - start) / repeats * 1e6:.0f} µs")
+
+    def full_scan():
+        encoded = model_data['scaler'].transform(encoder_for_model(model_data).transform(df))
+        columns = [FEATURE_NAMES.index(name) for name in NEIGHBOR_FEATURES]
+        match = np.ones(len(df), dtype=bool)
+        for dim in dims:
+            match &= (df[dim] == profile[dim]).to_numpy()
+        distances = ((encoded[:, columns] - scaled_profile(profile, model_data)) ** 2).sum(axis=1)
+        return df[match].assign(distance=distances[match]).sort_values('distance').head(DEFAULT_K)
+
+    start = time.perf_counter()
+    for _ in range(20):
+        full_scan()
+    print(f"   Full DataFrame scan: {(time.perf_counter() - start) / 20 * 1e6:.0f} µs")
+
+    print(f"\n🔎 COMPARABLE POSTINGS (matched on {', '.join(dims) or 'nothing'})")
+    print("=" * 60)
+    for row in postings:
+        print(f"   {row['Title'][:40]:<40} PKR {row['salary_min']:>9,.0f} - {row['salary_max']:>9,.0f} | {row['city']} | {row['experience_years']:.0f} yrs")
@@ -0,0 +1,186 @@
+import os
+import numpy as np
+import pandas as pd
+from data_cache import file_sha256
+from confidence_model import career_level_for_experience, predict_batch_with_confidence
+from feature_encoder import encoder_for_model
+
+# Experience values offered by the estimator slider
+EXPERIENCE_VALUES = np.arange(16)
+
+# Bump when feature encoding or cube layout changes so stored cubes are rebuilt
+PREDICTION_CUBE_VERSION = 2
+
+# Columns of the stored prediction array
+CUBE_COLUMNS = ['prediction', 'uncertainty', 'lower_bound', 'upper_bound']
+
+def cube_path_for(model_path):
+    """Prediction cube file stored next to the model artifact"""
+    return os.path.splitext(model_path.rstrip(os.sep))[0] + '.cube.npz'
+
+def model_file_hash(model_path):
+    """Hash of a .pkl model, or of the manifest of a directory artifact, tagged with the cube version"""
+    if os.path.isdir(model_path):
+        return f"v{PREDICTION_CUBE_VERSION}-{file_sha256(os.path.join(model_path, 'manifest.json'))}"
+    return f"v{PREDICTION_CUBE_VERSION}-{file_sha256(model_path)}"
+
+# Profile column behind each cube axis
+AXIS_COLUMNS = {
+    'experience': 'experience_years',
+    'education': 'Minimum Education',
+    'city': 'city_grouped',
+    'area': 'Functional Area'
+}
+
+def grid_axes(model_data):
+    """Experience years and the model's full education, city and functional area vocabularies"""
+    vocabularies = encoder_for_model(model_data).vocabularies
+    return {
+        'experience': EXPERIENCE_VALUES,
+        'education': np.asarray(vocabularies['Minimum Education'], dtype=str),
+        'city': np.asarray(vocabularies['city_grouped'], dtype=str),
+        'area': np.asarray(vocabularies['Functional Area'], dtype=str)
+    }
+
+def grid_profiles(model_data):
+    """
+    Every profile of the discrete input space, as (axes, profiles).
+
+    Career level follows from experience. Profiles are in C order over the
+    axes.
+    """
+    axes = grid_axes(model_data)
+    experience, education, city, area = np.meshgrid(*axes.values(), indexing='ij')
+    profiles = pd.DataFrame({
+        'experience_years': experience.ravel(),
+        'Career Level': [career_level_for_experience(e) for e in experience.ravel()],
+        'Minimum Education': education.ravel(),
+        'city_grouped': city.ravel(),
+        'Functional Area': area.ravel()
+    })
+    return axes, profiles
+
+def build_prediction_cube(model_data):
+    """Score every profile of the discrete input space in one batch"""
+    axes, profiles = grid_profiles(model_data)
+    results = predict_batch_with_confidence(profiles, model_data)
+    shape = tuple(len(values) for values in axes.values()) + (len(CUBE_COLUMNS),)
+
+    return {'values': results.astype(np.float32).reshape(shape), **axes}
+
+def save_prediction_cube(cube, path, model_hash):
+    """Write the cube atomically so readers never see a partial file"""
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, model_hash=model_hash, **{k: cube[k] for k in ['values', 'experience', 'education', 'city', 'area']})
+    os.replace(tmp_path, path)
+
+def load_prediction_cube(model_data, model_path):
+    """
+    Load the prediction cube for a model, rebuilding it when the model
+    file has changed since the cube was written
+    """
+    path = cube_path_for(model_path)
+    model_hash = model_file_hash(model_path)
+
+    cube = None
+    if os.path.exists(path):
+        with np.load(path) as stored:
+            if str(stored['model_hash']) == model_hash:
+                cube = {k: stored[k] for k in ['values', 'experience', 'education', 'city', 'area']}
+
+    if cube is None:
+        cube = build_prediction_cube(model_data)
+        save_prediction_cube(cube, path, model_hash)
+
+    # Value -> position maps for O(1) lookups
+    cube['index'] = {
+        axis: {value.item(): i for i, value in enumerate(cube[axis])}
+        for axis in ['experience', 'education', 'city', 'area']
+    }
+    return cube
+
+def lookup_prediction(cube, job_data):
+    """
+    Return the stored [prediction, uncertainty, lower, upper] row for a
+    profile, or None when it lies outside the precomputed grid
+    """
+    index = cube['index']
+    experience = job_data['experience_years']
+
+    if experience != int(experience) or job_data['Career Level'] != career_level_for_experience(experience):
+        return None
+
+    try:
+        position = (
+            index['experience'][int(experience)],
+            index['education'][job_data['Minimum Education']],
+            index['city'][job_data['city_grouped']],
+            index['area'][job_data['Functional Area']]
+        )
+    except KeyError:
+        return None
+
+    return cube['values'][position]
+
+def lookup_predictions(cube, profiles):
+    """
+    Vectorized lookup_prediction for a DataFrame of profiles, as (values,
+    found); rows outside the grid are NaN and False in found
+    """
+    experience = profiles['experience_years'].to_numpy(dtype=float)
+    positions = [pd.Index(cube[axis].tolist()).get_indexer(profiles[column].to_numpy(dtype=object))
+                 for axis, column in AXIS_COLUMNS.items()]
+
+    levels = {e: career_level_for_experience(e) for e in np.unique(experience)}
+    expected_level = np.array([levels[e] for e in experience], dtype=object)
+    found = (experience == np.round(experience)) & (profiles['Career Level'].to_numpy(dtype=object) == expected_level)
+    for position in positions:
+        found &= position >= 0
+
+    values = np.full((len(profiles), len(CUBE_COLUMNS)), np.nan)
+    values[found] = cube['values'][tuple(position[found] for position in positions)]
+    return values, found
+
+def predict_batch_with_cube(profiles, cube, model_data):
+    """
+    Same contract as predict_batch_with_confidence, answering grid profiles
+    from the cube and scoring the rest with live inference. DataFrames are
+    looked up in one vectorized pass, lists of dicts one profile at a time.
+    """
+    if isinstance(profiles, pd.DataFrame):
+        results, found = lookup_predictions(cube, profiles)
+        if not found.all():
+            results[~found] = predict_batch_with_confidence(profiles[~found], model_data)
+        return results
+
+    results = np.empty((len(profiles), len(CUBE_COLUMNS)))
+    missing = []
+    for i, job_data in enumerate(profiles):
+        row = lookup_prediction(cube, job_data)
+        if row is None:
+            missing.append(i)
+        else:
+            results[i] = row
+
+    if missing:
+        results[missing] = predict_batch_with_confidence([profiles[i] for i in missing], model_data)
+
+    return results
+
+if __name__ == "__main__":
+    import joblib
+    import time
+
+    model_path = 'salary_prediction_confidence_model.pkl'
+
+    print("🧊 BUILDING PREDICTION CUBE")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    model_data = joblib.load(model_path)
+    cube = build_prediction_cube(model_data)
+    save_prediction_cube(cube, cube_path_for(model_path), model_file_hash(model_path))
+
+    print(f"   Grid shape: {cube['values'].shape[:-1]} ({cube['values'][..., 0].size:,} profiles)")
+    print(f"   File size: {os.path.getsize(cube_path_for(model_path)) / 1024:,.0f} KB")
+    print(f"   Build time: {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,342 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+import numpy as np
+from confidence_model import career_level_for_experience, confidence_level, predict_batch_with_confidence
+from model_artifact import load_serving_model
+from prediction_cube import load_prediction_cube, predict_batch_with_cube
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+class ScoringError(Exception):
+    """A micro-batch could not be scored for reasons other than the request's input"""
+
+def result_dict(row):
+    mean_pred, std_pred, lower_bound, upper_bound = (float(v) for v in row)
+    return {
+        'prediction': mean_pred,
+        'lower_bound': lower_bound,
+        'upper_bound': upper_bound,
+        'uncertainty': std_pred,
+        'confidence': confidence_level(std_pred)
+    }
+
+def normalize_profile(profile):
+    """Fill in the career level the way the estimator derives it"""
+    if 'Career Level' not in profile:
+        profile = {**profile, 'Career Level': career_level_for_experience(profile['experience_years'])}
+    return profile
+
+class MicroBatcher:
+    """
+    Coalesces requests that arrive within a short window into one batched
+    ensemble evaluation, run off the event loop on a worker thread.
+    """
+
+    def __init__(self, model_data, cube=None, window_ms=2.0, max_batch_rows=1024, stats_window=10000):
+        self.model_data = model_data
+        self.cube = cube
+        self.window = window_ms / 1000
+        self.max_batch_rows = max_batch_rows
+        self.queue = asyncio.Queue()
+        self.batch_sizes = deque(maxlen=stats_window)
+        self.latencies = deque(maxlen=stats_window)
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def submit(self, profiles):
+        """Queue profiles and wait for their (N, 4) result rows"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((profiles, future, time.perf_counter()))
+        return await future
+
+    def _score(self, profiles):
+        if self.cube is not None:
+            return predict_batch_with_cube(profiles, self.cube, self.model_data)
+        return predict_batch_with_confidence(profiles, self.model_data)
+
+    def _score_batch(self, pending):
+        """Score all pending requests together; isolate failures per request"""
+        profiles = [profile for request_profiles, _, _ in pending for profile in request_profiles]
+        try:
+            results = self._score(profiles)
+        except Exception:
+            outcomes = []
+            for request_profiles, _, _ in pending:
+                try:
+                    outcomes.append(self._score(request_profiles))
+                except Exception as e:
+                    outcomes.append(e)
+            return outcomes
+
+        outcomes, start = [], 0
+        for request_profiles, _, _ in pending:
+            outcomes.append(results[start:start + len(request_profiles)])
+            start += len(request_profiles)
+        return outcomes
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            n_rows = len(pending[0][0])
+            deadline = loop.time() + self.window
+
+            # Keep collecting until the window closes or the batch is full
+            while n_rows < self.max_batch_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                n_rows += len(item[0])
+
+            try:
+                outcomes = await loop.run_in_executor(None, self._score_batch, pending)
+            except Exception as e:
+                # Keep serving: every request of the batch gets the error instead of hanging
+                logger.exception("Scoring a batch of %d requests failed", len(pending))
+                outcomes = [ScoringError(str(e))] * len(pending)
+
+            now = time.perf_counter()
+            self.batches += 1
+            self.batch_sizes.append(n_rows)
+            for (request_profiles, future, submitted), outcome in zip(pending, outcomes):
+                self.requests += 1
+                self.rows += len(request_profiles)
+                self.latencies.append(now - submitted)
+                if future.cancelled():
+                    continue
+                if isinstance(outcome, Exception):
+                    self.errors += 1
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+
+    def stats(self):
+        latencies_ms = np.array(self.latencies) * 1000
+        batch_sizes = np.array(self.batch_sizes)
+        return {
+            'queue_depth': self.queue.qsize(),
+            'requests': self.requests,
+            'rows': self.rows,
+            'batches': self.batches,
+            'errors': self.errors,
+            'batch_size': {
+                'mean': float(batch_sizes.mean()) if len(batch_sizes) else 0.0,
+                'max': int(batch_sizes.max()) if len(batch_sizes) else 0
+            },
+            'latency_ms': {
+                f'p{p}': float(np.percentile(latencies_ms, p)) if len(latencies_ms) else 0.0
+                for p in (50, 90, 99)
+            }
+        }
+
+async def read_request(reader):
+    """Parse one HTTP/1.1 request; returns None when the client closed the connection"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, version = request_line.decode('latin-1').split()
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY_BYTES:
+        raise ValueError("Request body too large")
+    body = await reader.readexactly(length) if length else b''
+    keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+    return method, path, body, keep_alive
+
+def write_response(writer, status, payload, keep_alive):
+    body = json.dumps(payload).encode()
+    reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}[status]
+    writer.write(
+        f"HTTP/1.1 {status} {reason}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body
+    )
+
+async def handle_request(batcher, method, path, body):
+    """Route a request; returns (status, payload)"""
+    if path == '/stats':
+        return 200, batcher.stats()
+
+    if path not in ('/predict', '/predict/batch'):
+        return 404, {'error': f"Unknown endpoint {path}"}
+    if method != 'POST':
+        return 405, {'error': "Use POST"}
+
+    try:
+        payload = json.loads(body or b'null')
+        if path == '/predict':
+            profiles = [normalize_profile(payload)]
+        else:
+            profiles = [normalize_profile(p) for p in (payload['profiles'] if isinstance(payload, dict) else payload)]
+        results = await batcher.submit(profiles)
+    except KeyError as e:
+        return 400, {'error': f"Missing field {e}"}
+    except (ValueError, TypeError) as e:
+        return 400, {'error': str(e)}
+    except ScoringError as e:
+        return 500, {'error': f"Scoring failed: {e}"}
+    except Exception as e:
+        logger.exception("Scoring request to %s failed", path)
+        return 500, {'error': f"Scoring failed: {type(e).__name__}"}
+
+    if path == '/predict':
+        return 200, result_dict(results[0])
+    return 200, {'results': [result_dict(row) for row in results]}
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, window_ms=2.0, max_batch_rows=1024, use_cube=True):
+    """Start the prediction server; returns (server, batcher)"""
+    model_data, model_path = load_serving_model()
+    cube = load_prediction_cube(model_data, model_path) if use_cube else None
+
+    batcher = MicroBatcher(model_data, cube, window_ms=window_ms, max_batch_rows=max_batch_rows)
+    batcher.start()
+
+    async def handle_connection(reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except (ValueError, asyncio.IncompleteReadError) as e:
+                    write_response(writer, 400, {'error': str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                status, payload = await handle_request(batcher, method, path, body)
+                write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle_connection, host, port)
+    return server, batcher
+
+async def run_load(host, port, clients, requests_per_client, profile):
+    """Drive the server with concurrent keep-alive clients; returns requests/sec and latencies"""
+    body = json.dumps(profile).encode()
+    request = (
+        f"POST /predict HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode() + body
+    latencies = []
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    return clients * requests_per_client / elapsed, np.array(latencies) * 1000
+
+async def load_generator(host, port, client_counts, total_requests, self_hosted, window_ms, use_cube):
+    server = None
+    if self_hosted:
+        server, _ = await serve(host, port, window_ms=window_ms, use_cube=use_cube)
+
+    profile = {'experience_years': 4, 'Minimum Education': 'Bachelors',
+               'city_grouped': 'Karachi', 'Functional Area': 'Software & Web Development'}
+
+    print("🚦 PREDICTION SERVICE LOAD TEST")
+    print("=" * 60)
+    for clients in client_counts:
+        # Fresh stats for each concurrency level
+        stats_before = await fetch_stats(host, port)
+        throughput, latencies = await run_load(host, port, clients, max(1, total_requests // clients), profile)
+        stats_after = await fetch_stats(host, port)
+        batches = stats_after['batches'] - stats_before['batches']
+        rows = stats_after['rows'] - stats_before['rows']
+        print(f"   {clients:>4} clients: {throughput:8,.0f} req/s | "
+              f"p50 {np.percentile(latencies, 50):6.2f} ms | p99 {np.percentile(latencies, 99):6.2f} ms | "
+              f"avg batch {rows / max(batches, 1):6.1f} rows")
+
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+async def fetch_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /stats HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return json.loads(response.split(b'\r\n\r\n', 1)[1])
+
+async def serve_forever(host, port, window_ms, max_batch_rows, use_cube):
+    server, _ = await serve(host, port, window_ms=window_ms, max_batch_rows=max_batch_rows, use_cube=use_cube)
+    print(f"🚀 Serving predictions on http://{host}:{port} (POST /predict, POST /predict/batch, GET /stats)")
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local HTTP salary prediction service with request micro-batching")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="run the prediction server")
+    loadgen_parser = subparsers.add_parser('loadgen', help="measure throughput at several concurrency levels")
+    for sub in (serve_parser, loadgen_parser):
+        sub.add_argument('--host', default=DEFAULT_HOST)
+        sub.add_argument('--port', type=int, default=DEFAULT_PORT)
+        sub.add_argument('--window-ms', type=float, default=2.0, help="how long to wait for more requests before scoring a batch")
+        sub.add_argument('--no-cube', action='store_true', help="always run the ensemble instead of reading the prediction cube")
+    serve_parser.add_argument('--max-batch', type=int, default=1024, help="maximum rows scored in one batch")
+    loadgen_parser.add_argument('--clients', type=int, nargs='+', default=[1, 10, 100])
+    loadgen_parser.add_argument('--requests', type=int, default=2000, help="requests per concurrency level")
+    loadgen_parser.add_argument('--self-hosted', action='store_true', help="start the server in this process")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        asyncio.run(serve_forever(args.host, args.port, args.window_ms, args.max_batch, not args.no_cube))
+    else:
+        asyncio.run(load_generator(args.host, args.port, args.clients, args.requests, args.self_hosted, args.window_ms, not args.no_cube))
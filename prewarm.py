@@ -0,0 +1,152 @@
+import compileall
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_PATH = 'app.py'
+
+RENDER_MARKER = '--- first render ---'
+
+# Imports shown individually in the startup report; the rest are summed
+REPORT_TOP_IMPORTS = 8
+
+def _quiet_app():
+    """Import the app without a Streamlit runtime, silencing its bare-mode warnings"""
+    from streamlit.logger import set_log_level
+    set_log_level('error')
+    import app
+    return app
+
+def prewarm():
+    """
+    Build every derived file the app reads on a cold start, so the first
+    session after a deploy finds them on disk instead of building them.
+
+    Covers compiled bytecode, the served model with its prediction cube and
+    neighbour index, the dataset cache, market aggregates, the market cube,
+    salary sketches and the skills index. Figures cannot outlive a process,
+    so the market charts are drawn once from the cached aggregates to check
+    they render. Returns {step: seconds}.
+    """
+    timings = {}
+
+    def step(name, func):
+        start = time.perf_counter()
+        result = func()
+        timings[name] = time.perf_counter() - start
+        return result
+
+    step('bytecode', lambda: compileall.compile_dir(os.path.dirname(os.path.abspath(__file__)), maxlevels=0, quiet=1))
+    app = step('app import', _quiet_app)
+
+    server, df = step('model + dataset', app.load_confidence_model)
+    if server is None or df is None:
+        raise RuntimeError("The app could not load its model or dataset")
+
+    trends = step('market aggregates', lambda: app.load_market_aggregates(app.aggregates_version()))
+    step('market cube', app.load_market_cube)
+    step('salary sketches', lambda: app.load_salary_sketches(app.sketches_version()))
+    step('skills index', app.load_skills_index)
+    step('figures', lambda: app.create_market_intelligence_charts(trends))
+    return timings
+
+def _first_render(app_path):
+    """Child process: run the app's first script run and print its timings as JSON"""
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    harness = time.perf_counter() - start
+
+    # Imports logged after this marker are the app's own
+    print(RENDER_MARKER, file=sys.stderr, flush=True)
+    start = time.perf_counter()
+    run = AppTest.from_file(app_path, default_timeout=600).run()
+    first_render = time.perf_counter() - start
+
+    import instrumentation
+    stages = {name: summary['mean_ms'] * summary['window'] / 1000 for name, summary in instrumentation.snapshot()['timings'].items()}
+    print(json.dumps({
+        'harness': harness,
+        'first_render': first_render,
+        'stages': stages,
+        'exceptions': [str(e.value) for e in run.exception]
+    }))
+
+def _import_times(importtime_log):
+    """Seconds the app spent importing each top-level package, from python -X importtime output"""
+    totals = {}
+    app_imports = importtime_log.split(RENDER_MARKER, 1)[-1]
+    for line in app_imports.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Nested imports are indented under the module that triggered them
+        if not name.startswith('  '):
+            package = name.strip().split('.')[0]
+            totals[package] = totals.get(package, 0) + int(cumulative) / 1e6
+    return totals
+
+def startup_report(app_path=APP_PATH):
+    """
+    Time a cold first render of the app in a fresh interpreter.
+
+    Returns the first script run's total time, the time it spent importing
+    each package (python -X importtime), the instrumented load stages, and
+    the time to import Streamlit's test harness beforehand.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = {**os.environ, 'CAREERCOMPASS_METRICS': '1', 'CAREERCOMPASS_METRICS_FILE': os.path.join(tmp_dir, 'metrics.jsonl')}
+        child = subprocess.run(
+            [sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--first-render', app_path],
+            capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(app_path))
+        )
+    if child.returncode != 0:
+        raise RuntimeError(f"First render failed:\n{child.stderr[-2000:]}")
+
+    report = json.loads(child.stdout.strip().splitlines()[-1])
+    imports = _import_times(child.stderr)
+    report['imports'] = dict(sorted(imports.items(), key=lambda item: -item[1]))
+    return report
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the app's derived caches at deploy time and report cold-start time")
+    parser.add_argument('--report', action='store_true', help="measure a cold first render after prewarming")
+    parser.add_argument('--report-only', action='store_true', help="measure a cold first render without prewarming")
+    parser.add_argument('--first-render', default=None, metavar='APP', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.first_render:
+        _first_render(args.first_render)
+        sys.exit(0)
+
+    if not args.report_only:
+        print("🔥 PREWARMING DERIVED CACHES")
+        print("=" * 60)
+        for name, seconds in prewarm().items():
+            print(f"   {name:<24} {seconds * 1000:9.1f} ms")
+
+    if args.report or args.report_only:
+        report = startup_report()
+        print(f"\n🚀 STARTUP REPORT ({APP_PATH}, cold interpreter)")
+        print("=" * 60)
+        print(f"   Time to first render     {report['first_render'] * 1000:9.1f} ms")
+        print(f"   Streamlit + harness      {report['harness'] * 1000:9.1f} ms (before the run, not included)")
+
+        print("\n   Imports")
+        imports = list(report['imports'].items())
+        for module, seconds in imports[:REPORT_TOP_IMPORTS]:
+            print(f"     {module:<30} {seconds * 1000:9.1f} ms")
+        if len(imports) > REPORT_TOP_IMPORTS:
+            print(f"     {'other':<30} {sum(s for _, s in imports[REPORT_TOP_IMPORTS:]) * 1000:9.1f} ms")
+
+        print("\n   Load stages (nested stages overlap)")
+        for name, seconds in sorted(report['stages'].items(), key=lambda item: -item[1]):
+            print(f"     {name:<30} {seconds * 1000:9.1f} ms")
+
+        if report['exceptions']:
+            print(f"\n⚠️ First render raised: {report['exceptions']}")
+            sys.exit(1)
@@ -0,0 +1,269 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from data_cache import DATA_PATH, cache_dir_for, data_version, file_sha256, load_salary_data
+
+# Bump when the sketch layout changes so stored sketches are rebuilt
+SKETCHES_VERSION = 1
+
+SEGMENT_DIMENSIONS = ['city_grouped', 'Functional Area', 'Minimum Education', 'Career Level']
+
+PERCENTILES = [10, 25, 50, 75, 90]
+
+class KLLSketch:
+    """
+    Mergeable streaming quantile sketch (KLL).
+
+    Values are kept in levels of compactors; an item at level h stands for
+    2**h original values. When a level overflows it is sorted and every other
+    item is promoted, so memory stays O(k log(n/k)) while rank error stays
+    around 1/k.
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+
+                # An odd item out stays behind so weights are preserved
+                leftover, items = (items[:1], items[1:]) if len(items) % 2 else (items[:0], items)
+                promoted = items[self._rng.integers(2)::2]
+
+                self.levels[level] = leftover
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        """Add a batch of values in one pass"""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.n += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items_), 2 ** level) for level, items_ in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs):
+        """Approximate values at quantiles qs (0-1)"""
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        items, cumulative = self._weighted_items()
+        targets = np.asarray(qs) * cumulative[-1]
+        positions = np.searchsorted(cumulative, targets, side='left')
+        return items[np.minimum(positions, len(items) - 1)]
+
+    def rank(self, value):
+        """Approximate fraction of values <= value"""
+        if self.n == 0:
+            return np.nan
+        items, cumulative = self._weighted_items()
+        position = np.searchsorted(items, value, side='right')
+        return cumulative[position - 1] / cumulative[-1] if position else 0.0
+
+    def to_dict(self):
+        return {'k': self.k, 'n': self.n, 'levels': [items.tolist() for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, payload):
+        sketch = cls(k=payload['k'])
+        sketch.n = payload['n']
+        sketch.levels = [np.asarray(items, dtype=float) for items in payload['levels']]
+        return sketch
+
+def build_segment_sketches(df, sketches=None):
+    """
+    Add every posting's salary_avg to the overall sketch and to one sketch per
+    value of each segment dimension. Pass existing sketches to fold in a batch.
+    """
+    sketches = sketches if sketches is not None else {'overall': KLLSketch(), 'segments': {}}
+    salary = df['salary_avg'].to_numpy(dtype=float)
+    sketches['overall'].update(salary)
+
+    for dim in SEGMENT_DIMENSIONS:
+        segments = sketches['segments'].setdefault(dim, {})
+        codes, values = pd.factorize(df[dim])
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+        for i, value in enumerate(values):
+            rows = order[bounds[i]:bounds[i + 1]]
+            segments.setdefault(str(value), KLLSketch()).update(salary[rows])
+
+    return sketches
+
+def merge_segment_sketches(sketches, other):
+    """Merge two segment sketch stores, e.g. from separately processed batches"""
+    sketches['overall'].merge(other['overall'])
+    for dim, segments in other['segments'].items():
+        for value, sketch in segments.items():
+            sketches['segments'].setdefault(dim, {}).setdefault(value, KLLSketch()).merge(sketch)
+    return sketches
+
+def save_segment_sketches(sketches, path):
+    payload = {
+        'overall': sketches['overall'].to_dict(),
+        'segments': {
+            dim: {value: sketch.to_dict() for value, sketch in segments.items()}
+            for dim, segments in sketches['segments'].items()
+        }
+    }
+    if 'batches' in sketches:
+        payload['batches'] = sketches['batches']
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+def load_segment_sketches(path):
+    with open(path) as f:
+        payload = json.load(f)
+    sketches = {
+        'overall': KLLSketch.from_dict(payload['overall']),
+        'segments': {
+            dim: {value: KLLSketch.from_dict(sketch) for value, sketch in segments.items()}
+            for dim, segments in payload['segments'].items()
+        }
+    }
+    if 'batches' in payload:
+        sketches['batches'] = payload['batches']
+    return sketches
+
+def sketches_path_for(csv_path, version):
+    """Sketch file for one dataset version, kept in the data cache directory"""
+    return os.path.join(cache_dir_for(csv_path), f'salary_sketches-v{SKETCHES_VERSION}-{version[:16]}.json')
+
+def ingested_path_for(csv_path):
+    """
+    Sketches of batches ingested on top of the dataset. Stored next to the
+    CSV rather than in its cache directory, so they survive a rebuild when
+    the CSV changes.
+    """
+    return os.path.splitext(csv_path)[0] + '.ingested_sketches.json'
+
+def ingest_batch(batch_path, csv_path=DATA_PATH):
+    """
+    Fold a CSV of cleaned postings into the ingested store and record it.
+    Returns the number of postings; a batch already ingested (same content
+    hash) raises ValueError.
+    """
+    store = ingested_path_for(csv_path)
+    sketches = load_segment_sketches(store) if os.path.exists(store) else {'overall': KLLSketch(), 'segments': {}}
+    batches = sketches.setdefault('batches', [])
+    batch_hash = file_sha256(batch_path)
+    if any(entry['sha256'] == batch_hash for entry in batches):
+        raise ValueError(f"{batch_path} was already ingested")
+
+    batch = pd.read_csv(batch_path, usecols=['salary_avg'] + SEGMENT_DIMENSIONS)
+    build_segment_sketches(batch, sketches)
+    batches.append({'file': os.path.abspath(batch_path), 'sha256': batch_hash, 'rows': len(batch)})
+    save_segment_sketches(sketches, store)
+    return len(batch)
+
+def sketches_version(csv_path=DATA_PATH):
+    """Dataset content hash plus the ingested store's state, for caches of get_segment_sketches"""
+    store = ingested_path_for(csv_path)
+    ingested = os.stat(store).st_mtime_ns if os.path.exists(store) else 0
+    return f"{data_version(csv_path)}-{ingested}"
+
+def get_segment_sketches(csv_path=DATA_PATH):
+    """
+    Segment sketches for the current dataset, built once per content hash,
+    with the ingested batches merged in at query time
+    """
+    path = sketches_path_for(csv_path, data_version(csv_path))
+
+    if os.path.exists(path):
+        sketches = load_segment_sketches(path)
+    else:
+        sketches = build_segment_sketches(load_salary_data(['salary_avg'] + SEGMENT_DIMENSIONS, csv_path))
+        save_segment_sketches(sketches, path)
+
+    store = ingested_path_for(csv_path)
+    if os.path.exists(store):
+        ingested = load_segment_sketches(store)
+        merge_segment_sketches(sketches, ingested)
+        sketches['batches'] = ingested.get('batches', [])
+    return sketches
+
+def percentile_table(sketches, dim, min_count=10):
+    """p10-p90 salary per value of a segment dimension"""
+    rows = []
+    for value, sketch in sketches['segments'][dim].items():
+        if sketch.n >= min_count:
+            rows.append({dim: value, 'count': sketch.n,
+                         **{f'p{p}': q for p, q in zip(PERCENTILES, sketch.quantiles(np.array(PERCENTILES) / 100))}})
+    return pd.DataFrame(rows).sort_values('p50', ascending=False) if rows else pd.DataFrame()
+
+def market_position(sketches, salary, job_data=None):
+    """
+    Percentile of a salary within the overall market and, when a profile is
+    given, within each of its segments
+    """
+    position = {'Overall market': sketches['overall'].rank(salary) * 100}
+    for dim in SEGMENT_DIMENSIONS:
+        if job_data is not None and dim in job_data:
+            sketch = sketches['segments'].get(dim, {}).get(job_data[dim])
+            if sketch is not None and sketch.n > 0:
+                position[job_data[dim]] = sketch.rank(salary) * 100
+    return position
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Build or extend the salary percentile sketches")
+    parser.add_argument('--ingest', metavar='CSV', help="merge a new batch of cleaned postings into the ingested store")
+    parser.add_argument('--clear-ingested', action='store_true',
+                        help="drop the ingested store, e.g. once its batches are part of the cleaned CSV")
+    args = parser.parse_args()
+
+    store = ingested_path_for(DATA_PATH)
+    if args.clear_ingested and os.path.exists(store):
+        os.remove(store)
+        print(f"🗑️ Removed {store}")
+
+    if args.ingest:
+        try:
+            print(f"📥 Merged {ingest_batch(args.ingest):,} postings into {store}")
+        except ValueError as e:
+            print(f"⚠️ {e}")
+            sys.exit(1)
+
+    sketches = get_segment_sketches()
+
+    print("📈 SALARY PERCENTILES (overall)")
+    print("=" * 60)
+    for p, q in zip(PERCENTILES, sketches['overall'].quantiles(np.array(PERCENTILES) / 100)):
+        print(f"   p{p}: PKR {q:,.0f}")
+    print(f"   Postings: {sketches['overall'].n:,}")
+    for entry in sketches.get('batches', []):
+        print(f"   Ingested {entry['rows']:,} from {entry['file']}")
@@ -0,0 +1,208 @@
+import os
+import numpy as np
+import pandas as pd
+from data_cache import DATA_PATH, cache_dir_for, data_version, load_salary_data
+from market_cube import FILTER_DIMENSIONS
+from instrumentation import timed
+
+# Bump when the index layout changes so stored indexes are rebuilt
+SKILLS_INDEX_VERSION = 1
+
+def normalize_skill(skill):
+    """Vocabulary key for a skill: whitespace collapsed and lowercased"""
+    return ' '.join(skill.split()).lower()
+
+def build_skills_index(df):
+    """
+    Inverted index from normalized skills to the postings listing them.
+
+    Postings are stored CSR-style: the sorted row ids of skill i are
+    postings[indptr[i]:indptr[i + 1]]. Per-skill salary count, sum and sum
+    of squares are precomputed for unfiltered queries, and each row keeps
+    its salary and segment codes so filtered queries never touch the
+    Skills strings.
+    """
+    salary = df['salary_avg'].to_numpy(dtype=float)
+    skills = df['Skills'] if isinstance(df['Skills'].dtype, pd.CategoricalDtype) else df['Skills'].astype('category')
+    codes = np.where(np.isnan(salary), -1, skills.cat.codes.to_numpy())
+
+    # Each distinct Skills string is parsed once, not once per row
+    vocabulary, labels, category_skills = {}, [], []
+    for text in skills.cat.categories:
+        ids = set()
+        for skill in str(text).split(','):
+            key = normalize_skill(skill)
+            if key:
+                if key not in vocabulary:
+                    vocabulary[key] = len(vocabulary)
+                    labels.append(' '.join(skill.split()))
+                ids.add(vocabulary[key])
+        category_skills.append(sorted(ids))
+
+    category_lengths = np.array([len(ids) for ids in category_skills] + [0])
+    category_offsets = np.concatenate([[0], np.cumsum(category_lengths[:-1])])
+    category_flat = np.array([i for ids in category_skills for i in ids], dtype=np.int64)
+
+    # Expand to one (row, skill) pair per listed skill
+    row_lengths = category_lengths[codes]
+    rows = np.repeat(np.arange(len(df)), row_lengths)
+    within = np.arange(len(rows)) - np.repeat(np.cumsum(row_lengths) - row_lengths, row_lengths)
+    pair_skills = category_flat[np.repeat(category_offsets[codes], row_lengths) + within]
+
+    # Renumber skills alphabetically and sort pairs by (skill, row)
+    names = np.array(list(vocabulary), dtype=str)
+    alphabetical = np.argsort(names)
+    rank = np.empty(len(names), dtype=np.int64)
+    rank[alphabetical] = np.arange(len(names))
+    pair_skills = rank[pair_skills]
+    order = np.lexsort((rows, pair_skills))
+    postings, pair_skills = rows[order], pair_skills[order]
+
+    count = np.bincount(pair_skills, minlength=len(names))
+    posting_salary = salary[postings]
+    index = {
+        'names': names[alphabetical],
+        'labels': np.array(labels, dtype=str)[alphabetical],
+        'indptr': np.concatenate([[0], np.cumsum(count)]).astype(np.int64),
+        'postings': postings.astype(np.int32),
+        'count': count,
+        'sum': np.bincount(pair_skills, weights=posting_salary, minlength=len(names)),
+        'sumsq': np.bincount(pair_skills, weights=posting_salary ** 2, minlength=len(names)),
+        'salary': salary,
+        'codes': {},
+        'vocabularies': {}
+    }
+    for dim in FILTER_DIMENSIONS:
+        values = df[dim] if isinstance(df[dim].dtype, pd.CategoricalDtype) else df[dim].astype('category')
+        index['codes'][dim] = values.cat.codes.to_numpy().astype(np.int16)
+        index['vocabularies'][dim] = np.asarray(values.cat.categories, dtype=str)
+    return _with_derived_arrays(index)
+
+def _with_derived_arrays(index):
+    """Per-posting skill ids and salaries used by filtered queries (not stored)"""
+    index['posting_skills'] = np.repeat(np.arange(len(index['names'])), np.diff(index['indptr']))
+    index['posting_salary'] = index['salary'][index['postings']]
+    valid = ~np.isnan(index['salary'])
+    index['total_count'] = int(valid.sum())
+    index['total_sum'] = float(index['salary'][valid].sum())
+    return index
+
+def skills_index_path_for(csv_path, version):
+    """Skills index file for one dataset version, kept in the data cache directory"""
+    return os.path.join(cache_dir_for(csv_path), f'skills_index-v{SKILLS_INDEX_VERSION}-{version[:16]}.npz')
+
+def save_skills_index(index, path):
+    arrays = {name: index[name] for name in ['names', 'labels', 'indptr', 'postings', 'count', 'sum', 'sumsq', 'salary']}
+    for i, dim in enumerate(FILTER_DIMENSIONS):
+        arrays[f'codes_{i}'] = index['codes'][dim]
+        arrays[f'vocab_{i}'] = index['vocabularies'][dim]
+
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+def load_skills_index_file(path):
+    with np.load(path) as stored:
+        index = {name: stored[name] for name in ['names', 'labels', 'indptr', 'postings', 'count', 'sum', 'sumsq', 'salary']}
+        index['codes'] = {dim: stored[f'codes_{i}'] for i, dim in enumerate(FILTER_DIMENSIONS)}
+        index['vocabularies'] = {dim: stored[f'vocab_{i}'] for i, dim in enumerate(FILTER_DIMENSIONS)}
+    return _with_derived_arrays(index)
+
+def get_skills_index(csv_path=DATA_PATH):
+    """Skills index for the current dataset, built once per content hash"""
+    path = skills_index_path_for(csv_path, data_version(csv_path))
+
+    if not os.path.exists(path):
+        df = load_salary_data(['salary_avg', 'Skills'] + FILTER_DIMENSIONS, csv_path)
+        save_skills_index(build_skills_index(df), path)
+    return load_skills_index_file(path)
+
+def segment_mask(index, filters=None):
+    """Boolean row mask for filters like {'city_grouped': ['Lahore']}, or None when unfiltered"""
+    mask = None
+    for dim, selected in (filters or {}).items():
+        if selected:
+            selected_codes = np.flatnonzero(np.isin(index['vocabularies'][dim], selected))
+            dim_mask = np.isin(index['codes'][dim], selected_codes)
+            mask = dim_mask if mask is None else mask & dim_mask
+    if mask is not None:
+        mask &= ~np.isnan(index['salary'])
+    return mask
+
+def postings_for(index, skill):
+    """Sorted row ids of the postings listing a skill (empty when unknown)"""
+    position = np.searchsorted(index['names'], normalize_skill(skill))
+    if position == len(index['names']) or index['names'][position] != normalize_skill(skill):
+        return np.empty(0, dtype=np.int32)
+    return index['postings'][index['indptr'][position]:index['indptr'][position + 1]]
+
+@timed()
+def skill_premiums(index, filters=None, min_count=5, top=None):
+    """
+    Salary premium of every skill within a segment: mean salary of the
+    segment's postings listing the skill minus the mean of those that don't.
+
+    Unfiltered queries read the precomputed per-skill sums; filtered ones
+    intersect every posting list with the segment mask in one vectorized
+    pass. Skills listed by fewer than min_count segment postings are left out;
+    top keeps only the largest premiums.
+    """
+    mask = segment_mask(index, filters)
+    n_skills = len(index['names'])
+    if mask is None:
+        counts, sums = index['count'], index['sum']
+        total_count, total_sum = index['total_count'], index['total_sum']
+    else:
+        in_segment = mask[index['postings']]
+        counts = np.bincount(index['posting_skills'], weights=in_segment, minlength=n_skills)
+        sums = np.bincount(index['posting_skills'], weights=np.where(in_segment, index['posting_salary'], 0), minlength=n_skills)
+        total_count, total_sum = int(mask.sum()), float(index['salary'][mask].sum())
+
+    keep = np.flatnonzero((counts >= max(min_count, 1)) & (counts < total_count))
+    with_mean = sums[keep] / counts[keep]
+    premium = with_mean - (total_sum - sums[keep]) / (total_count - counts[keep])
+
+    # Sort the arrays, not a frame, and only build rows that are returned
+    order = np.argsort(-premium, kind='stable')[:top]
+    return pd.DataFrame({
+        'skill': index['labels'][keep[order]],
+        'postings': counts[keep[order]].astype(np.int64),
+        'mean_salary': with_mean[order],
+        'premium': premium[order]
+    })
+
+if __name__ == "__main__":
+    import time
+
+    print("🧠 SKILLS INDEX BENCHMARK")
+    print("=" * 60)
+
+    df = load_salary_data(['salary_avg', 'Skills'] + FILTER_DIMENSIONS)
+    start = time.perf_counter()
+    index = build_skills_index(df)
+    print(f"   Built index: {len(index['names']):,} skills, {len(index['postings']):,} postings "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def measure(label, query, repeats=200):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            result = query()
+        print(f"   {label:<40} {(time.perf_counter() - start) / repeats * 1e6:9.1f} µs")
+        return result
+
+    filters = {'Functional Area': ['Sales & Business Development'], 'city_grouped': ['Lahore']}
+    skills_text = df['Skills'].astype(str).str.lower()
+    segment = np.ones(len(df), dtype=bool)
+    for dim, selected in filters.items():
+        segment &= df[dim].isin(selected).to_numpy()
+
+    measure("substring scan, one skill + segment", lambda: df['salary_avg'][skills_text.str.contains('sales management', regex=False) & segment].mean(), 20)
+    measure("index, one skill + segment", lambda: index['salary'][postings_for(index, 'Sales Management')][segment[postings_for(index, 'Sales Management')]].mean())
+    measure("index, all skill premiums", lambda: skill_premiums(index))
+    measure("index, top 15 skill premiums + segment", lambda: skill_premiums(index, filters, min_count=3, top=15))
+    top = measure("index, all skill premiums + segment", lambda: skill_premiums(index, filters, min_count=3))
+
+    print(f"\n💡 TOP SKILL PREMIUMS ({', '.join(v[0] for v in filters.values())})")
+    print("=" * 60)
+    for row in top.head(10).itertuples():
+        print(f"   {row.skill:<40} {row.postings:4d} postings | PKR {row.premium:+10,.0f}")
@@ -0,0 +1,218 @@
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from data_cache import DATA_PATH, cache_dir_for
+from feature_encoder import CATEGORICAL_FEATURES, FALLBACK_CANDIDATES, FEATURE_NAMES, FeatureEncoder
+
+MATRIX_FORMAT_VERSION = 1
+
+TRAINING_COLUMNS = ['salary_avg', 'experience_years'] + CATEGORICAL_FEATURES
+
+DEFAULT_CHUNKSIZE = 100_000
+
+def matrix_dir_for(csv_path):
+    """Training matrix directory, kept in the data cache directory"""
+    return os.path.join(cache_dir_for(csv_path), 'training_matrix')
+
+def _collapse_whitespace(values):
+    """Collapse whitespace runs in a categorical column, rewriting only its categories"""
+    collapsed = np.array([' '.join(value.split()) for value in values.cat.categories] + [np.nan], dtype=object)
+    return pd.Series(collapsed[values.cat.codes.to_numpy()], index=values.index, dtype=object)
+
+def read_chunks(csv_path, chunksize):
+    """Training columns in chunks, with the same whitespace collapsing as the data cache"""
+    dtypes = {feature: 'category' for feature in CATEGORICAL_FEATURES}
+    for chunk in pd.read_csv(csv_path, usecols=TRAINING_COLUMNS, dtype=dtypes, chunksize=chunksize):
+        for feature in CATEGORICAL_FEATURES:
+            chunk[feature] = _collapse_whitespace(chunk[feature])
+        yield chunk.dropna(subset=['salary_avg', 'experience_years'])
+
+def stratum_keys(chunk, strata):
+    """One string key per row joining its strata values"""
+    keys = chunk[strata[0]].astype(str)
+    for column in strata[1:]:
+        keys = keys + '|' + chunk[column].astype(str)
+    return keys.to_numpy()
+
+def scan_training_data(csv_path, chunksize=DEFAULT_CHUNKSIZE, strata=None):
+    """
+    First pass: category vocabularies, usable row count and rows per stratum.
+    Memory is bounded by the chunk size and the number of distinct values.
+    """
+    counts = {feature: {} for feature in CATEGORICAL_FEATURES}
+    stratum_counts = {}
+    n_rows = 0
+
+    for chunk in read_chunks(csv_path, chunksize):
+        n_rows += len(chunk)
+        for feature in CATEGORICAL_FEATURES:
+            values = chunk[feature].astype(object).fillna('Unknown')
+            for value, count in values.value_counts().items():
+                counts[feature][value] = counts[feature].get(value, 0) + count
+        if strata:
+            keys, key_counts = np.unique(stratum_keys(chunk, strata), return_counts=True)
+            for key, count in zip(keys, key_counts):
+                stratum_counts[key] = stratum_counts.get(key, 0) + int(count)
+
+    # Same sorted vocabularies and fallbacks as FeatureEncoder.fit on the full frame
+    vocabularies = {feature: sorted(counts[feature]) for feature in CATEGORICAL_FEATURES}
+    fallbacks = {
+        feature: max(counts[feature], key=counts[feature].get) for feature in CATEGORICAL_FEATURES
+        if not any(c in counts[feature] for c in FALLBACK_CANDIDATES)
+    }
+    return FeatureEncoder(vocabularies, fallbacks=fallbacks), n_rows, stratum_counts
+
+def sample_strata(stratum_counts, max_per_stratum, seed=0):
+    """
+    For each stratum, a boolean mask over its rows (in file order) keeping at
+    most max_per_stratum of them uniformly at random
+    """
+    rng = np.random.default_rng(seed)
+    masks = {}
+    for key, count in sorted(stratum_counts.items()):
+        mask = np.zeros(count, dtype=bool)
+        mask[rng.choice(count, size=min(count, max_per_stratum), replace=False)] = True
+        masks[key] = mask
+    return masks
+
+def build_training_matrix(csv_path=DATA_PATH, out_dir=None, chunksize=DEFAULT_CHUNKSIZE, strata=None, max_per_stratum=None, seed=0):
+    """
+    Stream the CSV into a memory-mapped float32 training matrix.
+
+    Two passes over the file: the first builds the vocabularies (and stratum
+    sizes when subsampling), the second encodes each chunk with the shared
+    FeatureEncoder and writes it straight into X.npy / y.npy, so peak memory
+    depends on the chunk size, not on the file size. With strata and
+    max_per_stratum, at most that many rows are kept per stratum.
+    """
+    out_dir = out_dir or matrix_dir_for(csv_path)
+    encoder, n_rows, stratum_counts = scan_training_data(csv_path, chunksize, strata if max_per_stratum else None)
+
+    masks, positions = None, None
+    if strata and max_per_stratum:
+        masks = sample_strata(stratum_counts, max_per_stratum, seed)
+        positions = dict.fromkeys(masks, 0)
+        n_kept = sum(int(mask.sum()) for mask in masks.values())
+    else:
+        n_kept = n_rows
+
+    tmp_dir = out_dir.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    # float32 halves the file and every chunk read; training does not use it
+    # in place (see prepare_matrix_training_data)
+    X = np.lib.format.open_memmap(os.path.join(tmp_dir, 'X.npy'), mode='w+', dtype=np.float32, shape=(n_kept, len(FEATURE_NAMES)))
+    y = np.lib.format.open_memmap(os.path.join(tmp_dir, 'y.npy'), mode='w+', dtype=np.float32, shape=(n_kept,))
+
+    row = 0
+    for chunk in read_chunks(csv_path, chunksize):
+        if masks is not None:
+            # Rows of each stratum in file order, matched against its mask
+            codes, keys = pd.factorize(stratum_keys(chunk, strata))
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(keys) + 1))
+            keep = np.empty(len(chunk), dtype=bool)
+            for i, key in enumerate(keys):
+                rows = order[bounds[i]:bounds[i + 1]]
+                keep[rows] = masks[key][positions[key]:positions[key] + len(rows)]
+                positions[key] += len(rows)
+            chunk = chunk[keep]
+
+        n_chunk = len(chunk)
+        X[row:row + n_chunk] = encoder.transform(chunk).to_numpy(dtype=np.float32)
+        y[row:row + n_chunk] = chunk['salary_avg'].to_numpy(dtype=np.float32)
+        row += n_chunk
+
+    X.flush()
+    y.flush()
+    del X, y
+
+    stat = os.stat(csv_path)
+    manifest = {
+        'format_version': MATRIX_FORMAT_VERSION,
+        'csv_size': stat.st_size,
+        'csv_mtime_ns': stat.st_mtime_ns,
+        'n_source_rows': n_rows,
+        'n_rows': n_kept,
+        'feature_names': FEATURE_NAMES,
+        'encoders': encoder.vocabularies,
+        'fallbacks': encoder.fallbacks,
+        'strata': strata if max_per_stratum else None,
+        'max_per_stratum': max_per_stratum
+    }
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return manifest
+
+def open_training_matrix(out_dir):
+    """Memory-mapped (X, y, feature_encoder, manifest) of a built training matrix"""
+    with open(os.path.join(out_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest['format_version'] > MATRIX_FORMAT_VERSION:
+        raise ValueError(f"Unsupported training matrix format {manifest['format_version']}")
+
+    X = np.load(os.path.join(out_dir, 'X.npy'), mmap_mode='r')
+    y = np.load(os.path.join(out_dir, 'y.npy'), mmap_mode='r')
+    return X, y, FeatureEncoder(manifest['encoders'], fallbacks=manifest['fallbacks']), manifest
+
+def prepare_matrix_training_data(out_dir, test_size=0.2, seed=42):
+    """
+    Same contract as confidence_model.prepare_training_data, read from a
+    training matrix. Rows are split by index and scaled in chunks.
+
+    Only the build is out-of-core. The scaler is fitted on an in-memory
+    float32 copy of the training rows, the scaled rows are float64 like
+    prepare_training_data's, and sklearn makes another float32 copy of
+    them for each forest it fits. Training therefore needs roughly
+    12-16 bytes per training value, on top of the memory-mapped matrix.
+    """
+    from sklearn.preprocessing import RobustScaler
+
+    X, y, encoder, _ = open_training_matrix(out_dir)
+    order = np.random.default_rng(seed).permutation(len(X))
+    n_test = int(np.ceil(len(X) * test_size))
+    test_rows, train_rows = np.sort(order[:n_test]), np.sort(order[n_test:])
+
+    X_train = pd.DataFrame(X[train_rows], columns=FEATURE_NAMES)
+    scaler = RobustScaler().fit(X_train)
+
+    def scaled(rows):
+        out = np.empty((len(rows), X.shape[1]))
+        for start in range(0, len(rows), DEFAULT_CHUNKSIZE):
+            block = rows[start:start + DEFAULT_CHUNKSIZE]
+            out[start:start + len(block)] = scaler.transform(pd.DataFrame(X[block], columns=FEATURE_NAMES))
+        return out
+
+    return encoder, scaler, scaled(train_rows), scaled(test_rows), y[train_rows].astype(float), y[test_rows].astype(float)
+
+if __name__ == "__main__":
+    import argparse
+    import resource
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Stream a cleaned postings CSV into a memory-mapped training matrix")
+    parser.add_argument('csv_path', nargs='?', default=DATA_PATH)
+    parser.add_argument('--out', default=None, help="matrix directory (default: inside the CSV's cache directory)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--strata', nargs='+', default=None, help="columns defining strata for subsampling, e.g. city_grouped 'Career Level'")
+    parser.add_argument('--max-per-stratum', type=int, default=None)
+    args = parser.parse_args()
+
+    print("🏭 BUILDING TRAINING MATRIX")
+    print("=" * 60)
+    start = time.perf_counter()
+    manifest = build_training_matrix(args.csv_path, args.out, args.chunksize, args.strata, args.max_per_stratum)
+    elapsed = time.perf_counter() - start
+
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    print(f"   Rows: {manifest['n_source_rows']:,} read -> {manifest['n_rows']:,} kept")
+    print(f"   Vocabularies: " + ", ".join(f"{feature} {len(values)}" for feature, values in manifest['encoders'].items()))
+    print(f"   Time: {elapsed:.1f}s ({manifest['n_source_rows'] / elapsed:,.0f} rows/s)")
+    print(f"   Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit:,.0f} MB")
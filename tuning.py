@@ -0,0 +1,253 @@
+import contextlib
+import io
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import train_test_split
+from confidence_model import fit_uncertainty_model, predict_scaled_with_uncertainty, prepare_training_data
+from data_cache import load_salary_data
+from model_artifact import TREE_ARRAY_NAMES
+
+TRAINING_COLUMNS = ['salary_avg', 'experience_years', 'Career Level', 'Functional Area', 'city_grouped', 'Minimum Education']
+
+# Candidate grid; single-forest modes always use one forest
+SEARCH_SPACE = {
+    'uncertainty': ['ensemble', 'tree_spread', 'conformal'],
+    'n_models': [3, 5, 10],
+    'n_estimators': [10, 25, 50, 100, 200],
+    'max_depth': [4, 6, 8, 10, 14],
+    'min_samples_split': [2, 8, 16],
+    'min_samples_leaf': [1, 3, 5]
+}
+
+# Share of the training split held out to rank candidates between rungs
+VALIDATION_SIZE = 0.2
+
+# Nominal coverage of the 95% interval; the frontier minimizes the distance to it
+TARGET_COVERAGE = 95.0
+
+# Least interval coverage (%) a model may have to be recommended
+MIN_COVERAGE = 90.0
+
+def sample_candidates(n_candidates, seed=0):
+    """Distinct random configurations from SEARCH_SPACE"""
+    grid = []
+    for values in itertools.product(*SEARCH_SPACE.values()):
+        config = dict(zip(SEARCH_SPACE, values))
+        if config['uncertainty'] != 'ensemble':
+            config['n_models'] = 1
+        if config not in grid:
+            grid.append(config)
+    rng = np.random.default_rng(seed)
+    return [grid[i] for i in rng.choice(len(grid), size=min(n_candidates, len(grid)), replace=False)]
+
+def _init_worker(data):
+    global _tuning_data
+    _tuning_data = data
+
+def _evaluate_candidate(config, fraction, final):
+    """
+    Fit one candidate on a fraction of the fitting rows and score it on the
+    validation rows, or on the full training split and the test rows when final
+    """
+    data = _tuning_data
+    if final:
+        X_fit, y_fit, X_eval, y_eval = data['X_train'], data['y_train'], data['X_test'], data['y_test']
+    else:
+        n_rows = max(20, int(len(data['X_fit']) * fraction))
+        X_fit, y_fit = data['X_fit'][:n_rows], data['y_fit'][:n_rows]
+        X_eval, y_eval = data['X_val'], data['y_val']
+
+    forest_params = {k: config[k] for k in ['n_estimators', 'max_depth', 'min_samples_split', 'min_samples_leaf']}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fitted = fit_uncertainty_model(X_fit, y_fit, config['uncertainty'], forest_params=forest_params, n_models=config['n_models'])
+    fit_time = time.perf_counter() - start
+
+    model_data = {**fitted, 'uncertainty': config['uncertainty']}
+    del model_data['models']
+    mean_pred, std_pred = predict_scaled_with_uncertainty(X_eval, model_data)
+    lower, upper = mean_pred - 1.96 * std_pred, mean_pred + 1.96 * std_pred
+
+    result = {
+        'config': config,
+        'fraction': 1.0 if final else fraction,
+        'mae': float(mean_absolute_error(y_eval, mean_pred)),
+        'r2': float(r2_score(y_eval, mean_pred)),
+        'coverage': float(np.mean((y_eval >= lower) & (y_eval <= upper)) * 100),
+        'interval_width': float(np.mean(upper - lower)),
+        'fit_s': fit_time,
+        'trees': int(fitted['tree_arrays']['forest_sizes'].sum()),
+        'size_kb': sum(np.asarray(fitted['tree_arrays'][name]).nbytes for name in TREE_ARRAY_NAMES) / 1024
+    }
+    return result, model_data if final else None
+
+def cost_proxy(config):
+    """Relative inference cost before latency is measured: trees walked times depth"""
+    return config['n_models'] * config['n_estimators'] * config['max_depth']
+
+def coverage_gap(result):
+    """Distance in points between a result's interval coverage and TARGET_COVERAGE"""
+    return abs(result['coverage'] - TARGET_COVERAGE)
+
+def pareto_ranks(points):
+    """Non-dominated sorting rank (0 = frontier) of points to minimize, one row per point"""
+    points = np.asarray(points, dtype=float)
+    ranks = np.full(len(points), -1)
+    rank = 0
+    while (ranks < 0).any():
+        remaining = np.flatnonzero(ranks < 0)
+        for i in remaining:
+            others = points[remaining]
+            dominated = np.any(np.all(others <= points[i], axis=1) & np.any(others < points[i], axis=1))
+            if not dominated:
+                ranks[i] = rank
+        rank += 1
+    return ranks
+
+def measure_latency(model_data, X_rows, batch_size=1000, repeats=50):
+    """Per-row inference latency in ms for single rows and for a full batch"""
+    single = []
+    for i in range(repeats):
+        row = X_rows[i % len(X_rows)][None, :]
+        start = time.perf_counter()
+        predict_scaled_with_uncertainty(row, model_data)
+        single.append(time.perf_counter() - start)
+
+    batch = X_rows[np.arange(batch_size) % len(X_rows)]
+    start = time.perf_counter()
+    for _ in range(max(1, repeats // 10)):
+        predict_scaled_with_uncertainty(batch, model_data)
+    batch_time = (time.perf_counter() - start) / max(1, repeats // 10)
+    return float(np.median(single) * 1000), float(batch_time / batch_size * 1000)
+
+def successive_halving(n_candidates=48, eta=2, min_fraction=0.25, n_jobs=-1, seed=0, df=None):
+    """
+    Search SEARCH_SPACE with successive halving.
+
+    Candidates start on min_fraction of the fitting rows; after each rung
+    the best 1/eta, ranked by Pareto rank on (validation MAE, cost proxy,
+    coverage gap) so cheap or well-calibrated models are not crowded out by
+    accurate expensive ones, move on to eta times more rows. Survivors of
+    the last rung are refit on the full training split and scored on the
+    untouched test split, and their frontier uses measured latency.
+
+    Every history entry is also marked with its place on the frontier of
+    the whole search (history_frontier).
+    """
+    if df is None:
+        df = load_salary_data(TRAINING_COLUMNS)
+    _, _, X_train, X_test, y_train, y_test = prepare_training_data(df)
+    X_fit, X_val, y_fit, y_val = train_test_split(X_train, y_train, test_size=VALIDATION_SIZE, random_state=0)
+    data = {'X_train': X_train, 'y_train': y_train, 'X_test': X_test, 'y_test': y_test,
+            'X_fit': X_fit, 'y_fit': y_fit, 'X_val': X_val, 'y_val': y_val}
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    candidates = sample_candidates(n_candidates, seed)
+    history = []
+
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(data,)) as pool:
+        fraction = min_fraction
+        while fraction < 1 and len(candidates) > 1:
+            results = [result for result, _ in pool.map(_evaluate_candidate, candidates, [fraction] * len(candidates), [False] * len(candidates))]
+            history.extend(results)
+            ranks = pareto_ranks([[r['mae'], cost_proxy(r['config']), coverage_gap(r)] for r in results])
+            order = np.lexsort(([r['mae'] for r in results], ranks))
+            candidates = [candidates[i] for i in order[:max(1, len(candidates) // eta)]]
+            print(f"   Rung {fraction:.0%} of rows: {len(results)} candidates -> {len(candidates)} promoted")
+            fraction *= eta
+
+        final = list(pool.map(_evaluate_candidate, candidates, [1.0] * len(candidates), [True] * len(candidates)))
+
+    # Latency is measured serially in this process so workers don't skew it
+    finalists = []
+    for result, model_data in final:
+        result['latency_ms'], result['batch_latency_ms'] = measure_latency(model_data, X_test)
+        finalists.append(result)
+
+    ranks = pareto_ranks([[r['mae'], r['latency_ms'], coverage_gap(r)] for r in finalists])
+    for result, rank in zip(finalists, ranks):
+        result['pareto'] = bool(rank == 0)
+    finalists.sort(key=lambda r: r['latency_ms'])
+    history_frontier(history)
+    return finalists, history
+
+def history_frontier(history):
+    """
+    Mark the Pareto frontier of the whole search on (validation MAE, cost
+    proxy, coverage gap), including candidates dropped at early rungs.
+
+    Each configuration is judged by its result on the most rows it reached;
+    its earlier rungs are marked off the frontier. Returns the frontier.
+    """
+    latest = {}
+    for i, result in enumerate(history):
+        key = json.dumps(result['config'], sort_keys=True)
+        if key not in latest or result['fraction'] >= history[latest[key]]['fraction']:
+            latest[key] = i
+    for result in history:
+        result['pareto'] = False
+    indices = list(latest.values())
+    ranks = pareto_ranks([[history[i]['mae'], cost_proxy(history[i]['config']), coverage_gap(history[i])] for i in indices])
+    for i, rank in zip(indices, ranks):
+        history[i]['pareto'] = bool(rank == 0)
+    return [history[i] for i in indices if history[i]['pareto']]
+
+def select_for_budget(finalists, max_latency_ms, min_coverage=MIN_COVERAGE):
+    """Most accurate frontier model whose single-row latency fits the budget and whose coverage reaches min_coverage"""
+    eligible = [r for r in finalists if r['pareto'] and r['latency_ms'] <= max_latency_ms and r['coverage'] >= min_coverage]
+    return min(eligible, key=lambda r: r['mae']) if eligible else None
+
+def describe(config):
+    forests = f"{config['n_models']}x" if config['uncertainty'] == 'ensemble' else ''
+    return (f"{config['uncertainty']:<11} {forests}{config['n_estimators']} trees d{config['max_depth']} "
+            f"split{config['min_samples_split']} leaf{config['min_samples_leaf']}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Successive-halving hyperparameter search with a latency/accuracy Pareto report")
+    parser.add_argument('--candidates', type=int, default=48)
+    parser.add_argument('--eta', type=int, default=2, help="keep 1/eta of candidates per rung")
+    parser.add_argument('--jobs', type=int, default=-1, help="worker processes (-1 for all cores)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget-ms', type=float, default=None, help="recommend the best frontier model under this single-row latency")
+    parser.add_argument('--min-coverage', type=float, default=MIN_COVERAGE, help="least interval coverage (%%) a recommended model may have")
+    parser.add_argument('--output', default='tuning_report.json')
+    args = parser.parse_args()
+
+    print("🔧 HYPERPARAMETER SEARCH (successive halving)")
+    print("=" * 60)
+    start = time.perf_counter()
+    finalists, history = successive_halving(args.candidates, args.eta, n_jobs=args.jobs, seed=args.seed)
+    print(f"   Search time: {time.perf_counter() - start:.1f}s")
+
+    print(f"\n📈 FINALISTS (test split; * = Pareto frontier on MAE, latency and |coverage - {TARGET_COVERAGE:.0f}%|)")
+    print("=" * 60)
+    for r in finalists:
+        print(f" {'*' if r['pareto'] else ' '} {describe(r['config']):<48} MAE PKR {r['mae']:,.0f} | R² {r['r2']:.3f} | "
+              f"coverage {r['coverage']:5.1f}% | {r['size_kb']:,.0f} KB | "
+              f"{r['latency_ms']:.2f} ms/row single, {r['batch_latency_ms'] * 1000:.1f} µs/row batched")
+
+    print(f"\n🧭 SEARCH FRONTIER (validation split, furthest rung; MAE, cost proxy, |coverage - {TARGET_COVERAGE:.0f}%|)")
+    print("=" * 60)
+    for r in sorted((r for r in history if r['pareto']), key=lambda r: cost_proxy(r['config'])):
+        print(f"   {describe(r['config']):<48} MAE PKR {r['mae']:,.0f} | coverage {r['coverage']:5.1f}% | "
+              f"cost {cost_proxy(r['config']):,} | {r['fraction']:.0%} of rows")
+
+    if args.budget_ms is not None:
+        choice = select_for_budget(finalists, args.budget_ms, args.min_coverage)
+        if choice:
+            print(f"\n✅ Best under {args.budget_ms} ms with ≥{args.min_coverage:.0f}% coverage: "
+                  f"{describe(choice['config'])} (MAE PKR {choice['mae']:,.0f}, coverage {choice['coverage']:.1f}%)")
+        else:
+            print(f"\n⚠️ No frontier model fits {args.budget_ms} ms with ≥{args.min_coverage:.0f}% coverage")
+
+    with open(args.output, 'w') as f:
+        json.dump({'finalists': finalists, 'history': history}, f, indent=2)
+    print(f"\n💾 Saved report to {args.output}")
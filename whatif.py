@@ -0,0 +1,101 @@
+import itertools
+import numpy as np
+import pandas as pd
+from confidence_model import career_level_for_experience, predict_batch_with_confidence
+from prediction_cube import AXIS_COLUMNS, grid_axes, predict_batch_with_cube
+
+AXIS_LABELS = {
+    'experience': "Experience (years)",
+    'education': "Education",
+    'city': "City",
+    'area': "Functional Area"
+}
+
+# Every two-attribute combination gets a heatmap
+SWEEP_PAIRS = list(itertools.combinations(AXIS_COLUMNS, 2))
+
+def counterfactual_profiles(base_profile, axes, pairs=SWEEP_PAIRS):
+    """
+    The base profile, every single-attribute change and every two-attribute
+    grid over axes, as one DataFrame plus its layout.
+
+    Layout maps ('base',), (axis,) and (axis_a, axis_b) to the slice of rows
+    holding that block, in C order over its axes. Career level follows the
+    experience of each profile.
+    """
+    blocks = [('base',)] + [(axis,) for axis in axes] + list(pairs)
+    columns = {column: [] for column in AXIS_COLUMNS.values()}
+    layout, start = {}, 0
+
+    for block in blocks:
+        varied = [axis for axis in block if axis != 'base']
+        grids = np.meshgrid(*[axes[axis] for axis in varied], indexing='ij') if varied else []
+        size = grids[0].size if varied else 1
+        for axis, column in AXIS_COLUMNS.items():
+            if axis in varied:
+                columns[column].append(grids[varied.index(axis)].ravel())
+            else:
+                columns[column].append(np.full(size, base_profile[column], dtype=object))
+        layout[block] = slice(start, start + size)
+        start += size
+
+    profiles = pd.DataFrame({column: np.concatenate(values) for column, values in columns.items()})
+    profiles['experience_years'] = profiles['experience_years'].astype(float)
+    levels = {e: career_level_for_experience(e) for e in profiles['experience_years'].unique()}
+    profiles['Career Level'] = profiles['experience_years'].map(levels)
+    return profiles, layout
+
+def score_profiles(profiles, model_data):
+    """[prediction, uncertainty, lower, upper] rows for a profile frame in one batched pass"""
+    if 'prediction_cube' in model_data:
+        return predict_batch_with_cube(profiles, model_data['prediction_cube'], model_data)
+    return predict_batch_with_confidence(profiles, model_data)
+
+def run_sweep(base_profile, model_data, pairs=SWEEP_PAIRS):
+    """
+    Predicted salary change from the base profile for every single- and
+    two-attribute change.
+
+    Returns the base prediction row, the axes, and per block the predicted
+    salaries and their deltas from the base, shaped like the block's axes.
+    """
+    axes = grid_axes(model_data)
+    profiles, layout = counterfactual_profiles(base_profile, axes, pairs)
+    results = score_profiles(profiles, model_data)
+
+    base = results[layout[('base',)]][0]
+    sweep = {'base': base, 'axes': axes, 'predictions': {}, 'deltas': {}}
+    for block, rows in layout.items():
+        if block == ('base',):
+            continue
+        shape = tuple(len(axes[axis]) for axis in block)
+        sweep['predictions'][block] = results[rows, 0].reshape(shape)
+        sweep['deltas'][block] = sweep['predictions'][block] - base[0]
+    return sweep
+
+if __name__ == "__main__":
+    import time
+    from model_artifact import load_serving_model
+    from prediction_cube import load_prediction_cube
+
+    print("🔀 WHAT-IF SWEEP BENCHMARK")
+    print("=" * 60)
+
+    model_data, model_path = load_serving_model()
+    base_profile = {'experience_years': 2, 'Career Level': 'Entry Level', 'Minimum Education': 'Bachelors',
+                    'city_grouped': 'Lahore', 'Functional Area': 'General'}
+
+    for label in ["live inference", "prediction cube"]:
+        if label == "prediction cube":
+            model_data['prediction_cube'] = load_prediction_cube(model_data, model_path)
+        start = time.perf_counter()
+        sweep = run_sweep(base_profile, model_data)
+        n_profiles = 1 + sum(delta.size for delta in sweep['deltas'].values())
+        print(f"   {label:<16} {n_profiles:,} counterfactuals in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    print(f"\n📈 BEST SINGLE CHANGES (base PKR {sweep['base'][0]:,.0f})")
+    print("=" * 60)
+    for axis in AXIS_COLUMNS:
+        deltas = sweep['deltas'][(axis,)]
+        best = int(np.argmax(deltas))
+        print(f"   {AXIS_LABELS[axis]:<20} {str(sweep['axes'][axis][best]):<36} PKR {deltas[best]:+,.0f}")